@@ -4,8 +4,12 @@ This module defines a comprehensive code review assistant that analyzes
 Python code and provides detailed feedback through a multi-stage pipeline.
 """
 
-from google.adk.agents import Agent, SequentialAgent, LoopAgent
+from google.adk.agents import Agent, SequentialAgent, LoopAgent, ParallelAgent
+from google.adk.agents.callback_context import CallbackContext
 from .config import config
+from .constants import StateKeys
+from .incremental import extract_code_block
+from .timing import stage_timer
 from .sub_agents import (
     code_analyzer_agent,
     style_checker_agent,
@@ -17,16 +21,46 @@ from .sub_agents import (
     fix_synthesizer_agent
 )
 
+
+def capture_submission(callback_context: CallbackContext) -> None:
+    """
+    Stores the submitted code in state so the review stages can start concurrently.
+
+    This is the only place a review's code_to_review is extracted and written;
+    the stages of the fan-out only read it.
+    """
+    user_content = callback_context.user_content
+    text = ''.join(part.text or '' for part in user_content.parts) if user_content else ''
+    code = extract_code_block(text)
+    callback_context.state[StateKeys.CODE_TO_REVIEW] = code
+    callback_context.state[StateKeys.CODE_LINE_COUNT] = len(code.splitlines())
+
+
+# --- Independent Review Stages ---
+# Analysis, style and tests only depend on code_to_review, so they run concurrently
+review_fan_out = ParallelAgent(
+    name="ReviewFanOut",
+    description="Runs structure analysis, style checking and testing concurrently",
+    sub_agents=[
+        code_analyzer_agent,
+        style_checker_agent,
+        test_runner_agent
+    ],
+    before_agent_callback=stage_timer.start,
+    after_agent_callback=stage_timer.stop
+)
+
 # --- Code Review Pipeline Sub-Agent ---
+# Feedback waits for all three stages; per-stage latency ends up in review_latency
 code_review_pipeline = SequentialAgent(
     name="CodeReviewPipeline",
     description="Complete code review pipeline with analysis, testing, and feedback",
     sub_agents=[
-        code_analyzer_agent,
-        style_checker_agent,
-        test_runner_agent,
+        review_fan_out,
         feedback_synthesizer_agent
-    ]
+    ],
+    before_agent_callback=[capture_submission, stage_timer.start],
+    after_agent_callback=stage_timer.report
 )
 
 # --- Fix Attempt Loop ---
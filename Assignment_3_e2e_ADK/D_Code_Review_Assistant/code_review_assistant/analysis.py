@@ -0,0 +1,210 @@
+"""
+Single-pass structural analysis for the Code Review Assistant.
+
+One NodeVisitor traversal collects everything the review tools need from
+the AST: functions (sync and async), classes, imports, docstrings, PEP 8
+naming violations, per-function cyclomatic complexity and function lengths.
+"""
+import ast
+from typing import Any, Dict, List, Optional
+
+# Nodes that add one decision point to the enclosing function
+_BRANCH_NODES = (
+    ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While,
+    ast.ExceptHandler, ast.Assert, ast.match_case,
+)
+
+
+class CodeStructureVisitor(ast.NodeVisitor):
+    """Collects structure, naming issues and metrics in a single traversal."""
+
+    def __init__(self):
+        self.functions: List[Dict[str, Any]] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.imports: List[Dict[str, Any]] = []
+        self.docstrings: List[str] = []
+        self.naming_issues: List[Dict[str, Any]] = []
+        # Complexity counters of the functions currently being visited (innermost last)
+        self._complexity_stack: List[int] = []
+
+    # --- Definitions ---
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_function(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._visit_function(node)
+
+    def _visit_function(self, node) -> None:
+        docstring = ast.get_docstring(node)
+        func_info = {
+            'name': node.name,
+            'args': [arg.arg for arg in node.args.args],
+            'lineno': node.lineno,
+            'end_lineno': getattr(node, 'end_lineno', node.lineno),
+            'length': getattr(node, 'end_lineno', node.lineno) - node.lineno + 1,
+            'has_docstring': docstring is not None,
+            'is_async': isinstance(node, ast.AsyncFunctionDef),
+            'decorators': [d.id for d in node.decorator_list
+                           if isinstance(d, ast.Name)]
+        }
+        self.functions.append(func_info)
+
+        if docstring is not None:
+            self.docstrings.append(f"{node.name}: {docstring[:50]}...")
+
+        # Skip private/protected methods and __main__
+        if not node.name.startswith('_') and node.name != node.name.lower():
+            self.naming_issues.append({
+                'line': node.lineno,
+                'column': node.col_offset,
+                'code': 'N802',
+                'message': f"N802 function name '{node.name}' should be lowercase"
+            })
+
+        self._complexity_stack.append(1)
+        self.generic_visit(node)
+        func_info['complexity'] = self._complexity_stack.pop()
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.classes.append({
+            'name': node.name,
+            'lineno': node.lineno,
+            'methods': [item.name for item in node.body
+                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))],
+            'has_docstring': ast.get_docstring(node) is not None,
+            'base_classes': [base.id for base in node.bases
+                             if isinstance(base, ast.Name)]
+        })
+
+        # Check if class name follows CapWords convention
+        if not node.name[0].isupper() or '_' in node.name:
+            self.naming_issues.append({
+                'line': node.lineno,
+                'column': node.col_offset,
+                'code': 'N801',
+                'message': f"N801 class name '{node.name}' should use CapWords convention"
+            })
+
+        self.generic_visit(node)
+
+    # --- Imports ---
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append({
+                'module': alias.name,
+                'alias': alias.asname,
+                'type': 'import'
+            })
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        self.imports.append({
+            'module': node.module or '',
+            'names': [alias.name for alias in node.names],
+            'type': 'from_import',
+            'level': node.level
+        })
+
+    # --- Complexity ---
+
+    def generic_visit(self, node: ast.AST) -> None:
+        if self._complexity_stack:
+            if isinstance(node, _BRANCH_NODES):
+                self._complexity_stack[-1] += 1
+            elif isinstance(node, ast.BoolOp):
+                self._complexity_stack[-1] += len(node.values) - 1
+            elif isinstance(node, ast.comprehension):
+                self._complexity_stack[-1] += 1 + len(node.ifs)
+        super().generic_visit(node)
+
+
+def top_level_units(tree: ast.Module, line_count: int) -> List[Dict[str, Any]]:
+    """
+    Partitions a module into consecutive top-level units.
+
+    Each function or class definition (with its decorators) is one unit;
+    runs of other module-level statements are grouped into "module" units.
+    A unit also owns the blank lines and comments preceding it, so the units
+    cover every line of the file exactly once.
+    """
+    units: List[Dict[str, Any]] = []
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+        end = getattr(node, 'end_lineno', node.lineno)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind, name = 'function', node.name
+        elif isinstance(node, ast.ClassDef):
+            kind, name = 'class', node.name
+        else:
+            kind, name = 'module', None
+
+        if kind == 'module' and units and units[-1]['kind'] == 'module':
+            units[-1]['end'] = end
+            continue
+        units.append({
+            'name': name,
+            'kind': kind,
+            'is_async': isinstance(node, ast.AsyncFunctionDef),
+            'start': units[-1]['end'] + 1 if units else 1,
+            'def_lineno': start,
+            'end': end
+        })
+
+    if not units:
+        return [{'name': None, 'kind': 'module', 'is_async': False, 'start': 1,
+                 'def_lineno': 1, 'end': max(line_count, 1)}]
+    # Trailing blank lines/comments belong to the last unit
+    units[-1]['end'] = max(units[-1]['end'], line_count)
+    return units
+
+
+def analyze_tree(tree: ast.AST, code: str) -> Dict[str, Any]:
+    """
+    Builds the structural analysis for an already-parsed module.
+
+    Args:
+        tree: Parsed module
+        code: Source the tree was parsed from
+
+    Returns:
+        Dictionary with functions, classes, imports, docstrings,
+        naming issues, top-level units and aggregate metrics
+    """
+    visitor = CodeStructureVisitor()
+    visitor.visit(tree)
+
+    functions = visitor.functions
+    lengths = [f['length'] for f in functions]
+    complexities = [f['complexity'] for f in functions]
+
+    return {
+        'functions': functions,
+        'classes': visitor.classes,
+        'imports': visitor.imports,
+        'docstrings': visitor.docstrings,
+        'naming_issues': visitor.naming_issues,
+        'units': top_level_units(tree, len(code.splitlines())),
+        'metrics': {
+            'line_count': len(code.splitlines()),
+            'function_count': len(functions),
+            'class_count': len(visitor.classes),
+            'import_count': len(visitor.imports),
+            'has_main': any(f['name'] == 'main' for f in functions),
+            'has_if_main': '__main__' in code,
+            'avg_function_length': sum(lengths) / len(lengths) if lengths else 0.0,
+            'max_function_length': max(lengths, default=0),
+            'avg_complexity': sum(complexities) / len(complexities) if complexities else 0.0,
+            'max_complexity': max(complexities, default=0)
+        }
+    }
+
+
+def analyze_source(code: str, filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parses source once and returns its structural analysis.
+
+    Raises:
+        SyntaxError: If the code cannot be parsed
+    """
+    return analyze_tree(ast.parse(code, filename=filename or '<unknown>'), code)
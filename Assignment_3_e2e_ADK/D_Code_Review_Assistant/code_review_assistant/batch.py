@@ -0,0 +1,297 @@
+"""
+Batch / repository review mode for the Code Review Assistant.
+
+Reviews every Python file in a directory or tarball (optionally restricted
+to the files touched by a unified diff). The deterministic tools (structure
+analysis, pycodestyle and naming checks) run across all files in parallel
+worker processes; the LLM review pipeline is only invoked for files that
+exceed the configured thresholds. Results are streamed as one JSONL record
+per file, followed by an aggregate summary record.
+
+Usage:
+    python -m code_review_assistant.batch path/to/repo --output review.jsonl
+    python -m code_review_assistant.batch repo.tar.gz --diff pr.diff
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tarfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, IO, Iterator, Optional, Set, Tuple
+
+from .analysis import analyze_source
+from .config import config
+from .constants import StateKeys
+from .tools import check_style
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directories that never contain reviewable project sources
+SKIP_DIRS = {'.git', '.hg', '.venv', 'venv', '__pycache__', 'node_modules', 'build', 'dist'}
+
+
+def iter_sources(path: str, only: Optional[Set[str]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (relative path, source) for every Python file under a directory or in a tarball.
+
+    Args:
+        path: Directory or tar archive (any compression tarfile understands)
+        only: Optional set of relative paths to restrict the review to
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+            for name in sorted(files):
+                if not name.endswith('.py'):
+                    continue
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, path).replace(os.sep, '/')
+                if only is not None and rel_path not in only:
+                    continue
+                with open(full_path, encoding='utf-8', errors='replace') as f:
+                    yield rel_path, f.read()
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            members = [m for m in archive.getmembers()
+                       if m.isfile() and m.name.endswith('.py')]
+            root = _common_archive_root([m.name for m in members])
+            for member in members:
+                rel_path = _normalise_archive_name(member.name)[len(root):]
+                if only is not None and rel_path not in only:
+                    continue
+                data = archive.extractfile(member)
+                if data is not None:
+                    yield rel_path, data.read().decode('utf-8', errors='replace')
+    else:
+        raise ValueError(f"{path} is neither a directory nor a tar archive")
+
+
+def _normalise_archive_name(name: str) -> str:
+    return name[2:] if name.startswith('./') else name
+
+
+def _common_archive_root(names) -> str:
+    """Returns the single top-level directory (with slash) wrapping all names, or ''."""
+    roots = {_normalise_archive_name(n).split('/', 1)[0] + '/' for n in names}
+    if len(roots) == 1 and all('/' in _normalise_archive_name(n) for n in names):
+        return roots.pop()
+    return ''
+
+
+def changed_files_from_diff(diff_text: str) -> Set[str]:
+    """Returns the Python files added or modified by a unified diff."""
+    changed = set()
+    for line in diff_text.splitlines():
+        if line.startswith('+++ '):
+            target = line[4:].split('\t', 1)[0].strip()
+            if target == '/dev/null':
+                continue
+            if target.startswith('b/'):
+                target = target[2:]
+            if target.endswith('.py'):
+                changed.add(target)
+    return changed
+
+
+def review_file(path: str, source: str) -> Dict[str, Any]:
+    """
+    Runs the deterministic review tools on one file.
+
+    Executed in worker processes, so it only takes and returns plain data.
+    """
+    record: Dict[str, Any] = {'path': path, 'line_count': len(source.splitlines())}
+    try:
+        analysis = analyze_source(source, filename=path)
+    except SyntaxError as e:
+        record.update({
+            'status': 'syntax_error',
+            'message': f"Syntax error at line {e.lineno}: {e.msg}",
+        })
+        return record
+
+    style = check_style(source, analysis['naming_issues'])
+    record.update({
+        'status': 'success',
+        'metrics': analysis['metrics'],
+        'functions': [
+            {key: f[key] for key in ('name', 'lineno', 'length', 'complexity')}
+            for f in analysis['functions']
+        ],
+        'style_score': style['score'],
+        'style_issue_count': style['issue_count'],
+        'style_issues': style['issues'],
+        'style_issue_codes': style['issue_codes'],
+    })
+    return record
+
+
+def needs_llm_review(record: Dict[str, Any]) -> bool:
+    """Decides whether a file's deterministic results warrant a full LLM review."""
+    if record.get('status') != 'success':
+        return False
+    return (
+        record['style_score'] < config.batch_llm_style_threshold
+        or record['metrics']['max_complexity'] > config.batch_llm_complexity_threshold
+        or record['metrics']['max_function_length'] > config.batch_llm_function_length_threshold
+    )
+
+
+class _LLMReviewer:
+    """Runs the LLM review pipeline for flagged files with bounded concurrency."""
+
+    def __init__(self, concurrency: int):
+        from google.adk.runners import InMemoryRunner
+        from .agent import code_review_pipeline
+
+        self.runner = InMemoryRunner(agent=code_review_pipeline, app_name='code_review_batch')
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def review(self, path: str, source: str) -> Optional[str]:
+        from google.genai import types
+
+        async with self.semaphore:
+            session = await self.runner.session_service.create_session(
+                app_name=self.runner.app_name, user_id='batch'
+            )
+            message = types.Content(role='user', parts=[types.Part.from_text(
+                text=f"Please review {path}:\n```python\n{source}\n```"
+            )])
+            async for _ in self.runner.run_async(
+                user_id='batch', session_id=session.id, new_message=message
+            ):
+                pass
+            session = await self.runner.session_service.get_session(
+                app_name=self.runner.app_name, user_id='batch', session_id=session.id
+            )
+            return session.state.get(StateKeys.FINAL_FEEDBACK)
+
+
+class _Summary:
+    """Aggregates per-file records into the final summary."""
+
+    def __init__(self):
+        self.files = 0
+        self.syntax_errors = 0
+        self.llm_reviewed = 0
+        self.llm_failed = 0
+        self.style_scores = []
+        self.issue_codes: Counter = Counter()
+        self.started = time.monotonic()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.files += 1
+        if record['status'] == 'syntax_error':
+            self.syntax_errors += 1
+            return
+        self.style_scores.append(record['style_score'])
+        # style_issues only lists the first issues, the codes count all of them
+        self.issue_codes.update(record['style_issue_codes'])
+        if 'llm_feedback' in record:
+            self.llm_reviewed += 1
+        elif 'llm_error' in record:
+            self.llm_failed += 1
+
+    def as_record(self) -> Dict[str, Any]:
+        scores = self.style_scores
+        return {
+            'type': 'summary',
+            'files_reviewed': self.files,
+            'syntax_errors': self.syntax_errors,
+            'llm_reviewed': self.llm_reviewed,
+            'llm_failed': self.llm_failed,
+            'avg_style_score': round(sum(scores) / len(scores), 1) if scores else None,
+            'min_style_score': min(scores, default=None),
+            'top_issue_codes': dict(self.issue_codes.most_common(10)),
+            'elapsed_seconds': round(time.monotonic() - self.started, 2),
+        }
+
+
+async def run_batch_review(path: str,
+                           output: IO[str],
+                           only: Optional[Set[str]] = None,
+                           workers: Optional[int] = None,
+                           use_llm: bool = True) -> Dict[str, Any]:
+    """
+    Reviews all Python files under ``path`` and streams JSONL records to ``output``.
+
+    Args:
+        path: Directory or tar archive to review
+        output: Text stream receiving one JSON record per line
+        only: Optional set of relative paths to restrict the review to
+        workers: Worker process count (defaults to config.batch_max_workers)
+        use_llm: Run the LLM pipeline for files exceeding the thresholds
+
+    Returns:
+        The aggregate summary record (also written as the last line)
+    """
+    loop = asyncio.get_running_loop()
+    summary = _Summary()
+    reviewer = _LLMReviewer(config.batch_llm_concurrency) if use_llm else None
+
+    def emit(record: Dict[str, Any]) -> None:
+        summary.add(record)
+        output.write(json.dumps(record) + '\n')
+        output.flush()
+
+    async def finish(path: str, source: str, future) -> None:
+        record = await future
+        if reviewer is not None and needs_llm_review(record):
+            try:
+                record['llm_feedback'] = await reviewer.review(path, source)
+            except Exception as e:
+                logger.warning(f"Batch: LLM review of {path} failed: {e}")
+                record['llm_error'] = str(e)
+        emit({'type': 'file', **record})
+
+    with ProcessPoolExecutor(max_workers=workers or config.batch_max_workers) as executor:
+        tasks = [
+            asyncio.create_task(finish(
+                rel_path, source, loop.run_in_executor(executor, review_file, rel_path, source)
+            ))
+            for rel_path, source in iter_sources(path, only)
+        ]
+        await asyncio.gather(*tasks)
+
+    result = summary.as_record()
+    output.write(json.dumps(result) + '\n')
+    output.flush()
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Review a repository or PR with the Code Review Assistant")
+    parser.add_argument('path', help="Directory or tar archive to review")
+    parser.add_argument('--output', '-o', help="JSONL report file (defaults to stdout)")
+    parser.add_argument('--diff', help="Unified diff; only files it touches are reviewed")
+    parser.add_argument('--workers', type=int, help="Number of worker processes")
+    parser.add_argument('--no-llm', action='store_true', help="Only run the deterministic tools")
+    args = parser.parse_args(argv)
+
+    only = None
+    if args.diff:
+        with open(args.diff, encoding='utf-8') as f:
+            only = changed_files_from_diff(f.read())
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        summary = asyncio.run(run_batch_review(
+            args.path, output, only=only, workers=args.workers, use_llm=not args.no_llm
+        ))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    # Logging is not configured for the CLI, and stdout may carry the report
+    print(f"Batch: reviewed {summary['files_reviewed']} files in "
+          f"{summary['elapsed_seconds']}s ({summary['llm_reviewed']} sent to the LLM)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Content-addressed result cache for the Code Review Assistant.
+
+Deterministic tools (AST analysis, pycodestyle) always produce the same
+result for the same source and settings, so their results are cached by a
+hash of both. The cache is tiered: an in-process LRU with size/TTL eviction
+in front of an optional on-disk SQLite store that survives restarts and is
+shared by every worker on the same host.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Part of every cache key. Bump it whenever the shape of a cached result
+# changes, so entries persisted by an older version (e.g. structure results
+# without "units") are not served after an upgrade.
+CACHE_SCHEMA_VERSION = 2
+
+
+def make_cache_key(namespace: str, code: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Builds a content-addressed cache key.
+
+    Args:
+        namespace: Kind of result being cached (e.g. "structure", "style")
+        code: Python source the result was computed from
+        settings: Options that influence the result (e.g. pycodestyle settings)
+
+    The digest also covers CACHE_SCHEMA_VERSION.
+
+    Returns:
+        A key of the form "<namespace>:<sha256 hex digest>"
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_SCHEMA_VERSION}\0".encode('utf-8'))
+    digest.update(code.encode('utf-8'))
+    if settings:
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    return f"{namespace}:{digest.hexdigest()}"
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with optional TTL expiry."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache tier storing JSON-serialised results in SQLite."""
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds and created_at + self.ttl_seconds < time.time():
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+                (key, payload, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+
+class ResultCache:
+    """
+    Tiered result cache with hit/miss accounting.
+
+    Lookups go to the in-memory tier first and fall back to the optional
+    SQLite tier; disk hits are promoted into memory. Any object with
+    ``get``/``set``/``clear`` methods can be plugged in as a tier.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._record('memory_hits')
+            return value
+
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Cache: disk tier read failed: {e}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                self._record('disk_hits')
+                return value
+
+        self._record('misses')
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Cache: disk tier write failed: {e}")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        with self._lock:
+            for counter in self._stats:
+                self._stats[counter] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the current hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        stats['disk_enabled'] = self.disk is not None
+        return stats
+
+    def _record(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+            if counter != 'misses':
+                self._stats['hits'] += 1
+
+
+def _build_cache() -> Optional[ResultCache]:
+    """Creates the global cache from configuration, or None if disabled."""
+    if not config.analysis_cache_enabled:
+        return None
+
+    disk = None
+    if config.analysis_cache_path:
+        try:
+            disk = SQLiteCache(config.analysis_cache_path, config.analysis_cache_ttl_seconds)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache: could not open {config.analysis_cache_path}: {e}")
+
+    return ResultCache(
+        memory=LRUCache(config.analysis_cache_max_entries, config.analysis_cache_ttl_seconds),
+        disk=disk
+    )
+
+
+# --- Global Cache Instance ---
+analysis_cache = _build_cache()
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Returns the analysis cache counters (empty if caching is disabled)."""
+    if analysis_cache is None:
+        return {'enabled': False}
+    return {'enabled': True, **analysis_cache.stats()}
@@ -88,6 +88,75 @@ class AgentConfig(BaseSettings):
     # --- Application Limits ---
     max_grading_attempts: int = Field(default=3, gt=0)
 
+    # --- Tool Execution Backend ---
+    tool_executor_backend: str = Field(
+        default="thread", description="Pool used for CPU-bound tools: 'thread' or 'process'."
+    )
+    tool_executor_max_workers: Optional[int] = Field(
+        default=None, gt=0, description="Pool size (defaults to the executor's own heuristic)."
+    )
+
+    # --- Analysis Cache ---
+    analysis_cache_enabled: bool = Field(
+        default=True, description="Cache AST and style results keyed by source hash."
+    )
+    analysis_cache_max_entries: int = Field(
+        default=1024, gt=0, description="Maximum entries held in the in-memory cache."
+    )
+    analysis_cache_ttl_seconds: Optional[float] = Field(
+        default=3600.0, description="Cache entry lifetime in seconds (None disables expiry)."
+    )
+    analysis_cache_path: Optional[str] = Field(
+        default=None, description="SQLite file for the on-disk cache tier (disabled if unset)."
+    )
+
+    # --- Batch Review ---
+    batch_max_workers: Optional[int] = Field(
+        default=None, gt=0, description="Worker processes for batch review (defaults to CPU count)."
+    )
+    batch_llm_concurrency: int = Field(
+        default=4, gt=0, description="Concurrent LLM pipeline runs during batch review."
+    )
+    batch_llm_style_threshold: int = Field(
+        default=70, ge=0, le=100, description="Files scoring below this style score get an LLM review."
+    )
+    batch_llm_complexity_threshold: int = Field(
+        default=10, gt=0, description="Files with a function above this complexity get an LLM review."
+    )
+    batch_llm_function_length_threshold: int = Field(
+        default=60, gt=0, description="Files with a function longer than this get an LLM review."
+    )
+
+    # --- Local Test Sandbox ---
+    test_sandbox_pool_size: int = Field(
+        default=2, gt=0, description="Warm interpreters kept ready for test runs."
+    )
+    test_sandbox_timeout_seconds: float = Field(
+        default=30.0, gt=0, description="Wall-clock limit for one test suite run."
+    )
+    test_sandbox_test_timeout_seconds: float = Field(
+        default=2.0, gt=0, description="Time limit for a single generated test."
+    )
+    test_sandbox_memory_mb: int = Field(
+        default=512, gt=0, description="Address-space limit of a sandboxed interpreter."
+    )
+
+    # --- Report Storage ---
+    report_compression: str = Field(
+        default="none", description="Report artifact encoding: 'none', 'gzip' or 'zstd'."
+    )
+    report_async_writes: bool = Field(
+        default=False,
+        description="Write report artifacts in the background instead of inline "
+                    "(the writes are then missing from the tool event's artifact_delta)."
+    )
+    report_write_batch_size: int = Field(
+        default=16, gt=0, description="Pending artifact writes that trigger an immediate flush."
+    )
+    report_write_flush_seconds: float = Field(
+        default=0.5, ge=0, description="Delay before queued artifact writes are flushed."
+    )
+
     # --- Logging & Debugging ---
     log_level: str = Field(default="INFO")
     debug_mode: bool = Field(default=False)
@@ -109,6 +178,24 @@ class AgentConfig(BaseSettings):
             raise ValueError(f"Invalid log_level: {v}. Must be one of {valid_levels}")
         return v.upper()
 
+    @field_validator('tool_executor_backend')
+    @classmethod
+    def validate_tool_executor_backend(cls, v: str) -> str:
+        """Ensure the executor backend is a supported pool type."""
+        valid_backends = ['thread', 'process']
+        if v.lower() not in valid_backends:
+            raise ValueError(f"Invalid tool_executor_backend: {v}. Must be one of {valid_backends}")
+        return v.lower()
+
+    @field_validator('report_compression')
+    @classmethod
+    def validate_report_compression(cls, v: str) -> str:
+        """Ensure the report compression is a supported codec."""
+        valid_codecs = ['none', 'gzip', 'zstd']
+        if v.lower() not in valid_codecs:
+            raise ValueError(f"Invalid report_compression: {v}. Must be one of {valid_codecs}")
+        return v.lower()
+
     @field_validator('google_cloud_project', mode='before')
     @classmethod
     def set_google_cloud_project(cls, v: Optional[str]) -> Optional[str]:
@@ -17,6 +17,9 @@ class StateKeys:
 
     # === Test-related keys ===
     TEST_EXECUTION_SUMMARY = "test_execution_summary"  # From test_runner_agent output_key
+    TEST_SUITE = "test_suite"  # Generated test code, replayed on fixed code
+    TEST_RUN_RESULTS = "test_run_results"  # Per-test outcomes of the suite on code_to_review
+    TEST_SUMMARY = "test_summary_normalized"  # TestSummary.to_dict() of test_execution_summary
 
     # === Review pipeline state ===
     FINAL_GRADE = "final_grade"
@@ -30,6 +33,7 @@ class StateKeys:
     # === Fix pipeline keys ===
     CODE_FIXES = "code_fixes"  # From code_fixer_agent output_key
     FIX_TEST_EXECUTION_SUMMARY = "fix_test_execution_summary"  # From fix_test_runner_agent output_key
+    FIX_TEST_SUMMARY = "fix_test_summary_normalized"  # TestSummary.to_dict() of fix_test_execution_summary
     FIXED_STYLE_SCORE = "fixed_style_score"
     FIXED_STYLE_ISSUES = "fixed_style_issues"
     FIX_REPORT = "fix_report"
@@ -37,6 +41,7 @@ class StateKeys:
     FINAL_FIX_REPORT = "final_fix_report"  # From fix_validator_agent output_key
     LAST_FIX_REPORT = "last_fix_report"
     FIX_REQUESTED = "fix_requested"
+    FIX_CHANGED_UNITS = "fix_changed_units"  # Units of code_fixes that differ from code_to_review
 
     # === Agent output keys (for reference) ===
     STRUCTURE_ANALYSIS_SUMMARY = "structure_analysis_summary"  # From code_analyzer_agent
@@ -44,6 +49,9 @@ class StateKeys:
     FINAL_FEEDBACK = "final_feedback"  # From feedback_synthesizer_agent
     FIX_SUMMARY = "fix_summary"  # From fix_synthesizer_agent
 
+    # === Pipeline metrics ===
+    REVIEW_LATENCY = "review_latency"  # Per-stage wall-clock seconds of the last review
+
     # === Temporary keys (cleared after each invocation) ===
     TEMP_TEST_CODE = "temp:test_code_to_execute"
     TEMP_ANALYSIS_TIMESTAMP = "temp:analysis_timestamp"
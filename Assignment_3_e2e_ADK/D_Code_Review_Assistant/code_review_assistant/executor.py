@@ -0,0 +1,65 @@
+"""
+Shared execution backend for CPU-bound review tools.
+
+AST parsing and linting are offloaded to a single long-lived pool instead of
+constructing a new ThreadPoolExecutor per tool call. The backend (thread or
+process pool) and its size come from AgentConfig. The pool is started at
+application startup and shut down in the FastAPI lifespan; if a tool runs
+before startup (e.g. under `adk web` or Agent Engine) it is created lazily.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def start_executor() -> Executor:
+    """Creates the shared executor if it does not exist yet and returns it."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = config.tool_executor_max_workers
+            if config.tool_executor_backend == 'process':
+                _executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix='review-tool'
+                )
+            logger.info(f"Executor: started {config.tool_executor_backend} pool "
+                        f"(max_workers={workers or 'default'})")
+        return _executor
+
+
+def get_executor() -> Executor:
+    """Returns the shared executor, starting it on first use."""
+    return _executor if _executor is not None else start_executor()
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shuts down the shared executor; a later call to get_executor() starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+            logger.info("Executor: shut down")
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Runs a CPU-bound function on the shared executor.
+
+    With the process backend, ``func`` and its arguments must be picklable,
+    so pass module-level functions and plain data (not AST nodes).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
@@ -0,0 +1,120 @@
+"""
+Diff-aware helpers for incremental re-review.
+
+Code is split into top-level units (see analysis.top_level_units). Each
+unit is linted between the units around it: the unit before it, for checks
+that look back (blank lines, comment indentation, ...), and the units after
+it up to the next definition, which pycodestyle looks ahead to when it
+decides whether a definition is a one-liner. Only diagnostics inside the
+unit are kept, so the result matches linting the whole file. Results are
+cached per unit and surrounding units, so re-validating a fix only lints
+the units that changed and their neighbours.
+A line-level diff between the original and fixed code identifies the
+changed units passed on to test generation.
+"""
+import difflib
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Lines pycodestyle treats as the start of a definition (pycodestyle.STARTSWITH_TOP_LEVEL_REGEX)
+_DEFINITION_LINE = re.compile(r'(async\s+def\s+|def\s+|class\s+|@)')
+
+# A ```python, ```py or bare ``` fenced block; an unclosed fence runs to the end of the text
+_CODE_FENCE = re.compile(r'```(?:python3?|py)?[ \t]*\r?\n(.*?)(?:```|\Z)', re.DOTALL | re.IGNORECASE)
+
+
+def extract_code_block(text: str) -> str:
+    """
+    Returns the code in a message: the last fenced block (```python, ```py or
+    bare ```), or the text itself if it has no fence.
+    """
+    blocks = _CODE_FENCE.findall(text)
+    if blocks:
+        return blocks[-1].strip()
+    return text
+
+
+def _lookahead(sources: List[str]) -> str:
+    """
+    Returns the leading sources pycodestyle may read past the end of a unit.
+
+    For a definition, pycodestyle scans forward to the next definition line
+    and the first non-blank line after it. Whole units are returned, so the
+    linted text stays valid Python.
+    """
+    after = ''
+    for source in sources:
+        after += source
+        lines = [line.strip() for line in after.splitlines()]
+        for index, line in enumerate(lines):
+            if (_DEFINITION_LINE.match(line) and not line.startswith('@')
+                    and any(lines[index + 1:])):
+                return after
+    return after
+
+
+def unit_sources(code: str, units: List[Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+    """
+    Returns (before, source, after) for each unit.
+
+    ``before`` is the source of the preceding unit ('' for the first unit);
+    ``source`` is the unit's own lines, line endings included; ``after`` is
+    the source of the following units pycodestyle looks ahead to.
+    """
+    lines = code.splitlines(True)
+    sources = [''.join(lines[unit['start'] - 1:unit['end']]) for unit in units]
+    return [
+        (sources[i - 1] if i else '', source, _lookahead(sources[i + 1:]))
+        for i, source in enumerate(sources)
+    ]
+
+
+def shift_issues(issues: List[Dict[str, Any]], offset: int) -> List[Dict[str, Any]]:
+    """Returns copies of issues with line numbers moved by ``offset``."""
+    return [{**issue, 'line': issue['line'] + offset} for issue in issues]
+
+
+def changed_line_numbers(original: str, fixed: str) -> Set[int]:
+    """
+    Returns the 1-based line numbers of ``fixed`` that differ from ``original``.
+
+    Pure deletions mark the line that now sits where the removed lines were.
+    """
+    fixed_lines = fixed.splitlines()
+    matcher = difflib.SequenceMatcher(None, original.splitlines(), fixed_lines, autojunk=False)
+    changed = set()
+    for tag, _, _, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        if j1 == j2:
+            changed.add(min(j1 + 1, max(len(fixed_lines), 1)))
+        else:
+            changed.update(range(j1 + 1, j2 + 1))
+    return changed
+
+
+def changed_units(original: str, fixed: str,
+                  fixed_units: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Returns the units of the fixed code touched by the diff, with their source.
+
+    If the fixed code could not be split into units, the whole file is
+    returned as a single changed unit.
+    """
+    if not fixed_units:
+        return [{'name': None, 'kind': 'module', 'start': 1,
+                 'end': len(fixed.splitlines()), 'source': fixed}]
+
+    changed_lines = changed_line_numbers(original, fixed)
+    sources = unit_sources(fixed, fixed_units)
+    changed = []
+    for unit, (_, source, _) in zip(fixed_units, sources):
+        if any(unit['start'] <= line <= unit['end'] for line in changed_lines):
+            changed.append({
+                'name': unit['name'],
+                'kind': unit['kind'],
+                'start': unit['start'],
+                'end': unit['end'],
+                'source': source.strip('\n'),
+            })
+    return changed
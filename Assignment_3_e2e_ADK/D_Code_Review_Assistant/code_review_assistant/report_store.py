@@ -0,0 +1,249 @@
+"""
+Compact artifact storage for grading and fix reports.
+
+Reports used to be pretty-printed, embedded the full source code and were
+saved twice (timestamped copy plus "latest"). The report store instead:
+
+- stores each distinct code body once, as a user-scoped artifact named by
+  its SHA-256, and replaces it in the report with a reference;
+- writes compact JSON, optionally gzip- or zstd-compressed;
+- writes "latest" as a small pointer to the timestamped report;
+- writes through ToolContext.save_artifact, so the tool's event records
+  the artifact_delta, in concurrent batches; repeated writes of the same
+  artifact (e.g. the pointer) coalesce.
+
+By default a save waits for its writes. With async writes the tool returns
+before they are flushed: nothing is reported as saved, and as the tool's
+event is already out, the writes are not recorded in its artifact_delta.
+"""
+import asyncio
+import copy
+import gzip
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from google.genai import types
+from google.adk.tools import ToolContext
+
+from .cache import LRUCache
+from .config import config
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency; zstd falls back to gzip
+    zstandard = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Process-wide record of code blobs known to be written, so each is stored once
+_KNOWN_BLOB_LIMIT = 4096
+
+_CONTENT_TYPES = {
+    'none': ('.json', 'application/json'),
+    'gzip': ('.json.gz', 'application/gzip'),
+    'zstd': ('.json.zst', 'application/zstd'),
+}
+
+
+def encode_report(report: Dict[str, Any], compression: str = 'none') -> Tuple[bytes, str]:
+    """
+    Serialises a report as compact JSON.
+
+    Args:
+        report: Report dictionary
+        compression: "none", "gzip" or "zstd" (gzip if zstandard is not installed)
+
+    Returns:
+        Tuple of (payload bytes, compression actually used)
+    """
+    payload = json.dumps(report, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if compression == 'zstd' and zstandard is None:
+        compression = 'gzip'
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor().compress(payload), compression
+    if compression == 'gzip':
+        return gzip.compress(payload, mtime=0), compression
+    return payload, 'none'
+
+
+def decode_report(payload: bytes, compression: str = 'none') -> Dict[str, Any]:
+    """Inverse of encode_report."""
+    if compression == 'zstd':
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif compression == 'gzip':
+        payload = gzip.decompress(payload)
+    return json.loads(payload.decode('utf-8'))
+
+
+def code_blob_name(code: str) -> str:
+    """Returns the user-scoped artifact name of a code body."""
+    return f"user:code_{hashlib.sha256(code.encode('utf-8')).hexdigest()}.py"
+
+
+class ArtifactWriter:
+    """
+    Queues artifact writes and flushes them in concurrent batches.
+
+    A batch is flushed once ``batch_size`` writes are pending or
+    ``flush_seconds`` after the first one was queued. Writes to the same
+    artifact that are still pending are coalesced into the latest one.
+    """
+
+    def __init__(self, batch_size: int = 16, flush_seconds: float = 0.5):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self._timer: Optional[asyncio.Task] = None
+
+    def submit(self, tool_context: ToolContext, filename: str, part: types.Part) -> asyncio.Future:
+        """
+        Queues a write.
+
+        Returns:
+            Future resolving to the saved version, or to the write's exception
+        """
+        ctx = tool_context._invocation_context
+        key = (ctx.app_name, ctx.user_id, ctx.session.id, filename)
+        future = asyncio.get_running_loop().create_future()
+        # A coalesced write completes with the write that replaces it
+        _, _, futures = self._pending.pop(key, (None, None, []))
+        self._pending[key] = (tool_context, part, futures + [future])
+
+        if len(self._pending) >= self.batch_size:
+            self._spawn(self._flush_pending())
+        elif self._timer is None or self._timer.done():
+            self._timer = self._spawn(self._flush_later())
+        return future
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_seconds)
+        self._timer = None  # Writing now; flush() must wait for it, not cancel it
+        await self._flush_pending()
+
+    async def _flush_pending(self) -> None:
+        batch, self._pending = self._pending, OrderedDict()
+        if not batch:
+            return
+        results = await asyncio.gather(*(
+            tool_context.save_artifact(filename, part)
+            for (_, _, _, filename), (tool_context, part, _) in batch.items()
+        ), return_exceptions=True)
+        for (_, _, _, filename), (_, _, futures), result in zip(batch, batch.values(), results):
+            if isinstance(result, Exception):
+                logger.warning(f"ReportStore: failed to write {filename}: {result}")
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                    future.exception()  # Logged above; a caller that awaits still gets it
+                else:
+                    future.set_result(result)
+        logger.debug(f"ReportStore: flushed {len(batch)} artifact writes")
+
+    async def flush(self) -> None:
+        """Writes everything queued so far and waits for in-flight batches."""
+        if self._timer is not None:
+            self._timer.cancel()  # Still sleeping; its batch is written right here
+        await self._flush_pending()
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+class ReportStore:
+    """Saves reports as compact artifacts with code bodies deduplicated by hash."""
+
+    def __init__(self, writer: ArtifactWriter, compression: str = 'none',
+                 async_writes: bool = False):
+        self.writer = writer
+        self.compression = compression
+        self.async_writes = async_writes
+        self._known_blobs = LRUCache(max_entries=_KNOWN_BLOB_LIMIT)
+
+    @staticmethod
+    def available(tool_context: ToolContext) -> bool:
+        """True if the invocation has an artifact service to write to."""
+        ctx = getattr(tool_context, '_invocation_context', None)
+        return ctx is not None and ctx.artifact_service is not None
+
+    def _code_ref(self, tool_context: ToolContext, code: str,
+                  writes: List[asyncio.Future]) -> Dict[str, Any]:
+        filename = code_blob_name(code)
+        ctx = tool_context._invocation_context
+        known_key = f"{ctx.app_name}/{ctx.user_id}/{filename}"
+        if self._known_blobs.get(known_key) is None:
+            def mark_known(write: asyncio.Future) -> None:
+                # Only once written; after a failed write the next report retries it
+                if write.exception() is None:
+                    self._known_blobs.set(known_key, True)
+
+            write = self.writer.submit(tool_context, filename, types.Part.from_text(text=code))
+            write.add_done_callback(mark_known)
+            writes.append(write)
+        return {'ref': filename, 'line_count': len(code.splitlines())}
+
+    async def save(self, tool_context: ToolContext, name: str, timestamp: str,
+                   report: Dict[str, Any], code_paths: Iterable[Tuple[str, ...]]) -> Dict[str, Any]:
+        """
+        Writes a report and its "latest" pointer.
+
+        Unless async writes are enabled, waits for the writes and raises if
+        one of them failed.
+
+        Args:
+            tool_context: ADK tool context of the calling tool
+            name: Report kind, e.g. "grading_report"
+            timestamp: Filesystem-safe timestamp used in the filename
+            report: Report dictionary (left unmodified)
+            code_paths: Key paths of code bodies in the report to store by reference
+
+        Returns:
+            Dictionary with the report filename, pointer name, payload size and
+            whether the writes are done ("saved"; False while they are queued)
+        """
+        writes: List[asyncio.Future] = []
+        compact = copy.deepcopy(report)
+        for path in code_paths:
+            parent = compact
+            for key in path[:-1]:
+                parent = parent.get(key, {})
+            code = parent.get(path[-1])
+            if isinstance(code, str) and code:
+                parent[path[-1]] = self._code_ref(tool_context, code, writes)
+
+        payload, compression = encode_report(compact, self.compression)
+        extension, mime_type = _CONTENT_TYPES[compression]
+        filename = f"{name}_{timestamp}{extension}"
+        if compression == 'none':
+            part = types.Part.from_text(text=payload.decode('utf-8'))
+        else:
+            part = types.Part.from_bytes(data=payload, mime_type=mime_type)
+        writes.append(self.writer.submit(tool_context, filename, part))
+
+        latest = f"latest_{name}.json"
+        pointer = {'filename': filename, 'timestamp': timestamp, 'compression': compression}
+        writes.append(self.writer.submit(tool_context, latest,
+                                         types.Part.from_text(text=json.dumps(pointer))))
+
+        if not self.async_writes:
+            await self.writer.flush()
+            await asyncio.gather(*writes)
+
+        return {'filename': filename, 'latest': latest, 'size': len(payload),
+                'compression': compression, 'saved': not self.async_writes}
+
+
+# --- Global Store Instance ---
+report_writer = ArtifactWriter(config.report_write_batch_size, config.report_write_flush_seconds)
+report_store = ReportStore(report_writer, config.report_compression, config.report_async_writes)
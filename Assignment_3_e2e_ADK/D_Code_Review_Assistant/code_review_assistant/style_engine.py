@@ -0,0 +1,63 @@
+"""
+In-memory PEP 8 checking for the Code Review Assistant.
+
+Source lines are fed straight into a pycodestyle Checker whose report
+object collects structured issues, so no temporary files are written and
+stdout is never redirected. Each call uses its own report, which makes the
+engine safe to run concurrently from the tool thread pool.
+"""
+from typing import Any, Dict, List, Optional
+
+import pycodestyle
+
+
+class CollectingReport(pycodestyle.BaseReport):
+    """pycodestyle report that records issues as dictionaries instead of printing them."""
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.issues: List[Dict[str, Any]] = []
+
+    def error(self, line_number, offset, text, check):
+        code = super().error(line_number, offset, text, check)
+        if code:
+            self.issues.append({
+                'line': line_number,
+                'column': offset + 1,
+                'code': code,
+                'message': text
+            })
+        return code
+
+
+class StyleEngine:
+    """
+    Reusable pycodestyle runner.
+
+    Options are parsed once at construction; every ``check`` call creates
+    a fresh Checker and report, so instances can be shared between threads.
+    """
+
+    def __init__(self, **style_options: Any):
+        self.options = pycodestyle.StyleGuide(quiet=True, **style_options).options
+
+    def check(self, code: str, filename: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Checks source code against PEP 8.
+
+        Args:
+            code: Python source code to check
+            filename: Name used in pycodestyle's report (defaults to "<submission>")
+
+        Returns:
+            List of issues with line, column, code and message
+        """
+        report = CollectingReport(self.options)
+        checker = pycodestyle.Checker(
+            filename=filename or '<submission>',
+            lines=code.splitlines(True),
+            options=self.options,
+            report=report
+        )
+        checker.check_all()
+        return report.issues
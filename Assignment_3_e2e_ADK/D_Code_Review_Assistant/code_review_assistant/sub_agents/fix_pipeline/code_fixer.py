@@ -6,10 +6,14 @@ and generates corrected code that addresses all issues.
 """
 
 from google.adk.agents import Agent
+from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.code_executors import BuiltInCodeExecutor
 from google.adk.utils import instructions_utils
+from code_review_assistant.analysis import analyze_source
 from code_review_assistant.config import config
+from code_review_assistant.constants import StateKeys
+from code_review_assistant.incremental import changed_units, extract_code_block
 
 
 async def code_fixer_instruction_provider(context: ReadonlyContext) -> str:
@@ -52,11 +56,27 @@ Output the complete fixed code now:"""
     return await instructions_utils.inject_session_state(template, context)
 
 
+def record_changed_units(callback_context: CallbackContext) -> None:
+    """Diffs the fix against the original code and records the changed units in state."""
+    state = callback_context.state
+    code_fixes = extract_code_block(state.get(StateKeys.CODE_FIXES, ''))
+    original_code = state.get(StateKeys.CODE_TO_REVIEW, '')
+
+    try:
+        fixed_units = analyze_source(code_fixes)['units']
+    except SyntaxError:
+        fixed_units = None  # The whole file counts as changed
+
+    state[StateKeys.CODE_FIXES] = code_fixes
+    state[StateKeys.FIX_CHANGED_UNITS] = changed_units(original_code, code_fixes, fixed_units)
+
+
 code_fixer_agent = Agent(
     name="CodeFixer",
     model=config.worker_model,
     description="Generates comprehensive fixes for all identified code issues",
     instruction=code_fixer_instruction_provider,
     code_executor=BuiltInCodeExecutor(),
-    output_key="code_fixes"  # This will contain raw Python code
+    output_key="code_fixes",  # This will contain raw Python code
+    after_agent_callback=record_changed_units
 )
@@ -1,15 +1,50 @@
 """
 Fix Test Runner Agent - Validates fixes by running tests on corrected code.
 
-This agent executes the same test suite on the fixed code to verify
-that all issues have been resolved.
+The test suite generated during review is replayed on the fixed code in the
+local sandbox, without asking the model to regenerate it. Only when no suite
+exists (e.g. the review ran before the sandbox was available) does a model
+generate and run tests on the fixed code instead.
 """
+import json
+from typing import AsyncGenerator
 
-from google.adk.agents import Agent
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
 from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.code_executors import BuiltInCodeExecutor
+from google.adk.events import Event, EventActions
 from google.adk.utils import instructions_utils
+from google.genai import types
 from code_review_assistant.config import config
+from code_review_assistant.constants import StateKeys
+from code_review_assistant.incremental import extract_code_block
+from code_review_assistant.test_engine import compare_runs, run_test_suite
+from code_review_assistant.test_summary import TestSummary
+
+
+def _format_changed_units(changed_units) -> str:
+    """Renders the units changed by the fix as the focus section of the instruction."""
+    if changed_units is None:
+        return ""
+    if not changed_units:
+        return """
+CHANGED UNITS: none - the fix did not change the code.
+Do not generate new tests; report the original test results unchanged."""
+
+    sections = []
+    for unit in changed_units:
+        label = f"{unit['kind']} `{unit['name']}`" if unit['name'] else "module-level code"
+        sections.append(f"### {label} (lines {unit['start']}-{unit['end']})\n"
+                        f"```python\n{unit['source']}\n```")
+    return """
+CHANGED UNITS (only these differ from the original code):
+""" + "\n\n".join(sections) + """
+
+Generate and run tests ONLY for the changed units above; the rest of the
+file is included solely so the tests can execute. Carry over the original
+results for untouched functions instead of re-testing them."""
 
 
 async def fix_test_runner_instruction_provider(context: ReadonlyContext) -> str:
@@ -25,7 +60,8 @@ ORIGINAL TEST RESULTS: {test_execution_summary}
 
 YOUR TASK:
 1. Understand the fixes that were applied
-2. Generate the same comprehensive tests (15-20 test cases) 
+2. Generate the same comprehensive tests (15-20 test cases), focused on the
+   changed units listed at the end of these instructions
 3. Execute the tests on the FIXED code using your code executor
 4. Compare results with original test results
 5. Output a detailed JSON analysis
@@ -59,15 +95,70 @@ Execute your tests and output ONLY this JSON structure:
 }}
 
 Do NOT output the test code itself, only the JSON analysis."""
-    
-    return await instructions_utils.inject_session_state(template, context)
 
+    instruction = await instructions_utils.inject_session_state(template, context)
+    # Appended after injection: unit sources may contain braces
+    return instruction + _format_changed_units(context.state.get(StateKeys.FIX_CHANGED_UNITS))
 
-fix_test_runner_agent = Agent(
-    name="FixTestRunner",
+
+def normalize_fix_test_results(callback_context: CallbackContext) -> None:
+    """Stores the normalised summary of the model-based runner's output."""
+    state = callback_context.state
+    state[StateKeys.FIX_TEST_SUMMARY] = TestSummary.parse(
+        state.get(StateKeys.FIX_TEST_EXECUTION_SUMMARY)
+    ).to_dict()
+
+
+class FixTestReplayAgent(BaseAgent):
+    """
+    Replays the review's test suite on the fixed code.
+
+    Writes fix_test_execution_summary in the same schema the model-based
+    runner produces; falls back to that runner when there is no suite.
+    """
+
+    fallback: BaseAgent
+
+    def __init__(self, name: str, fallback: BaseAgent, **kwargs):
+        super().__init__(name=name, fallback=fallback, sub_agents=[fallback], **kwargs)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        test_code = state.get(StateKeys.TEST_SUITE)
+        if not test_code:
+            async for event in self.fallback.run_async(ctx):
+                yield event
+            return
+
+        code_fixes = extract_code_block(state.get(StateKeys.CODE_FIXES, ''))
+        results = await run_test_suite(code_fixes, test_code)
+        comparison = compare_runs(state.get(StateKeys.TEST_RUN_RESULTS), results)
+        summary = json.dumps(comparison)
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=summary)]),
+            actions=EventActions(state_delta={
+                StateKeys.FIX_TEST_EXECUTION_SUMMARY: summary,
+                StateKeys.FIX_TEST_SUMMARY: TestSummary.parse(comparison).to_dict(),
+            })
+        )
+
+
+fix_test_generator_agent = Agent(
+    name="FixTestGenerator",
     model=config.worker_model,
-    description="Runs comprehensive tests on fixed code to verify all issues are resolved",
+    description="Generates and runs tests on fixed code when no review test suite is available",
     instruction=fix_test_runner_instruction_provider,
     code_executor=BuiltInCodeExecutor(),
-    output_key="fix_test_execution_summary"
+    output_key="fix_test_execution_summary",
+    after_agent_callback=normalize_fix_test_results
+)
+
+fix_test_runner_agent = FixTestReplayAgent(
+    name="FixTestRunner",
+    fallback=fix_test_generator_agent,
+    description="Replays the review's test suite on fixed code to verify all issues are resolved"
 )
@@ -8,6 +8,7 @@ identifying functions, classes, imports, and potential issues.
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from code_review_assistant.config import config
+from code_review_assistant.timing import stage_timer
 from code_review_assistant.tools import analyze_code_structure
 
 
@@ -40,5 +41,7 @@ Provide a clear summary including:
 - Any syntax errors or issues detected
 - Overall code organization assessment""",
     tools=[FunctionTool(func=analyze_code_structure)],
-    output_key="structure_analysis_summary"
+    output_key="structure_analysis_summary",
+    before_agent_callback=stage_timer.start,
+    after_agent_callback=stage_timer.stop
 )
@@ -10,6 +10,7 @@ from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools import FunctionTool
 from google.adk.utils import instructions_utils
 from code_review_assistant.config import config
+from code_review_assistant.timing import stage_timer
 from code_review_assistant.tools import search_past_feedback, update_grading_progress, save_grading_report
 
 
@@ -88,5 +89,7 @@ feedback_synthesizer_agent = Agent(
         FunctionTool(func=update_grading_progress),
         FunctionTool(func=save_grading_report)
     ],
-    output_key="final_feedback"
+    output_key="final_feedback",
+    before_agent_callback=stage_timer.start,
+    after_agent_callback=stage_timer.stop
 )
@@ -10,6 +10,7 @@ from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools import FunctionTool
 from google.adk.utils import instructions_utils
 from code_review_assistant.config import config
+from code_review_assistant.timing import stage_timer
 from code_review_assistant.tools import check_code_style
 
 
@@ -43,8 +44,6 @@ List the specific violations found (the tool will provide these):
 - Show line numbers, error codes, and messages
 - Focus on the top 10 most important issues
 
-Previous analysis: {structure_analysis_summary}
-
 Format your response as:
 ## Style Analysis Results
 - Style Score: [exact score]/100
@@ -66,5 +65,7 @@ style_checker_agent = Agent(
     description="Checks Python code style against PEP 8 guidelines",
     instruction=style_checker_instruction_provider,
     tools=[FunctionTool(func=check_code_style)],
-    output_key="style_check_summary"
+    output_key="style_check_summary",
+    before_agent_callback=stage_timer.start,
+    after_agent_callback=stage_timer.stop
 )
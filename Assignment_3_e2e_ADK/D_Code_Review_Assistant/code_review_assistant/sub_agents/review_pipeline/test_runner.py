@@ -1,15 +1,31 @@
 """
-Test Runner Agent - Generates and executes tests using built-in code executor.
+Test Runner Agent - Generates tests and executes them in a local sandbox.
 
-This agent generates appropriate test cases based on code analysis
-and runs them using ADK's built-in code executor.
+The model writes the test suite once and runs it through the
+run_generated_tests tool; the reported counts always come from that run.
+The suite and its results are cached by code hash, so reviewing the same
+code again skips the model entirely, and the fix loop replays the suite on
+the fixed code instead of asking the model to regenerate it.
 """
+import copy
+import json
+from typing import AsyncGenerator
 
-from google.adk.agents import Agent
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
 from google.adk.agents.readonly_context import ReadonlyContext
-from google.adk.code_executors import BuiltInCodeExecutor
+from google.adk.events import Event, EventActions
+from google.adk.tools import FunctionTool
 from google.adk.utils import instructions_utils
+from google.genai import types
+from code_review_assistant.cache import analysis_cache, make_cache_key
 from code_review_assistant.config import config
+from code_review_assistant.constants import StateKeys
+from code_review_assistant.test_engine import summarize_run
+from code_review_assistant.test_summary import TestSummary, parse_result_payload
+from code_review_assistant.timing import stage_timer
+from code_review_assistant.tools import run_generated_tests
 
 
 async def test_runner_instruction_provider(context: ReadonlyContext) -> str:
@@ -24,10 +40,16 @@ THE CODE TO TEST IS:
 YOUR TASK:
 1. Understand what the function appears to do based on its name and structure
 2. Generate comprehensive tests (15-20 test cases)
-3. Execute the tests using your code executor
+3. Execute the tests by calling run_generated_tests ONCE with the whole suite
 4. Analyze results to identify bugs vs expected behavior
 5. Output a detailed JSON analysis
 
+WRITING THE TEST SUITE:
+- Each test is a top-level function using plain assert statements
+- Name tests test_basic_*, test_edge_* or test_error_* to set their category
+- Everything defined by the code under test is already in scope; do not import it
+- Use pytest-free Python only (e.g. try/except to check that an error is raised)
+
 TESTING METHODOLOGY:
 - Test with the most natural interpretation first
 - When something fails, determine if it's a bug or unusual design
@@ -70,16 +92,98 @@ Execute your tests and output ONLY this JSON structure:
     }}
 }}
 
+The test counts and categories are taken from the sandbox run.
 Do NOT output the test code itself, only the JSON analysis."""
 
     return await instructions_utils.inject_session_state(template, context)
 
 
-test_runner_agent = Agent(
-    name="TestRunner",
+def apply_test_results(callback_context: CallbackContext) -> None:
+    """
+    Overwrites the model-reported test counts with those of the sandbox run
+    and stores the normalised summary.
+    """
+    state = callback_context.state
+    summary = parse_result_payload(state.get(StateKeys.TEST_EXECUTION_SUMMARY))
+    results = state.get(StateKeys.TEST_RUN_RESULTS)
+    if results:
+        measured = summarize_run(results)
+        summary['test_summary'] = {**summary.get('test_summary', {}), **measured['test_summary']}
+        summary['test_categories'] = measured['test_categories']
+        state[StateKeys.TEST_EXECUTION_SUMMARY] = json.dumps(summary)
+    # Otherwise the model never ran the suite; its answer is kept as-is
+    state[StateKeys.TEST_SUMMARY] = TestSummary.parse(summary).to_dict()
+
+
+class CachedTestRunner(BaseAgent):
+    """
+    Runs the test generator once per distinct code.
+
+    The generated suite, its results and the final summary are cached by
+    the hash of code_to_review; a later review of the same code restores
+    them into state without calling the model.
+    """
+
+    generator: BaseAgent
+
+    def __init__(self, name: str, generator: BaseAgent, **kwargs):
+        super().__init__(name=name, generator=generator, sub_agents=[generator], **kwargs)
+
+    def _event(self, ctx: InvocationContext, state_delta: dict, text: str = None) -> Event:
+        content = types.Content(role='model', parts=[types.Part(text=text)]) if text else None
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=content,
+            actions=EventActions(state_delta=state_delta)
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        code = ctx.session.state.get(StateKeys.CODE_TO_REVIEW, '')
+        cache_key = make_cache_key('test-suite', code)
+        cached = analysis_cache.get(cache_key) if analysis_cache is not None and code else None
+
+        if cached is not None:
+            # The in-memory cache hands out its own objects; state gets a private copy
+            cached = copy.deepcopy(cached)
+            yield self._event(ctx, {
+                StateKeys.TEST_SUITE: cached['test_code'],
+                StateKeys.TEST_RUN_RESULTS: cached['results'],
+                StateKeys.TEST_EXECUTION_SUMMARY: cached['summary'],
+                StateKeys.TEST_SUMMARY: TestSummary.parse(cached['summary']).to_dict(),
+            }, text=cached['summary'])
+            return
+
+        # Drop the suite of a previous submission so it is never replayed on this one
+        yield self._event(ctx, {StateKeys.TEST_SUITE: None, StateKeys.TEST_RUN_RESULTS: None,
+                                StateKeys.TEST_SUMMARY: None})
+        async for event in self.generator.run_async(ctx):
+            yield event
+
+        state = ctx.session.state
+        if analysis_cache is not None and code and state.get(StateKeys.TEST_SUITE):
+            analysis_cache.set(cache_key, copy.deepcopy({
+                'test_code': state[StateKeys.TEST_SUITE],
+                'results': state[StateKeys.TEST_RUN_RESULTS],
+                'summary': state.get(StateKeys.TEST_EXECUTION_SUMMARY, ''),
+            }))
+
+
+test_generator_agent = Agent(
+    name="TestGenerator",
     model=config.worker_model,
-    description="Generates and runs tests for Python code using safe code execution",
+    description="Generates tests for Python code and runs them in a local sandbox",
     instruction=test_runner_instruction_provider,
-    code_executor=BuiltInCodeExecutor(),
-    output_key="test_execution_summary"
+    tools=[FunctionTool(func=run_generated_tests)],
+    output_key="test_execution_summary",
+    after_agent_callback=apply_test_results
+)
+
+test_runner_agent = CachedTestRunner(
+    name="TestRunner",
+    generator=test_generator_agent,
+    description="Generates and runs tests for Python code, reusing cached suites for known code",
+    before_agent_callback=stage_timer.start,
+    after_agent_callback=stage_timer.stop
 )
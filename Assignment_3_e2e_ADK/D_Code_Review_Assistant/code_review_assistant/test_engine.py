@@ -0,0 +1,367 @@
+"""
+Local, deterministic test execution for the Code Review Assistant.
+
+The model writes the test suite once; this module runs it. Each run happens
+in a fresh interpreter subprocess with CPU, memory and file-size limits, a
+per-test timeout and an overall wall-clock timeout. Interpreters are started
+ahead of time by a small pool so a run does not pay interpreter start-up, and
+every interpreter runs exactly one job, so no state leaks between runs. The
+limits are applied by the interpreter itself at start-up: the pool spawns
+from several threads, where a preexec_fn is not safe.
+
+Results are cached by (code, test suite) hash, so replaying the same suite on
+the same code never spawns a process.
+"""
+import asyncio
+import copy
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import analysis_cache, make_cache_key
+from .config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Prefix of protocol lines on the worker's stdout; anything else is ignored
+_RESULT_MARKER = '\x1eresult '
+
+# Script run by each sandboxed interpreter. It applies the resource limits
+# passed as arguments (memory MB, CPU seconds), blocks on stdin until it gets a
+# job, executes the submission as module "submission", runs every top-level
+# test_* function of the generated suite and emits one result line per test.
+_WORKER_SOURCE = r'''
+import contextlib, io, json, signal, sys, time, types
+
+_out = sys.stdout
+_MARKER = "\x1eresult "
+
+
+def _emit(record):
+    _out.write(_MARKER + json.dumps(record) + "\n")
+    _out.flush()
+
+
+class _TestTimeout(BaseException):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _TestTimeout()
+
+
+try:
+    import resource
+except ImportError:  # Windows: rely on the timeouts only
+    resource = None
+if resource is not None:
+    _memory = int(sys.argv[1]) * 1024 * 1024
+    _cpu = int(sys.argv[2])
+    resource.setrlimit(resource.RLIMIT_AS, (_memory, _memory))
+    resource.setrlimit(resource.RLIMIT_CPU, (_cpu, _cpu))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
+
+job = json.loads(sys.stdin.read())
+has_alarm = hasattr(signal, "setitimer")
+if has_alarm:
+    signal.signal(signal.SIGALRM, _on_alarm)
+
+with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+    module = types.ModuleType("submission")
+    module.__file__ = "submission.py"
+    sys.modules["submission"] = module
+    namespace = {"__name__": "generated_tests"}
+    try:
+        exec(compile(job["code"], "submission.py", "exec"), module.__dict__)
+        namespace.update({k: v for k, v in vars(module).items() if not k.startswith("__")})
+        exec(compile(job["tests"], "generated_tests.py", "exec"), namespace)
+    except BaseException as e:
+        _emit({"setup_error": f"{type(e).__name__}: {e}"})
+        sys.exit(0)
+
+    tests = [(name, obj) for name, obj in namespace.items()
+             if name.startswith("test_") and callable(obj)]
+    for name, func in tests:
+        started = time.perf_counter()
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, job["test_timeout"])
+        try:
+            func()
+            outcome, message = "passed", ""
+        except AssertionError as e:
+            outcome, message = "failed", str(e) or "assertion failed"
+        except _TestTimeout:
+            outcome, message = "error", f"timed out after {job['test_timeout']}s"
+        except BaseException as e:
+            outcome, message = "error", f"{type(e).__name__}: {e}"
+        finally:
+            if has_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        _emit({"name": name, "outcome": outcome, "message": message[:500],
+               "duration": round(time.perf_counter() - started, 4)})
+
+_emit({"done": True})
+'''
+
+# Test name prefixes mapped to the categories of the test_execution_summary schema
+TEST_CATEGORIES = {
+    'test_basic_': 'basic_functionality',
+    'test_edge_': 'edge_cases',
+    'test_error_': 'error_handling',
+}
+DEFAULT_TEST_CATEGORY = 'basic_functionality'
+
+
+class InterpreterPool:
+    """
+    Keeps a few sandboxed interpreters booted and waiting for a job.
+
+    Each interpreter runs one job and exits; taking one from the pool
+    immediately starts its replacement.
+    """
+
+    def __init__(self, size: int, memory_mb: int, cpu_seconds: int):
+        self.size = size
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self._idle: List[Tuple[subprocess.Popen, str]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        with self._lock:
+            self._fill()
+
+    def _spawn(self) -> Tuple[subprocess.Popen, str]:
+        workdir = tempfile.mkdtemp(prefix='review-sandbox-')
+        proc = subprocess.Popen(
+            [sys.executable, '-I', '-c', _WORKER_SOURCE,
+             str(self.memory_mb), str(self.cpu_seconds)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=workdir,
+            env={'PATH': os.environ.get('PATH', ''), 'PYTHONHASHSEED': '0'},
+            text=True
+        )
+        return proc, workdir
+
+    def _fill(self) -> None:
+        while not self._closed and len(self._idle) < self.size:
+            self._idle.append(self._spawn())
+
+    def _acquire(self) -> Tuple[subprocess.Popen, str]:
+        with self._lock:
+            while self._idle:
+                proc, workdir = self._idle.pop(0)
+                if proc.poll() is None:
+                    break
+                shutil.rmtree(workdir, ignore_errors=True)
+            else:
+                proc, workdir = self._spawn()
+            self._fill()
+        return proc, workdir
+
+    def run(self, job: Dict[str, Any], timeout: float) -> Tuple[str, bool]:
+        """Sends a job to a warm interpreter; returns its stdout and whether it timed out."""
+        proc, workdir = self._acquire()
+        try:
+            try:
+                stdout, _ = proc.communicate(json.dumps(job), timeout=timeout)
+                return stdout, False
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                stdout, _ = proc.communicate()
+                return stdout or '', True
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for proc, workdir in idle:
+            proc.kill()
+            proc.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+_pool: Optional[InterpreterPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_test_pool() -> InterpreterPool:
+    """Returns the shared interpreter pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = InterpreterPool(
+                size=config.test_sandbox_pool_size,
+                memory_mb=config.test_sandbox_memory_mb,
+                cpu_seconds=int(config.test_sandbox_timeout_seconds) + 1
+            )
+            logger.info(f"TestEngine: started {config.test_sandbox_pool_size} sandboxed interpreters")
+        return _pool
+
+
+def shutdown_test_pool() -> None:
+    """Kills idle interpreters; a later run starts a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+            logger.info("TestEngine: pool shut down")
+
+
+def _parse_worker_output(stdout: str, timed_out: bool, duration: float) -> Dict[str, Any]:
+    results = {'tests': [], 'setup_error': None, 'timed_out': timed_out,
+               'duration': round(duration, 4)}
+    finished = False
+    for line in stdout.split('\n'):  # not splitlines(): it splits on the \x1e marker
+        if not line.startswith(_RESULT_MARKER):
+            continue
+        record = json.loads(line[len(_RESULT_MARKER):])
+        if 'setup_error' in record:
+            results['setup_error'] = record['setup_error']
+            finished = True
+        elif record.get('done'):
+            finished = True
+        else:
+            results['tests'].append(record)
+
+    if timed_out:
+        results['tests'].append({'name': '<suite timeout>', 'outcome': 'error',
+                                 'message': 'test run exceeded the sandbox timeout',
+                                 'duration': 0.0})
+    elif not finished and results['setup_error'] is None:
+        # Killed by a resource limit (e.g. memory) before reporting
+        results['setup_error'] = 'sandboxed interpreter exited unexpectedly'
+    return results
+
+
+def execute_tests(code: str, test_code: str) -> Dict[str, Any]:
+    """
+    Runs a generated test suite against code in the sandbox.
+
+    Args:
+        code: Python source under test (importable as module ``submission``)
+        test_code: Test suite defining top-level ``test_*`` functions
+
+    Returns:
+        Dictionary with per-test outcomes, setup_error, timed_out and duration.
+        The caller owns it: cached results are copied in and out.
+    """
+    cache_key = make_cache_key('test-run', code, {'tests': test_code})
+    if analysis_cache is not None:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+    job = {'code': code, 'tests': test_code,
+           'test_timeout': config.test_sandbox_test_timeout_seconds}
+    started = time.perf_counter()
+    stdout, timed_out = get_test_pool().run(job, config.test_sandbox_timeout_seconds)
+    results = _parse_worker_output(stdout, timed_out, time.perf_counter() - started)
+
+    if analysis_cache is not None and not timed_out:
+        analysis_cache.set(cache_key, copy.deepcopy(results))
+    return results
+
+
+async def run_test_suite(code: str, test_code: str) -> Dict[str, Any]:
+    """Async wrapper around execute_tests; waits on the sandbox off the event loop."""
+    return await asyncio.to_thread(execute_tests, code, test_code)
+
+
+def test_category(name: str) -> str:
+    """Maps a test function name to its summary category."""
+    for prefix, category in TEST_CATEGORIES.items():
+        if name.startswith(prefix):
+            return category
+    return DEFAULT_TEST_CATEGORY
+
+
+def _counts(results: Dict[str, Any]) -> Dict[str, int]:
+    outcomes = [test['outcome'] for test in results['tests']]
+    counts = {
+        'passed': outcomes.count('passed'),
+        'failed': outcomes.count('failed'),
+        'errors': outcomes.count('error'),
+    }
+    if results.get('setup_error'):
+        counts['errors'] += 1
+    counts['total'] = counts['passed'] + counts['failed'] + counts['errors']
+    return counts
+
+
+def summarize_run(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds the test_summary and test_categories sections of test_execution_summary."""
+    counts = _counts(results)
+    categories = {category: {'passed': 0, 'failed': 0, 'errors': 0}
+                  for category in TEST_CATEGORIES.values()}
+    for test in results['tests']:
+        key = 'errors' if test['outcome'] == 'error' else test['outcome']
+        categories.setdefault(test_category(test['name']),
+                              {'passed': 0, 'failed': 0, 'errors': 0})[key] += 1
+
+    return {
+        'test_summary': {
+            'total_tests_run': counts['total'],
+            'tests_passed': counts['passed'],
+            'tests_failed': counts['failed'],
+            'tests_with_errors': counts['errors'],
+        },
+        'test_categories': categories,
+    }
+
+
+def compare_runs(original: Optional[Dict[str, Any]], fixed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds a fix_test_execution_summary from a replay of the original suite.
+
+    Args:
+        original: Results of the suite on the original code (may be None)
+        fixed: Results of the same suite on the fixed code
+
+    Returns:
+        Dictionary in the fix test runner's JSON schema
+    """
+    counts = _counts(fixed)
+    pass_rate = round(counts['passed'] / counts['total'] * 100, 1) if counts['total'] else 0.0
+
+    original_outcomes = {t['name']: t['outcome'] for t in (original or {}).get('tests', [])}
+    original_pass_rate = 0.0
+    if original is not None:
+        original_counts = _counts(original)
+        if original_counts['total']:
+            original_pass_rate = round(original_counts['passed'] / original_counts['total'] * 100, 1)
+
+    details = [{'name': t['name'], 'outcome': t['outcome'], 'message': t['message']}
+               for t in fixed['tests'] if t['outcome'] != 'passed']
+    if fixed.get('setup_error'):
+        details.insert(0, {'name': '<setup>', 'outcome': 'error', 'message': fixed['setup_error']})
+
+    return {
+        'passed': counts['passed'],
+        'failed': counts['failed'] + counts['errors'],
+        'total': counts['total'],
+        'pass_rate': pass_rate,
+        'details': details,
+        'comparison': {
+            'original_pass_rate': original_pass_rate,
+            'new_pass_rate': pass_rate,
+            'improvement': round(pass_rate - original_pass_rate, 1),
+            'newly_passing_tests': [t['name'] for t in fixed['tests']
+                                    if t['outcome'] == 'passed'
+                                    and original_outcomes.get(t['name'], 'passed') != 'passed'],
+            'still_failing_tests': [t['name'] for t in fixed['tests'] if t['outcome'] != 'passed'],
+        },
+        'replayed': True,
+    }
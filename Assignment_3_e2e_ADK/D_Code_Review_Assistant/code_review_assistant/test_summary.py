@@ -0,0 +1,126 @@
+"""
+Normalised test results for the Code Review Assistant.
+
+The review and fix test runners report results in different JSON shapes
+(``test_summary`` counts, ``passed``/``total``, ``tests_passed``/
+``total_tests_run``, a bare ``pass_rate``, a ``comparison`` block), possibly
+wrapped in a markdown fence. ``TestSummary.parse`` turns any of them into one
+model. Runner outputs are parsed once when they are written to state, and the
+normalised dict is stored next to the raw output, so tools read plain values
+instead of re-parsing JSON on every call.
+"""
+import json
+from typing import Any, Dict, Mapping, Optional
+
+
+def parse_result_payload(value: Any) -> Dict[str, Any]:
+    """
+    Decodes a runner output into a dictionary.
+
+    Accepts a dict, a JSON string or a JSON string inside a ```json fence.
+    Text that is not a JSON object is kept under the "analysis" key.
+    """
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return {}
+
+    text = value.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[-1].rsplit('```', 1)[0]
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return {'analysis': text}
+    return parsed if isinstance(parsed, dict) else {'analysis': parsed}
+
+
+def _number(value: Any, default: float = 0) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+class TestSummary:
+    """Test counts and pass rate (in percent) of one test run."""
+
+    __test__ = False  # Not a pytest test class
+    __slots__ = ('total', 'passed', 'failed', 'errors', 'pass_rate', 'critical_issues')
+
+    def __init__(self, total: int = 0, passed: int = 0, failed: int = 0, errors: int = 0,
+                 pass_rate: Optional[float] = None, critical_issues: int = 0):
+        self.total = total
+        self.passed = passed
+        self.failed = failed
+        self.errors = errors
+        if pass_rate is None:
+            pass_rate = passed / total * 100 if total else 0.0
+        self.pass_rate = float(pass_rate)
+        self.critical_issues = critical_issues
+
+    @classmethod
+    def parse(cls, value: Any) -> 'TestSummary':
+        """Builds a summary from any runner output shape (dict or JSON string)."""
+        data = parse_result_payload(value)
+
+        # Review runner: {"test_summary": {"total_tests_run", "tests_passed", ...}}
+        counts = data.get('test_summary') if isinstance(data.get('test_summary'), dict) else data
+        if 'total_tests_run' in counts or 'tests_passed' in counts:
+            critical = counts.get('critical_issues_found')
+            if critical is None and isinstance(data.get('critical_issues'), list):
+                critical = len(data['critical_issues'])
+            return cls(
+                total=int(_number(counts.get('total_tests_run'))),
+                passed=int(_number(counts.get('tests_passed'))),
+                failed=int(_number(counts.get('tests_failed'))),
+                errors=int(_number(counts.get('tests_with_errors'))),
+                critical_issues=int(_number(critical))
+            )
+
+        # Fix runner: {"passed", "failed", "total", "pass_rate", "comparison": {...}}
+        pass_rate = data.get('pass_rate')
+        if pass_rate is None and isinstance(data.get('comparison'), dict):
+            pass_rate = data['comparison'].get('new_pass_rate')
+        total = int(_number(data.get('total')))
+        passed = int(_number(data.get('passed')))
+        failed = int(_number(data.get('failed'), default=max(total - passed, 0)))
+        return cls(
+            total=total,
+            passed=passed,
+            failed=failed,
+            pass_rate=_number(pass_rate) if pass_rate is not None else None
+        )
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'TestSummary':
+        """Rebuilds a summary stored with to_dict()."""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    @property
+    def all_passed(self) -> bool:
+        if self.total:
+            return self.failed == 0 and self.errors == 0 and self.passed == self.total
+        return self.pass_rate >= 100
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TestSummary):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (f"TestSummary(passed={self.passed}/{self.total}, failed={self.failed}, "
+                f"errors={self.errors}, pass_rate={self.pass_rate:.1f})")
+
+
+def load_test_summary(state: Mapping[str, Any], normalized_key: str, raw_key: str) -> TestSummary:
+    """
+    Reads a test summary from state.
+
+    Uses the normalised dict written alongside the runner output; sessions
+    created before normalisation fall back to parsing the raw output.
+    """
+    normalized = state.get(normalized_key)
+    if normalized:
+        return TestSummary.from_dict(normalized)
+    return TestSummary.parse(state.get(raw_key))
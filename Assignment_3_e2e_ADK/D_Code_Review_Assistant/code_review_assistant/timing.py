@@ -0,0 +1,60 @@
+"""
+Per-stage latency tracking for the review pipeline.
+
+Agents register ``stage_timer.start`` / ``stage_timer.stop`` as before/after
+agent callbacks. Timings are kept in process memory keyed by invocation id,
+so stages running concurrently never race on a shared state key; the
+pipeline's final callback writes the whole breakdown to state at once.
+"""
+import logging
+import threading
+import time
+from typing import Dict
+
+from google.adk.agents.callback_context import CallbackContext
+
+from .constants import StateKeys
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Invocations that never reach report() (e.g. failed runs) are dropped past this
+_MAX_TRACKED_INVOCATIONS = 256
+
+
+class StageTimer:
+    """Records wall-clock duration of agents per invocation."""
+
+    def __init__(self):
+        self._runs: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, callback_context: CallbackContext) -> None:
+        with self._lock:
+            stages = self._runs.setdefault(callback_context.invocation_id, {})
+            stages[callback_context.agent_name] = {'started': time.perf_counter()}
+            while len(self._runs) > _MAX_TRACKED_INVOCATIONS:
+                self._runs.pop(next(iter(self._runs)))
+
+    def stop(self, callback_context: CallbackContext) -> None:
+        with self._lock:
+            stage = self._runs.get(callback_context.invocation_id, {}).get(callback_context.agent_name)
+            if stage is not None:
+                stage['seconds'] = round(time.perf_counter() - stage['started'], 3)
+
+    def report(self, callback_context: CallbackContext) -> None:
+        """Stops the calling agent's timer and stores the breakdown in state."""
+        self.stop(callback_context)
+        with self._lock:
+            stages = self._runs.pop(callback_context.invocation_id, {})
+
+        latency = {name: stage['seconds'] for name, stage in stages.items() if 'seconds' in stage}
+        callback_context.state[StateKeys.REVIEW_LATENCY] = {
+            'total_seconds': latency.pop(callback_context.agent_name, None),
+            'stages': latency
+        }
+        logger.info(f"Timing: {callback_context.agent_name} stages {latency}")
+
+
+# --- Global Timer Instance ---
+stage_timer = StageTimer()
@@ -1,28 +1,55 @@
 """
 Tools for the Code Review Assistant.
 
-These tools provide safe code analysis, style checking, test generation,
-and feedback management capabilities using ADK's built-in code executor.
+These tools provide safe code analysis, style checking, sandboxed test
+execution, and feedback management capabilities.
 """
-import ast
 import asyncio
+import copy
 import hashlib
 import json
-import os
-import pycodestyle
-import tempfile
 import logging
+from collections import Counter
 from datetime import datetime
-from typing import Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 
-from google.genai import types
 from google.adk.tools import ToolContext
+from .analysis import analyze_source
+from .cache import analysis_cache, make_cache_key
 from .constants import StateKeys
+from .executor import run_cpu_bound
+from .incremental import extract_code_block, shift_issues, unit_sources
+from .report_store import report_store
+from .style_engine import StyleEngine
+from .test_engine import run_test_suite, summarize_run
+from .test_summary import load_test_summary, parse_result_payload
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# pycodestyle settings; part of the style cache key so changing them invalidates results
+STYLE_GUIDE_OPTIONS = {
+    'max_line_length': 100,
+    'ignore': ['E501', 'W503'],
+}
+
+# Shared, thread-safe pycodestyle runner (options are parsed once)
+_style_engine = StyleEngine(**STYLE_GUIDE_OPTIONS)
+
+
+def _cache_lookup(key: str) -> Any:
+    """Returns a private copy of a cached result, or None on a miss."""
+    if analysis_cache is None:
+        return None
+    cached = analysis_cache.get(key)
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+def _cache_store(key: str, value: Any) -> None:
+    """Stores a result in the analysis cache if caching is enabled."""
+    if analysis_cache is not None:
+        analysis_cache.set(key, copy.deepcopy(value))
+
 
 async def analyze_code_structure(code: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
@@ -30,6 +57,9 @@ async def analyze_code_structure(code: str, tool_context: ToolContext) -> Dict[s
 
     This tool parses Python code to extract structural information
     including functions, classes, imports, and complexity metrics.
+    Inside the review pipeline the submission captured in code_to_review
+    is analyzed and left as is, since the other review stages read it
+    concurrently; the code argument is only used (and stored) outside it.
 
     Args:
         code: Python source code to analyze
@@ -41,27 +71,24 @@ async def analyze_code_structure(code: str, tool_context: ToolContext) -> Dict[s
     logger.info("Tool: Analyzing code structure...")
 
     try:
-        # Validate input
-        if not code or not isinstance(code, str):
-            return {
-                "status": "error",
-                "message": "No code provided or invalid input"
-            }
-
-        # Store the original code in state for other agents
-        tool_context.state[StateKeys.CODE_TO_REVIEW] = code
-        tool_context.state[StateKeys.CODE_LINE_COUNT] = len(code.splitlines())
+        submitted = tool_context.state.get(StateKeys.CODE_TO_REVIEW)
+        if submitted:
+            code = submitted
+        else:
+            # Validate input
+            if not code or not isinstance(code, str):
+                return {
+                    "status": "error",
+                    "message": "No code provided or invalid input"
+                }
 
-        # Use thread pool for CPU-bound AST parsing
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            # Parse the code into an AST
-            tree = await loop.run_in_executor(executor, ast.parse, code)
+            # Store the original code in state for other agents
+            code = extract_code_block(code)
+            tool_context.state[StateKeys.CODE_TO_REVIEW] = code
+            tool_context.state[StateKeys.CODE_LINE_COUNT] = len(code.splitlines())
 
-            # Extract structural information in thread pool
-            analysis = await loop.run_in_executor(
-                executor, _extract_code_structure, tree, code
-            )
+        # Parse once and collect structure, naming and metrics in a single pass
+        analysis = await _run_structure_analysis(code)
 
         # Store analysis in state
         tool_context.state[StateKeys.CODE_ANALYSIS] = analysis
@@ -100,80 +127,6 @@ async def analyze_code_structure(code: str, tool_context: ToolContext) -> Dict[s
         }
 
 
-def _extract_code_structure(tree: ast.AST, code: str) -> Dict[str, Any]:
-    """
-    Helper function to extract structural information from AST.
-    Runs in thread pool for CPU-bound work.
-    """
-    functions = []
-    classes = []
-    imports = []
-    docstrings = []
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            func_info = {
-                'name': node.name,
-                'args': [arg.arg for arg in node.args.args],
-                'lineno': node.lineno,
-                'has_docstring': ast.get_docstring(node) is not None,
-                'is_async': isinstance(node, ast.AsyncFunctionDef),
-                'decorators': [d.id for d in node.decorator_list
-                               if isinstance(d, ast.Name)]
-            }
-            functions.append(func_info)
-
-            if func_info['has_docstring']:
-                docstrings.append(f"{node.name}: {ast.get_docstring(node)[:50]}...")
-
-        elif isinstance(node, ast.ClassDef):
-            methods = []
-            for item in node.body:
-                if isinstance(item, ast.FunctionDef):
-                    methods.append(item.name)
-
-            class_info = {
-                'name': node.name,
-                'lineno': node.lineno,
-                'methods': methods,
-                'has_docstring': ast.get_docstring(node) is not None,
-                'base_classes': [base.id for base in node.bases
-                                 if isinstance(base, ast.Name)]
-            }
-            classes.append(class_info)
-
-        elif isinstance(node, ast.Import):
-            for alias in node.names:
-                imports.append({
-                    'module': alias.name,
-                    'alias': alias.asname,
-                    'type': 'import'
-                })
-        elif isinstance(node, ast.ImportFrom):
-            imports.append({
-                'module': node.module or '',
-                'names': [alias.name for alias in node.names],
-                'type': 'from_import',
-                'level': node.level
-            })
-
-    return {
-        'functions': functions,
-        'classes': classes,
-        'imports': imports,
-        'docstrings': docstrings,
-        'metrics': {
-            'line_count': len(code.splitlines()),
-            'function_count': len(functions),
-            'class_count': len(classes),
-            'import_count': len(imports),
-            'has_main': any(f['name'] == 'main' for f in functions),
-            'has_if_main': '__main__' in code,
-            'avg_function_length': _calculate_avg_function_length(tree)
-        }
-    }
-
-
 async def check_code_style(code: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Checks code style compliance using pycodestyle (PEP 8).
@@ -197,12 +150,13 @@ async def check_code_style(code: str, tool_context: ToolContext) -> Dict[str, An
                     "message": "No code provided or found in state"
                 }
 
-        # Run style check in thread pool
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(
-                executor, _perform_style_check, code
-            )
+        # Reuse the structure analysis of the same code (no re-parse)
+        analysis = tool_context.state.get(StateKeys.CODE_ANALYSIS)
+        if not (isinstance(analysis, dict) and 'units' in analysis
+                and tool_context.state.get(StateKeys.CODE_TO_REVIEW) == code):
+            analysis = None
+
+        result = await _run_style_check(code, analysis)
 
         # Store results in state
         tool_context.state[StateKeys.STYLE_SCORE] = result['score']
@@ -229,98 +183,143 @@ async def check_code_style(code: str, tool_context: ToolContext) -> Dict[str, An
         }
 
 
-def _perform_style_check(code: str) -> Dict[str, Any]:
-    """Helper to perform style check in thread pool."""
-    import io
-    import sys
+async def _run_structure_analysis(code: str) -> Dict[str, Any]:
+    """
+    Analyzes code on the shared executor; identical submissions skip AST work entirely.
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp:
-        tmp.write(code)
-        tmp_path = tmp.name
+    Raises:
+        SyntaxError: If the code cannot be parsed
+    """
+    cache_key = make_cache_key('structure', code)
+    analysis = _cache_lookup(cache_key)
+    if analysis is not None:
+        logger.info("Tool: Structure analysis served from cache")
+        return analysis
 
-    try:
-        # Capture stdout to get pycodestyle output
-        old_stdout = sys.stdout
-        sys.stdout = captured_output = io.StringIO()
-
-        style_guide = pycodestyle.StyleGuide(
-            quiet=False,  # We want output
-            max_line_length=100,
-            ignore=['E501', 'W503']
-        )
+    analysis = await run_cpu_bound(analyze_source, code)
+    _cache_store(cache_key, analysis)
+    return analysis
+
+
+async def _run_style_check(code: str, analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Runs the style check on the shared executor, reusing cached results.
+
+    Identical code is served from the cache as a whole. Otherwise the code
+    is linted unit by unit (one unit per top-level definition, between the
+    units around it), and units whose text and neighbours were linted
+    before - e.g. functions a fix left untouched - are served from the
+    per-unit cache.
+    """
+    cache_key = make_cache_key('style', code, STYLE_GUIDE_OPTIONS)
+    result = _cache_lookup(cache_key)
+    if result is not None:
+        logger.info("Tool: Style check served from cache")
+        return result
 
-        result = style_guide.check_files([tmp_path])
-
-        # Restore stdout
-        sys.stdout = old_stdout
-
-        # Parse captured output
-        output = captured_output.getvalue()
-        issues = []
-
-        for line in output.strip().split('\n'):
-            if line and ':' in line:
-                parts = line.split(':', 4)
-                if len(parts) >= 4:
-                    try:
-                        issues.append({
-                            'line': int(parts[1]),
-                            'column': int(parts[2]),
-                            'code': parts[3].split()[0] if len(parts) > 3 else 'E000',
-                            'message': parts[3].strip() if len(parts) > 3 else 'Unknown error'
-                        })
-                    except (ValueError, IndexError):
-                        pass
-
-        # Add naming convention checks
+    if analysis is None:
         try:
-            tree = ast.parse(code)
-            naming_issues = _check_naming_conventions(tree)
-            issues.extend(naming_issues)
+            analysis = await _run_structure_analysis(code)
         except SyntaxError:
-            pass  # Syntax errors will be caught elsewhere
+            # Units cannot be found without a parse tree; lint the file as a whole
+            result = await run_cpu_bound(_perform_style_check, code, [])
+            _cache_store(cache_key, result)
+            return result
+
+    units = analysis['units']
+    sources = unit_sources(code, units)
+    # NUL cannot occur in Python source, so it separates the parts unambiguously
+    unit_keys = [make_cache_key('style-unit', '\0'.join(parts), STYLE_GUIDE_OPTIONS)
+                 for parts in sources]
+    unit_issues = [_cache_lookup(key) for key in unit_keys]
+
+    pending = [i for i, issues in enumerate(unit_issues) if issues is None]
+    if pending:
+        linted = await asyncio.gather(*(
+            run_cpu_bound(_lint_unit, *sources[i]) for i in pending
+        ))
+        for i, issues in zip(pending, linted):
+            unit_issues[i] = issues
+            _cache_store(unit_keys[i], issues)
+    logger.info(f"Tool: Linted {len(pending)} of {len(units)} units "
+                f"({len(units) - len(pending)} reused from cache)")
+
+    issues = []
+    for unit, issues_in_unit in zip(units, unit_issues):
+        issues.extend(shift_issues(issues_in_unit, unit['start'] - 1))
+    issues.extend(analysis['naming_issues'])
+
+    result = _build_style_result(issues)
+    _cache_store(cache_key, result)
+    return result
+
+
+def _lint_unit(before: str, source: str, after: str) -> List[Dict[str, Any]]:
+    """
+    Lints one unit between the units around it.
+    Returns the issues inside the unit, with line numbers relative to it.
+    """
+    before_lines = before.count('\n')
+    source_lines = len(source.splitlines())
+    return [
+        {**issue, 'line': issue['line'] - before_lines}
+        for issue in _style_engine.check(before + source + after)
+        if before_lines < issue['line'] <= before_lines + source_lines
+    ]
 
-        # Calculate weighted score
-        score = _calculate_style_score(issues)
 
-        return {
-            "status": "success",
-            "score": score,
-            "issue_count": len(issues),
-            "issues": issues[:10],  # First 10 issues
-            "summary": f"Style score: {score}/100 with {len(issues)} violations"
-        }
+def _perform_style_check(code: str,
+                         naming_issues: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Helper to perform style check on the shared executor.
+
+    Naming issues already collected by the structure analysis can be passed
+    in; otherwise the code is analyzed here to find them.
+    """
+    return _build_style_result(_collect_style_issues(code, naming_issues))
+
+
+def check_style(code: str,
+                naming_issues: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Style check for callers outside the agent, such as batch mode.
+
+    Returns the same result as the check_code_style tool, plus the count of
+    every issue code under ``issue_codes``; ``issues`` only lists the first ten.
+    """
+    issues = _collect_style_issues(code, naming_issues)
+    result = _build_style_result(issues)
+    result['issue_codes'] = dict(Counter(issue['code'] for issue in issues))
+    return result
+
 
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-
-
-def _check_naming_conventions(tree: ast.AST) -> List[Dict[str, Any]]:
-    """Check PEP 8 naming conventions."""
-    naming_issues = []
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            # Skip private/protected methods and __main__
-            if not node.name.startswith('_') and node.name != node.name.lower():
-                naming_issues.append({
-                    'line': node.lineno,
-                    'column': node.col_offset,
-                    'code': 'N802',
-                    'message': f"N802 function name '{node.name}' should be lowercase"
-                })
-        elif isinstance(node, ast.ClassDef):
-            # Check if class name follows CapWords convention
-            if not node.name[0].isupper() or '_' in node.name:
-                naming_issues.append({
-                    'line': node.lineno,
-                    'column': node.col_offset,
-                    'code': 'N801',
-                    'message': f"N801 class name '{node.name}' should use CapWords convention"
-                })
-
-    return naming_issues
+def _collect_style_issues(code: str,
+                          naming_issues: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    # PEP 8 issues are collected in memory; no temp file or stdout capture needed
+    issues = _style_engine.check(code)
+
+    # Add naming convention checks
+    if naming_issues is None:
+        try:
+            naming_issues = analyze_source(code)['naming_issues']
+        except SyntaxError:
+            naming_issues = []  # Syntax errors will be caught elsewhere
+    issues.extend(naming_issues)
+    return issues
+
+
+def _build_style_result(issues: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Scores the collected issues and builds the style check result."""
+    # Calculate weighted score
+    score = _calculate_style_score(issues)
+
+    return {
+        "status": "success",
+        "score": score,
+        "issue_count": len(issues),
+        "issues": issues[:10],  # First 10 issues
+        "summary": f"Style score: {score}/100 with {len(issues)} violations"
+    }
 
 
 def _calculate_style_score(issues: List[Dict[str, Any]]) -> int:
@@ -353,6 +352,62 @@ def _calculate_style_score(issues: List[Dict[str, Any]]) -> int:
     return max(0, 100 - min(total_deduction, 100))
 
 
+async def run_generated_tests(test_code: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Runs a generated test suite against the code under review in a local sandbox.
+
+    Tests are top-level ``test_*`` functions using plain asserts; everything
+    defined by the submitted code is in scope. The suite and its results are
+    stored in state so the fix loop can replay it on the fixed code.
+
+    Args:
+        test_code: Python source defining the test functions
+        tool_context: ADK tool context
+
+    Returns:
+        Dictionary with per-test outcomes and summary counts
+    """
+    logger.info("Tool: Running generated tests in sandbox...")
+
+    try:
+        code = tool_context.state.get(StateKeys.CODE_TO_REVIEW, '')
+        if not code:
+            return {
+                "status": "error",
+                "message": "No code found in state to test"
+            }
+        if not test_code:
+            return {
+                "status": "error",
+                "message": "No test code provided"
+            }
+
+        results = await run_test_suite(code, test_code)
+
+        # Store the suite and its results for the fix loop
+        tool_context.state[StateKeys.TEST_SUITE] = test_code
+        tool_context.state[StateKeys.TEST_RUN_RESULTS] = results
+
+        summary = summarize_run(results)
+        logger.info(f"Tool: Tests complete - {summary['test_summary']['tests_passed']}/"
+                    f"{summary['test_summary']['total_tests_run']} passed")
+
+        return {
+            "status": "success",
+            **summary,
+            "setup_error": results['setup_error'],
+            "timed_out": results['timed_out'],
+            "tests": results['tests']
+        }
+
+    except Exception as e:
+        logger.error(f"Tool: Test execution failed: {e}", exc_info=True)
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
 async def search_past_feedback(developer_id: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Search for past feedback in memory service.
@@ -491,18 +546,11 @@ async def update_grading_progress(tool_context: ToolContext) -> Dict[str, Any]:
         state_updates[StateKeys.SCORE_IMPROVEMENT] = score_improvement
 
         # Track test results if available
-        test_results = tool_context.state.get(StateKeys.TEST_EXECUTION_SUMMARY, {})
-
-        # Parse if it's a string
-        if isinstance(test_results, str):
-            try:
-                test_results = json.loads(test_results)
-            except:
-                test_results = {}
-
-        if test_results and test_results.get('total', 0) > 0:
-            pass_rate = (test_results.get('passed', 0) / test_results['total']) * 100
-            state_updates[StateKeys.USER_LAST_TEST_PASS_RATE] = pass_rate
+        test_summary = load_test_summary(
+            tool_context.state, StateKeys.TEST_SUMMARY, StateKeys.TEST_EXECUTION_SUMMARY
+        )
+        if test_summary.total > 0:
+            state_updates[StateKeys.USER_LAST_TEST_PASS_RATE] = test_summary.pass_rate
 
         # Apply all updates atomically
         for key, value in state_updates.items():
@@ -554,14 +602,7 @@ async def save_grading_report(feedback_text: str, tool_context: ToolContext) ->
         style_issues = tool_context.state.get(StateKeys.STYLE_ISSUES, [])
 
         # Get test results
-        test_results = tool_context.state.get(StateKeys.TEST_EXECUTION_SUMMARY, {})
-
-        # Parse if it's a string
-        if isinstance(test_results, str):
-            try:
-                test_results = json.loads(test_results)
-            except:
-                test_results = {}
+        test_results = parse_result_payload(tool_context.state.get(StateKeys.TEST_EXECUTION_SUMMARY))
 
         timestamp = datetime.now().isoformat()
 
@@ -587,34 +628,30 @@ async def save_grading_report(feedback_text: str, tool_context: ToolContext) ->
             }
         }
 
-        # Convert report to JSON string
-        report_json = json.dumps(report, indent=2)
-        report_part = types.Part.from_text(text=report_json)
-
         # Try to save as artifact if the service is available
-        if hasattr(tool_context, 'save_artifact'):
+        if report_store.available(tool_context):
             try:
-                # Generate filename with timestamp (replace colons for filesystem compatibility)
-                filename = f"grading_report_{timestamp.replace(':', '-')}.json"
-
-                # Save the main report (await directly since it's async)
-                version = await tool_context.save_artifact(filename, report_part)
+                # Compact report with the code stored by hash; "latest" is a pointer to it.
+                # Filename timestamp has colons replaced for filesystem compatibility.
+                saved = await report_store.save(
+                    tool_context, 'grading_report', timestamp.replace(':', '-'), report,
+                    code_paths=[('code', 'content')]
+                )
 
-                # Also save a "latest" version for easy access
-                await tool_context.save_artifact("latest_grading_report.json", report_part)
-
-                logger.info(f"Tool: Report saved as {filename} (version {version})")
+                state = 'saved' if saved['saved'] else 'queued'
+                logger.info(f"Tool: Report {state} as {saved['filename']} ({saved['size']} bytes)")
 
                 # Store report in state as well for redundancy
                 tool_context.state[StateKeys.USER_LAST_GRADING_REPORT] = report
 
                 return {
                     "status": "success",
-                    "artifact_saved": True,
-                    "filename": filename,
-                    "version": str(version),  # Convert to string to avoid serialization issues
-                    "size": len(report_json),
-                    "summary": f"Report saved as {filename}"
+                    "artifact_saved": saved['saved'],
+                    "filename": saved['filename'],
+                    "latest": saved['latest'],
+                    "compression": saved['compression'],
+                    "size": saved['size'],
+                    "summary": f"Report {state} as {saved['filename']}"
                 }
 
             except Exception as artifact_error:
@@ -630,7 +667,7 @@ async def save_grading_report(feedback_text: str, tool_context: ToolContext) ->
             "status": "success",
             "artifact_saved": False,
             "message": "Report saved to state only",
-            "size": len(report_json),
+            "size": len(json.dumps(report, separators=(',', ':'))),
             "summary": "Report saved to session state"
         }
 
@@ -670,15 +707,8 @@ async def validate_fixed_style(tool_context: ToolContext) -> Dict[str, Any]:
     logger.info("Tool: Validating style of fixed code...")
 
     try:
-        # Get the fixed code from state
-        code_fixes = tool_context.state.get(StateKeys.CODE_FIXES, '')
-        # Try to extract from the code_fixes output
-        if '```python' in code_fixes:
-            # Extract code from markdown
-            start = code_fixes.rfind('```python') + 9
-            end = code_fixes.rfind('```')
-            if start < end:
-                code_fixes = code_fixes[start:end].strip()
+        # Get the fixed code from state, extracted from markdown if needed
+        code_fixes = extract_code_block(tool_context.state.get(StateKeys.CODE_FIXES, ''))
 
         if not code_fixes:
             return {
@@ -689,12 +719,8 @@ async def validate_fixed_style(tool_context: ToolContext) -> Dict[str, Any]:
         # Store the extracted fixed code
         tool_context.state[StateKeys.CODE_FIXES] = code_fixes
 
-        # Run style check on fixed code
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            style_result = await loop.run_in_executor(
-                executor, _perform_style_check, code_fixes
-            )
+        # Run style check on fixed code; only units changed since the last check are re-linted
+        style_result = await _run_style_check(code_fixes)
 
         # Compare with original
         original_score = tool_context.state.get(StateKeys.STYLE_SCORE, 0)
@@ -741,65 +767,18 @@ async def compile_fix_report(tool_context: ToolContext) -> Dict[str, Any]:
         original_code = tool_context.state.get(StateKeys.CODE_TO_REVIEW, '')
         code_fixes = tool_context.state.get(StateKeys.CODE_FIXES, '')
 
-        # Test results
-        original_tests = tool_context.state.get(StateKeys.TEST_EXECUTION_SUMMARY, {})
-        fixed_tests = tool_context.state.get(StateKeys.FIX_TEST_EXECUTION_SUMMARY, {})
-
-        # Debug logging to see what we're getting
-        logger.debug(f"Original tests from state: {original_tests}")
-        logger.debug(f"Fixed tests from state: {fixed_tests}")
+        # Test results, normalised when the runners wrote them
+        original_tests = load_test_summary(
+            tool_context.state, StateKeys.TEST_SUMMARY, StateKeys.TEST_EXECUTION_SUMMARY
+        )
+        fixed_tests = load_test_summary(
+            tool_context.state, StateKeys.FIX_TEST_SUMMARY, StateKeys.FIX_TEST_EXECUTION_SUMMARY
+        )
+        logger.debug(f"Original tests: {original_tests}, fixed tests: {fixed_tests}")
 
-        # Parse original test results if they're strings
-        if isinstance(original_tests, str):
-            try:
-                original_tests = json.loads(original_tests)
-            except:
-                original_tests = {}
-
-        # Parse fixed test results if they're strings
-        if isinstance(fixed_tests, str):
-            try:
-                fixed_tests = json.loads(fixed_tests)
-            except:
-                fixed_tests = {}
-
-        # Calculate pass rates from the actual test results
-        # Handle different possible structures from test runners
-        original_pass_rate = 0
-        if original_tests:
-            if 'pass_rate' in original_tests:
-                original_pass_rate = original_tests['pass_rate']
-            elif 'test_summary' in original_tests:
-                # Handle test_runner_agent's JSON structure
-                summary = original_tests['test_summary']
-                total = summary.get('total_tests_run', 0)
-                passed = summary.get('tests_passed', 0)
-                if total > 0:
-                    original_pass_rate = (passed / total) * 100
-            elif 'passed' in original_tests and 'total' in original_tests:
-                # Handle simple passed/total structure
-                if original_tests['total'] > 0:
-                    original_pass_rate = (original_tests['passed'] / original_tests['total']) * 100
-            elif 'tests_passed' in original_tests and 'total_tests_run' in original_tests:
-                # Another possible structure
-                if original_tests['total_tests_run'] > 0:
-                    original_pass_rate = (original_tests['tests_passed'] / original_tests['total_tests_run']) * 100
-
-        fixed_pass_rate = 0
-        all_tests_pass = False
-        if fixed_tests:
-            if 'pass_rate' in fixed_tests:
-                fixed_pass_rate = fixed_tests['pass_rate']
-                all_tests_pass = fixed_tests.get('failed', 1) == 0
-            elif 'passed' in fixed_tests and 'total' in fixed_tests:
-                # Handle fix_test_runner's output structure
-                if fixed_tests['total'] > 0:
-                    fixed_pass_rate = (fixed_tests['passed'] / fixed_tests['total']) * 100
-                all_tests_pass = fixed_tests.get('failed', 0) == 0
-            elif 'comparison' in fixed_tests:
-                # Handle structure with comparison field
-                fixed_pass_rate = fixed_tests['comparison'].get('new_pass_rate', 0)
-                all_tests_pass = fixed_tests.get('failed', 0) == 0
+        original_pass_rate = original_tests.pass_rate
+        fixed_pass_rate = fixed_tests.pass_rate
+        all_tests_pass = fixed_tests.all_passed
 
         # Style scores
         original_style = tool_context.state.get(StateKeys.STYLE_SCORE, 0)
@@ -909,27 +888,27 @@ async def save_fix_report(tool_context: ToolContext) -> Dict[str, Any]:
                 "message": "No fix report found in state"
             }
 
-        # Convert to JSON
-        report_json = json.dumps(fix_report, indent=2)
-        report_part = types.Part.from_text(text=report_json)
-
-        # Generate filename
+        # Generate filename timestamp
         timestamp = datetime.now().isoformat().replace(':', '-')
-        filename = f"fix_report_{timestamp}.json"
 
-        # Try to save as artifact
-        if hasattr(tool_context, 'save_artifact'):
+        # Try to save as artifact; original and fixed code are stored by hash
+        if report_store.available(tool_context):
             try:
-                version = await tool_context.save_artifact(filename, report_part)
-                await tool_context.save_artifact("latest_fix_report.json", report_part)
+                saved = await report_store.save(
+                    tool_context, 'fix_report', timestamp, fix_report,
+                    code_paths=[('original_code',), ('code_fixes',)]
+                )
 
-                logger.info(f"Tool: Fix report saved as {filename}")
+                logger.info(f"Tool: Fix report {'saved' if saved['saved'] else 'queued'} "
+                            f"as {saved['filename']}")
 
                 return {
                     "status": "success",
-                    "filename": filename,
-                    "version": str(version),
-                    "size": len(report_json)
+                    "artifact_saved": saved['saved'],
+                    "filename": saved['filename'],
+                    "latest": saved['latest'],
+                    "compression": saved['compression'],
+                    "size": saved['size']
                 }
             except Exception as e:
                 logger.warning(f"Could not save as artifact: {e}")
@@ -940,7 +919,7 @@ async def save_fix_report(tool_context: ToolContext) -> Dict[str, Any]:
         return {
             "status": "success",
             "message": "Fix report saved to state",
-            "size": len(report_json)
+            "size": len(json.dumps(fix_report, separators=(',', ':')))
         }
 
     except Exception as e:
@@ -951,29 +930,16 @@ async def save_fix_report(tool_context: ToolContext) -> Dict[str, Any]:
         }
 
 
-def _calculate_avg_function_length(tree: ast.AST) -> float:
-    """Calculate average function length in lines."""
-    function_lengths = []
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            if hasattr(node, 'end_lineno') and hasattr(node, 'lineno'):
-                length = node.end_lineno - node.lineno + 1
-                function_lengths.append(length)
-
-    if function_lengths:
-        return sum(function_lengths) / len(function_lengths)
-    return 0.0
-
-
 # Module exports
 __all__ = [
     'analyze_code_structure',
     'check_code_style',
+    'run_generated_tests',
     'search_past_feedback',
     'update_grading_progress',
     'save_grading_report',
     'validate_fixed_style',
     'compile_fix_report',
     'save_fix_report',
+    'check_style',
 ]
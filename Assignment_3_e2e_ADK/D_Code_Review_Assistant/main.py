@@ -1,8 +1,15 @@
 # main.py
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
+from fastapi import FastAPI
 from google.adk.cli.fast_api import get_fast_api_app
 
+from code_review_assistant.executor import shutdown_executor, start_executor
+from code_review_assistant.report_store import report_writer
+from code_review_assistant.test_engine import get_test_pool, shutdown_test_pool
+
 # Get credentials from environment variables
 DB_USER = os.environ.get("DB_USER")
 DB_PASSWORD = os.environ.get("DB_PASSWORD")
@@ -18,6 +25,20 @@ else:
     SESSION_SERVICE_URI = ""  # Falls back to in-memory
     print("Using in-memory session service (no database credentials provided)")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the shared tool executor once, reuse it for every request
+    start_executor()
+    # Boot the sandboxed test interpreters before the first review needs them
+    get_test_pool()
+    yield
+    # Write report artifacts still queued in the background
+    await report_writer.flush()
+    shutdown_test_pool()
+    shutdown_executor()
+
+
 # Create the FastAPI app with ADK
 app = get_fast_api_app(
     agents_dir=os.path.dirname(os.path.abspath(__file__)),
@@ -25,7 +46,8 @@ app = get_fast_api_app(
     artifact_service_uri=f"gs://{ARTIFACT_BUCKET}",
     allow_origins=["*"],
     web=True,
-    trace_to_cloud=True
+    trace_to_cloud=True,
+    lifespan=lifespan
 )
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+"""
+Unit tests for the single-pass structural analyzer.
+"""
+
+import pytest
+
+from code_review_assistant.analysis import analyze_source
+
+SAMPLE = '''
+import os
+from collections import deque as dq
+
+
+class bad_name:
+    """A class."""
+
+    def Method(self, items):
+        for item in items:
+            if item and item > 0:
+                return item
+        return None
+
+    async def fetch(self):
+        return [x for x in range(3) if x]
+
+
+async def Main():
+    """Entry point."""
+    try:
+        pass
+    except ValueError:
+        pass
+'''
+
+
+def test_collects_structure_in_one_pass():
+    analysis = analyze_source(SAMPLE)
+
+    names = [f["name"] for f in analysis["functions"]]
+    assert names == ["Method", "fetch", "Main"]
+    assert [f["is_async"] for f in analysis["functions"]] == [False, True, True]
+    assert analysis["classes"][0]["methods"] == ["Method", "fetch"]
+    assert len(analysis["imports"]) == 2
+    assert analysis["metrics"]["function_count"] == 3
+
+
+def test_naming_issues_cover_async_functions():
+    codes = [(i["code"], i["line"]) for i in analyze_source(SAMPLE)["naming_issues"]]
+    assert ("N801", 6) in codes
+    assert ("N802", 9) in codes
+    assert ("N802", 19) in codes
+
+
+def test_complexity_and_length():
+    functions = {f["name"]: f for f in analyze_source(SAMPLE)["functions"]}
+
+    # for + if + and
+    assert functions["Method"]["complexity"] == 4
+    # comprehension with one filter
+    assert functions["fetch"]["complexity"] == 3
+    # one except handler
+    assert functions["Main"]["complexity"] == 2
+    assert functions["Method"]["length"] == 5
+
+
+def test_syntax_error_propagates():
+    with pytest.raises(SyntaxError):
+        analyze_source("def broken(:\n")
@@ -0,0 +1,86 @@
+"""
+Unit tests for batch / repository review mode.
+"""
+
+import io
+import json
+import tarfile
+
+from code_review_assistant.batch import (
+    changed_files_from_diff,
+    iter_sources,
+    main,
+    review_file,
+    run_batch_review,
+)
+
+
+def _write_repo(root):
+    (root / "pkg").mkdir()
+    (root / "pkg" / "a.py").write_text("def F( x ):\n  return x\n")
+    (root / "pkg" / "b.py").write_text("def ok(x):\n    return x\n")
+    (root / "broken.py").write_text("def bad(:\n")
+    (root / "README.md").write_text("not python")
+
+
+def test_iter_sources_reads_directories_and_tarballs(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _write_repo(repo)
+    archive = tmp_path / "repo.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(repo, arcname="repo")
+
+    expected = {"broken.py", "pkg/a.py", "pkg/b.py"}
+    assert {path for path, _ in iter_sources(str(repo))} == expected
+    assert {path for path, _ in iter_sources(str(archive))} == expected
+    assert [path for path, _ in iter_sources(str(repo), only={"pkg/b.py"})] == ["pkg/b.py"]
+
+
+def test_changed_files_from_diff():
+    diff = (
+        "--- a/pkg/a.py\n+++ b/pkg/a.py\n@@ -1 +1 @@\n"
+        "--- a/gone.py\n+++ /dev/null\n"
+        "--- a/notes.md\n+++ b/notes.md\n"
+    )
+    assert changed_files_from_diff(diff) == {"pkg/a.py"}
+
+
+def test_review_file_reports_style_and_syntax_errors():
+    record = review_file("a.py", "def F( x ):\n  return x\n")
+    assert record["status"] == "success"
+    assert record["style_score"] < 100
+    assert record["functions"][0]["complexity"] == 1
+
+    assert review_file("bad.py", "def bad(:\n")["status"] == "syntax_error"
+
+
+def test_review_file_counts_every_issue_code():
+    source = "".join(f"x{i}=1\n" for i in range(12))
+    record = review_file("a.py", source)
+
+    assert len(record["style_issues"]) == 10
+    assert record["style_issue_codes"]["E225"] == 12
+    assert sum(record["style_issue_codes"].values()) == record["style_issue_count"]
+
+
+async def test_run_batch_review_streams_records_and_summary(tmp_path):
+    _write_repo(tmp_path)
+    output = io.StringIO()
+
+    summary = await run_batch_review(str(tmp_path), output, workers=2, use_llm=False)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [line["type"] for line in lines] == ["file", "file", "file", "summary"]
+    assert summary["files_reviewed"] == 3
+    assert summary["syntax_errors"] == 1
+    assert summary["llm_reviewed"] == 0
+
+
+def test_main_prints_summary_to_stderr(tmp_path, capsys):
+    _write_repo(tmp_path)
+    report = tmp_path / "report.jsonl"
+
+    assert main([str(tmp_path), "--output", str(report), "--no-llm", "--workers", "1"]) == 0
+
+    assert "Batch: reviewed 3 files" in capsys.readouterr().err
@@ -0,0 +1,58 @@
+"""
+Unit tests for the content-addressed analysis cache.
+"""
+
+import time
+
+from code_review_assistant import cache as cache_module
+from code_review_assistant.cache import LRUCache, ResultCache, SQLiteCache, make_cache_key
+
+
+def test_cache_key_depends_on_code_and_settings():
+    key = make_cache_key("style", "x = 1\n", {"max_line_length": 100})
+    assert key == make_cache_key("style", "x = 1\n", {"max_line_length": 100})
+    assert key != make_cache_key("style", "x = 2\n", {"max_line_length": 100})
+    assert key != make_cache_key("style", "x = 1\n", {"max_line_length": 79})
+    assert key != make_cache_key("structure", "x = 1\n", {"max_line_length": 100})
+
+
+def test_cache_key_depends_on_schema_version(monkeypatch):
+    key = make_cache_key("structure", "x = 1\n")
+    monkeypatch.setattr(cache_module, "CACHE_SCHEMA_VERSION", cache_module.CACHE_SCHEMA_VERSION + 1)
+    assert key != make_cache_key("structure", "x = 1\n")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_expires_entries():
+    cache = LRUCache(max_entries=2, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_hits_are_promoted_and_counted(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.db"))
+    cache = ResultCache(memory=LRUCache(max_entries=8), disk=disk)
+
+    assert cache.get("k") is None
+    cache.set("k", {"score": 90})
+    cache.memory.clear()
+
+    assert cache.get("k") == {"score": 90}
+    assert cache.get("k") == {"score": 90}
+
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hits"] == 2
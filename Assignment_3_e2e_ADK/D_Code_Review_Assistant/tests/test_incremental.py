@@ -0,0 +1,121 @@
+"""
+Unit tests for diff-aware incremental re-review.
+"""
+
+from code_review_assistant.analysis import analyze_source
+from code_review_assistant.incremental import (
+    changed_units,
+    extract_code_block,
+    shift_issues,
+    unit_sources,
+)
+from code_review_assistant.style_engine import StyleEngine
+
+ORIGINAL = '''import os
+
+
+def load(path):
+    return open(path).read()
+
+
+async def fetch(client):
+    return await client.get()
+
+
+class Store:
+    def get(self, key):
+        return key
+
+
+if __name__ == "__main__":
+    load(os.getcwd())
+'''
+
+FIXED = ORIGINAL.replace("return open(path).read()", "with open(path) as f:\n        return f.read()")
+
+
+def _lint_by_unit(engine, code):
+    issues = []
+    units = analyze_source(code)['units']
+    for unit, (before, source, after) in zip(units, unit_sources(code, units)):
+        offset = unit['start'] - 1 - before.count('\n')
+        unit_issues = engine.check(before + source + after)
+        issues.extend(i for i in shift_issues(unit_issues, offset)
+                      if unit['start'] <= i['line'] <= unit['end'])
+    return sorted((i['line'], i['code']) for i in issues)
+
+
+def test_units_cover_every_line():
+    units = analyze_source(ORIGINAL)['units']
+    assert [u['kind'] for u in units] == ['module', 'function', 'function', 'class', 'module']
+    assert units[0]['start'] == 1
+    assert units[-1]['end'] == len(ORIGINAL.splitlines())
+    for previous, unit in zip(units, units[1:]):
+        assert unit['start'] == previous['end'] + 1
+
+
+def test_unit_linting_matches_full_file():
+    engine = StyleEngine(max_line_length=100)
+    messy = ORIGINAL.replace("\n\n\nasync def", "\nasync def").replace("return key", "return key ")
+    full = sorted((i['line'], i['code']) for i in engine.check(messy))
+    assert full
+    assert _lint_by_unit(engine, messy) == full
+
+
+def test_unit_linting_matches_full_file_after_one_line_units():
+    engine = StyleEngine(max_line_length=100)
+    code = (
+        "import re\n\n\n"
+        "def group(*choices): return '(' + '|'.join(choices) + ')'\n"
+        "def any(*choices): return group(*choices) + '*'\n"
+        "def maybe(*choices): return group(*choices) + '?'\n\n\n"
+        "class Timer:\n"
+        "    pass\n"
+        "    # trailing comment\n"
+        "  # badly indented comment\n"
+        "l = 1\n"
+    )
+    full = sorted((i['line'], i['code']) for i in engine.check(code))
+    assert full
+    assert _lint_by_unit(engine, code) == full
+
+
+def test_unit_linting_matches_full_file_with_lookahead():
+    # Whether E301 applies to __init__ depends on the lines after the class
+    engine = StyleEngine(max_line_length=100)
+    code = (
+        "class Node:\n"
+        "    pass\n\n"
+        "class ScalarNode(Node):\n"
+        "    id = 'scalar'\n"
+        "    def __init__(self, tag,\n"
+        "            value):\n"
+        "        self.tag = tag\n\n"
+        "class CollectionNode(Node):\n"
+        "    def __init__(self):\n"
+        "        pass\n"
+    )
+    full = sorted((i['line'], i['code']) for i in engine.check(code))
+    assert full
+    assert _lint_by_unit(engine, code) == full
+
+
+def test_changed_units_only_includes_edited_function():
+    fixed_units = analyze_source(FIXED)['units']
+    changed = changed_units(ORIGINAL, FIXED, fixed_units)
+    assert [u['name'] for u in changed] == ['load']
+    assert 'with open(path) as f:' in changed[0]['source']
+
+
+def test_changed_units_falls_back_to_whole_file():
+    changed = changed_units(ORIGINAL, "def broken(:\n", None)
+    assert changed == [{'name': None, 'kind': 'module', 'start': 1, 'end': 1,
+                        'source': "def broken(:\n"}]
+
+
+def test_extract_code_block_handles_fences_and_plain_code():
+    code = "def f():\n    return 1"
+    assert extract_code_block(f"Review this:\n```python\n{code}\n```\nThanks") == code
+    assert extract_code_block(f"```py\nx = 0\n```\nand\n```\n{code}\n```") == code
+    assert extract_code_block(f"```\n{code}\n") == code
+    assert extract_code_block(code) == code
@@ -0,0 +1,106 @@
+"""
+Unit tests for compact, deduplicated report storage.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from google.adk.artifacts import InMemoryArtifactService
+
+from code_review_assistant.report_store import (
+    ArtifactWriter,
+    ReportStore,
+    code_blob_name,
+    decode_report,
+    encode_report,
+)
+
+CODE = "def add(a, b):\n    return a + b\n"
+
+
+class _FakeToolContext:
+    """The parts of ToolContext the report store uses."""
+
+    def __init__(self, service):
+        self._invocation_context = SimpleNamespace(
+            app_name="app", user_id="u", session=SimpleNamespace(id="s"), artifact_service=service
+        )
+        self.artifact_delta = {}
+
+    async def save_artifact(self, filename, artifact):
+        version = await self._invocation_context.artifact_service.save_artifact(
+            app_name="app", user_id="u", session_id="s", filename=filename, artifact=artifact
+        )
+        self.artifact_delta[filename] = version
+        return version
+
+
+class _FailingService:
+    """Artifact service whose writes fail while ``fail`` is set."""
+
+    def __init__(self):
+        self.service = InMemoryArtifactService()
+        self.fail = True
+
+    async def save_artifact(self, **kwargs):
+        if self.fail:
+            raise OSError("bucket unavailable")
+        return await self.service.save_artifact(**kwargs)
+
+
+def test_encoding_round_trips():
+    report = {"code": CODE, "score": 90}
+    for compression in ("none", "gzip"):
+        payload, used = encode_report(report, compression)
+        assert used == compression
+        assert decode_report(payload, used) == report
+    assert b"\n" not in encode_report(report)[0]
+
+
+async def test_code_is_stored_once_and_latest_is_a_pointer():
+    service = InMemoryArtifactService()
+    tool_context = _FakeToolContext(service)
+    store = ReportStore(ArtifactWriter(batch_size=100, flush_seconds=60), async_writes=True)
+
+    report = {"code": {"content": CODE}, "feedback": "ok"}
+    first = await store.save(tool_context, "grading_report", "t1", report, [("code", "content")])
+    second = await store.save(tool_context, "grading_report", "t2", report, [("code", "content")])
+    assert report["code"]["content"] == CODE  # caller's report is untouched
+
+    # Nothing is written on the request path, nor reported as saved
+    assert not first["saved"] and not second["saved"]
+    assert await service.list_artifact_keys(app_name="app", user_id="u", session_id="s") == []
+    await store.writer.flush()
+    assert code_blob_name(CODE) in tool_context.artifact_delta
+
+    keys = await service.list_artifact_keys(app_name="app", user_id="u", session_id="s")
+    assert sorted(keys) == sorted([first["filename"], second["filename"],
+                                   "latest_grading_report.json", code_blob_name(CODE)])
+    assert await service.list_versions(app_name="app", user_id="u", session_id="s",
+                                       filename=code_blob_name(CODE)) == [0]
+
+    pointer = await service.load_artifact(app_name="app", user_id="u", session_id="s",
+                                          filename="latest_grading_report.json")
+    assert second["filename"] in pointer.text
+    saved = await service.load_artifact(app_name="app", user_id="u", session_id="s",
+                                        filename=second["filename"])
+    assert decode_report(saved.text.encode(), "none")["code"]["content"] == {
+        "ref": code_blob_name(CODE), "line_count": 2
+    }
+
+
+async def test_inline_save_waits_and_retries_failed_code_blob():
+    service = _FailingService()
+    tool_context = _FakeToolContext(service)
+    store = ReportStore(ArtifactWriter(batch_size=100, flush_seconds=60))
+    report = {"code": {"content": CODE}}
+
+    with pytest.raises(OSError):
+        await store.save(tool_context, "grading_report", "t1", report, [("code", "content")])
+
+    service.fail = False
+    saved = await store.save(tool_context, "grading_report", "t2", report, [("code", "content")])
+    assert saved["saved"]
+    assert set(tool_context.artifact_delta) == {
+        saved["filename"], "latest_grading_report.json", code_blob_name(CODE)
+    }
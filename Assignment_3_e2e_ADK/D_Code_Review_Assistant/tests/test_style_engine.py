@@ -0,0 +1,34 @@
+"""
+Unit tests for the in-memory pycodestyle engine.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from code_review_assistant.style_engine import StyleEngine
+
+
+def test_collects_structured_issues():
+    engine = StyleEngine(max_line_length=100, ignore=["E501", "W503"])
+    issues = engine.check("def f( x ):\n  return x\n")
+
+    assert [issue["code"] for issue in issues] == ["E201", "E202", "E111"]
+    assert issues[0]["line"] == 1
+    assert issues[0]["column"] == 7
+    assert issues[0]["message"].startswith("E201")
+
+
+def test_clean_code_has_no_issues():
+    engine = StyleEngine(max_line_length=100)
+    assert engine.check("def f(x):\n    return x\n") == []
+
+
+def test_concurrent_checks_do_not_share_reports():
+    engine = StyleEngine(max_line_length=100)
+    sources = ["x=1\n", "y = 2\n"] * 20
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(engine.check, sources))
+
+    for source, issues in zip(sources, results):
+        expected = 1 if source == "x=1\n" else 0
+        assert len(issues) == expected
@@ -0,0 +1,110 @@
+"""
+Unit tests for the sandboxed test execution engine and suite replay.
+"""
+
+import json
+
+import pytest
+from google.adk.agents import Agent
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from code_review_assistant.constants import StateKeys
+from code_review_assistant.sub_agents.fix_pipeline.fix_test_runner import FixTestReplayAgent
+from code_review_assistant.test_engine import (
+    compare_runs,
+    execute_tests,
+    shutdown_test_pool,
+    summarize_run,
+)
+
+BUGGY = "def add(a, b):\n    return a - b\n\nprint('import side effect')\n"
+FIXED = BUGGY.replace("a - b", "a + b")
+SUITE = '''
+def test_basic_add():
+    assert add(1, 2) == 3, "1 + 2 should be 3"
+
+def test_edge_zero():
+    assert add(0, 0) == 0
+
+def test_error_missing_argument():
+    add(1)
+'''
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _pool():
+    yield
+    shutdown_test_pool()
+
+
+def test_outcomes_and_summary():
+    results = execute_tests(BUGGY, SUITE)
+    outcomes = {t['name']: t['outcome'] for t in results['tests']}
+    assert outcomes == {
+        'test_basic_add': 'failed',
+        'test_edge_zero': 'passed',
+        'test_error_missing_argument': 'error',
+    }
+
+    summary = summarize_run(results)
+    assert summary['test_summary'] == {
+        'total_tests_run': 3, 'tests_passed': 1, 'tests_failed': 1, 'tests_with_errors': 1
+    }
+    assert summary['test_categories']['basic_functionality'] == {'passed': 0, 'failed': 1, 'errors': 0}
+    assert summary['test_categories']['error_handling'] == {'passed': 0, 'failed': 0, 'errors': 1}
+
+
+def test_setup_error_and_limits():
+    results = execute_tests("def broken(:\n", SUITE)
+    assert results['tests'] == []
+    assert results['setup_error'].startswith('SyntaxError')
+
+    results = execute_tests("x = 1\n", "def test_basic_hangs():\n    while True:\n        pass\n")
+    assert results['tests'][0]['outcome'] == 'error'
+    assert 'timed out' in results['tests'][0]['message']
+
+
+def test_memory_limit_stops_the_run():
+    results = execute_tests("x = 1\n", "def test_basic_alloc():\n    b = bytearray(8 * 1024 ** 3)\n")
+    assert results['tests'][0]['outcome'] == 'error'
+    assert 'MemoryError' in results['tests'][0]['message']
+
+
+def test_cached_results_are_copies():
+    first = execute_tests(BUGGY, SUITE)
+    first['tests'].clear()
+    assert len(execute_tests(BUGGY, SUITE)['tests']) == 3
+
+
+def test_compare_runs_reports_newly_passing_tests():
+    comparison = compare_runs(execute_tests(BUGGY, SUITE), execute_tests(FIXED, SUITE))
+    assert comparison['passed'] == 2 and comparison['total'] == 3
+    assert comparison['comparison']['newly_passing_tests'] == ['test_basic_add']
+    assert comparison['comparison']['still_failing_tests'] == ['test_error_missing_argument']
+
+
+async def test_fix_loop_replays_suite_without_the_model():
+    fallback = Agent(name="UnusedFallback", model="gemini-2.5-flash")
+    agent = FixTestReplayAgent(name="FixTestRunner", fallback=fallback)
+    runner = InMemoryRunner(agent=agent, app_name="replay")
+    session = await runner.session_service.create_session(
+        app_name="replay", user_id="u",
+        state={
+            StateKeys.TEST_SUITE: SUITE,
+            StateKeys.TEST_RUN_RESULTS: execute_tests(BUGGY, SUITE),
+            StateKeys.CODE_FIXES: f"```python\n{FIXED}```",
+        }
+    )
+    message = types.Content(role="user", parts=[types.Part(text="validate")])
+    events = [e async for e in runner.run_async(user_id="u", session_id=session.id,
+                                                new_message=message)]
+    assert [e.author for e in events] == ["FixTestRunner"]
+
+    session = await runner.session_service.get_session(
+        app_name="replay", user_id="u", session_id=session.id
+    )
+    summary = json.loads(session.state[StateKeys.FIX_TEST_EXECUTION_SUMMARY])
+    assert summary['pass_rate'] == 66.7
+    assert summary['comparison']['original_pass_rate'] == 33.3
+    assert session.state[StateKeys.FIX_TEST_SUMMARY]['passed'] == 2
@@ -0,0 +1,47 @@
+"""
+Unit tests for test result normalisation.
+"""
+
+import json
+
+from code_review_assistant.test_summary import TestSummary, load_test_summary
+
+REVIEW_OUTPUT = {
+    "test_summary": {"total_tests_run": 20, "tests_passed": 15, "tests_failed": 3,
+                     "tests_with_errors": 2, "critical_issues_found": 1},
+    "critical_issues": [{"type": "crash"}],
+}
+
+
+def test_review_runner_shape_inside_a_fence():
+    summary = TestSummary.parse("```json\n" + json.dumps(REVIEW_OUTPUT) + "\n```")
+    assert (summary.total, summary.passed, summary.failed, summary.errors) == (20, 15, 3, 2)
+    assert summary.pass_rate == 75.0
+    assert summary.critical_issues == 1
+    assert not summary.all_passed
+
+
+def test_flat_count_shapes():
+    flat = TestSummary.parse({"tests_passed": 4, "total_tests_run": 4})
+    assert flat.pass_rate == 100.0 and flat.all_passed
+
+    fix = TestSummary.parse({"passed": 9, "failed": 1, "total": 10, "pass_rate": 90})
+    assert (fix.passed, fix.failed, fix.pass_rate) == (9, 1, 90.0)
+
+
+def test_rate_only_shapes():
+    assert TestSummary.parse({"pass_rate": 100}).all_passed
+    assert TestSummary.parse({"comparison": {"new_pass_rate": 80}}).pass_rate == 80.0
+
+
+def test_unparseable_output_is_empty():
+    for value in (None, "", "tests look fine", "[1, 2]"):
+        summary = TestSummary.parse(value)
+        assert summary.total == 0 and summary.pass_rate == 0.0 and not summary.all_passed
+
+
+def test_normalised_state_is_preferred_over_raw_output():
+    normalised = TestSummary.parse(REVIEW_OUTPUT)
+    state = {"normalized": normalised.to_dict(), "raw": "not json"}
+    assert load_test_summary(state, "normalized", "raw") == normalised
+    assert load_test_summary({"raw": json.dumps(REVIEW_OUTPUT)}, "normalized", "raw") == normalised
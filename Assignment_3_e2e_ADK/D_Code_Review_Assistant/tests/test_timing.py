@@ -0,0 +1,57 @@
+"""
+Unit tests for concurrent review stages and per-stage latency tracking.
+"""
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent, ParallelAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from code_review_assistant.constants import StateKeys
+from code_review_assistant.timing import stage_timer
+
+
+class _SleepyStage(BaseAgent):
+    delay: float
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(self.delay)
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    content=types.Content(role="model", parts=[types.Part(text="done")]))
+
+
+def _stage(name: str, delay: float) -> _SleepyStage:
+    return _SleepyStage(name=name, delay=delay, before_agent_callback=stage_timer.start,
+                        after_agent_callback=stage_timer.stop)
+
+
+async def test_fan_out_runs_stages_concurrently_and_records_latency():
+    fan_out = ParallelAgent(
+        name="FanOut",
+        sub_agents=[_stage("Analyzer", 0.3), _stage("Style", 0.3), _stage("Tests", 0.3)],
+        before_agent_callback=stage_timer.start,
+        after_agent_callback=stage_timer.stop
+    )
+    pipeline = SequentialAgent(
+        name="Pipeline",
+        sub_agents=[fan_out, _stage("Feedback", 0.1)],
+        before_agent_callback=stage_timer.start,
+        after_agent_callback=stage_timer.report
+    )
+    runner = InMemoryRunner(agent=pipeline, app_name="timing")
+    session = await runner.session_service.create_session(app_name="timing", user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text="go")])
+    async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+        pass
+
+    session = await runner.session_service.get_session(
+        app_name="timing", user_id="u", session_id=session.id
+    )
+    latency = session.state[StateKeys.REVIEW_LATENCY]
+    assert set(latency['stages']) == {"FanOut", "Analyzer", "Style", "Tests", "Feedback"}
+    assert latency['stages']['FanOut'] < 0.6  # not 0.9: the three stages overlapped
+    assert latency['total_seconds'] >= latency['stages']['FanOut'] + latency['stages']['Feedback']
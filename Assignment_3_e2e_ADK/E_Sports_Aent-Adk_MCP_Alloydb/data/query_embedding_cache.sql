@@ -0,0 +1,31 @@
+--
+-- Query embedding cache for search-products-by-description-filtered and
+-- search-products-hybrid (src/toolbox/tools.yaml). Apply after restoring
+-- store_backup.sql:
+--
+--   psql "$DATABASE_URL" -f data/query_embedding_cache.sql
+--
+-- Query texts are stored normalized (lowercase, single spaces), so repeated
+-- searches reuse the vector instead of calling embedding() again.
+--
+
+CREATE TABLE IF NOT EXISTS public.query_embeddings (
+    model character varying(255) NOT NULL,
+    query_text text NOT NULL,
+    embedding public.vector(768) NOT NULL,
+    created_at timestamp with time zone DEFAULT now() NOT NULL,
+    last_used_at timestamp with time zone DEFAULT now() NOT NULL,
+    CONSTRAINT query_embeddings_pkey PRIMARY KEY (model, query_text)
+);
+
+-- For evicting entries that have not been used for a while, e.g.
+--   DELETE FROM public.query_embeddings WHERE last_used_at < now() - interval '30 days';
+-- A cache hit only reads the row; last_used_at is refreshed at most once a day.
+CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used_at
+    ON public.query_embeddings USING btree (last_used_at);
+
+-- Pre-filters of the filtered product search
+CREATE INDEX IF NOT EXISTS idx_products_lower_brand_category
+    ON public.products USING btree (lower((brand)::text), lower((category)::text));
+CREATE INDEX IF NOT EXISTS idx_variants_product_id_size_price
+    ON public.products_variants USING btree (product_id, size, price);
@@ -2,10 +2,12 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse, Response, RedirectResponse
 from toolbox_core import ToolboxClient  # Change to async client
+import json
 import logging
 import traceback
 import uuid
-from finn_agent import process_message as finn_chat
+from contextlib import asynccontextmanager
+from finn_agent import FinnRuntime, InvalidIdToken, user_id_from_token
 from google.adk import Agent
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
@@ -22,7 +24,15 @@ logger = logging.getLogger(__name__)
 # GCS bucket name
 BUCKET_NAME = "sport-store-agent-ai-bck01"
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One runner, toolset and session service for the whole process
+    app.state.finn = FinnRuntime()
+    await app.state.finn.start()
+    yield
+    await app.state.finn.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -31,8 +41,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Session-Id"],
 )
 
+# Media types of the structured event stream of /chat, see FinnRuntime.process_message_events
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+async def encode_events(events, media_type: str):
+    """Encode chat events as NDJSON lines or server-sent events"""
+    async for event in events:
+        data = json.dumps(event, ensure_ascii=False, default=str)
+        if media_type == SSE_MEDIA_TYPE:
+            yield f"event: {event['type']}\ndata: {data}\n\n"
+        else:
+            yield data + "\n"
+
 @app.get("/test")
 async def test():
     return {"status": "ok", "message": "Backend is running"}
@@ -47,16 +71,34 @@ async def chat(request: Request):
         
         history = data.get('history', [])
         session_id = data.get('session_id') or str(uuid.uuid4())
-        user_id = data.get('user_id') or "default-user"
         
-        # Get ID token from Authorization header
+        # Get ID token from Authorization header; the user is the one it was issued to
         id_token = request.headers.get('Authorization')
+        try:
+            user_id = await user_id_from_token(id_token, session_id)
+        except InvalidIdToken as e:
+            raise HTTPException(status_code=401, detail=f"Invalid ID token: {e}")
+        # The client sends it back with its next message to continue the conversation
+        headers = {"X-Session-Id": session_id}
+
+        # Clients asking for NDJSON or SSE get typed events, the others plain text
+        accept = request.headers.get('Accept', '')
+        for media_type in (NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE):
+            if media_type in accept:
+                event_stream = await request.app.state.finn.process_message_events(message, session_id, user_id, id_token=id_token)
+                return StreamingResponse(
+                    encode_events(event_stream(), media_type),
+                    media_type=media_type,
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **headers}
+                )
         
         # DO NOT AWAIT HERE!
-        event_stream = await finn_chat(message, history, session_id, user_id, id_token=id_token)
+        event_stream = await request.app.state.finn.process_message(message, history, session_id, user_id, id_token=id_token)
         # event_stream is an async generator function, so call it to get the generator
-        return StreamingResponse(event_stream(), media_type="text/plain")
+        return StreamingResponse(event_stream(), media_type="text/plain", headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
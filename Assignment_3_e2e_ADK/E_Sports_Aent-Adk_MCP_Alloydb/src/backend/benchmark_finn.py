@@ -0,0 +1,120 @@
+"""
+Benchmark of the per-message setup of the Finn agent.
+
+1. Setup: compares building a session service, toolset, agent and runner and
+   loading the toolbox tools for every message (the previous behaviour) with
+   the long-lived FinnRuntime, which reuses them.
+2. Multi-turn: sends several messages in one session through the runtime and
+   shows that the session history grows from turn to turn.
+
+Needs the toolbox server (TOOLBOX_URL) and, for the multi-turn part, Vertex AI.
+
+Usage:
+    python benchmark_finn.py --iterations 20
+    python benchmark_finn.py --id-token "Bearer ..." --skip-chat
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from google.adk.agents import Agent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.toolbox_toolset import ToolboxToolset
+
+from finn_agent import (
+    APP_NAME,
+    TOOLBOX_URL,
+    TOOLSET_NAME,
+    FinnRuntime,
+    current_id_token,
+    get_auth_token,
+    llm,
+    prompt,
+)
+
+
+async def per_message_setup():
+    """What every message paid before: new services, toolset and tool discovery."""
+    session_service = InMemorySessionService()
+    toolbox = ToolboxToolset(
+        server_url=TOOLBOX_URL,
+        toolset_name=TOOLSET_NAME,
+        auth_token_getters={"google_signin": get_auth_token},
+    )
+    agent = Agent(name="finn", model=llm, instruction=prompt, tools=[toolbox])
+    Runner(app_name=APP_NAME, agent=agent, session_service=session_service)
+    await toolbox.get_tools()
+    result = toolbox._toolbox_client.close()
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def shared_runtime_setup(runtime: FinnRuntime, user_id: str):
+    """What every message pays now: a session lookup and the cached tools."""
+    await runtime.ensure_session(str(uuid.uuid4()), user_id)
+    await runtime.toolbox.get_tools()
+
+
+async def time_calls(make_call, iterations: int) -> list:
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await make_call()
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def report(name: str, durations: list):
+    print(
+        f"{name:<28} mean {statistics.mean(durations):8.2f} ms   "
+        f"p50 {statistics.median(durations):8.2f} ms   max {max(durations):8.2f} ms"
+    )
+
+
+async def multi_turn(runtime: FinnRuntime, messages: list, id_token: str):
+    session_id = str(uuid.uuid4())
+    user_id = "benchmark-user"
+    for turn, message in enumerate(messages, start=1):
+        started = time.perf_counter()
+        event_stream = await runtime.process_message(message, [], session_id, user_id, id_token=id_token)
+        reply = "".join([text async for text in event_stream()])
+        elapsed = time.perf_counter() - started
+        session = await runtime.session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        print(f"turn {turn}: {elapsed:6.2f} s, {len(session.events):3} events in session, reply: {reply[:60]!r}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--id-token", default=None)
+    parser.add_argument("--skip-chat", action="store_true")
+    parser.add_argument(
+        "--messages",
+        nargs="+",
+        default=["Hi, my user id is 1. Show me Nike products.", "What is my user id?"],
+    )
+    args = parser.parse_args()
+
+    current_id_token.set(args.id_token)
+    runtime = FinnRuntime()
+    await runtime.start()
+    try:
+        report("per-message setup (before)", await time_calls(per_message_setup, args.iterations))
+        report(
+            "shared runtime (now)",
+            await time_calls(lambda: shared_runtime_setup(runtime, "benchmark-user"), args.iterations),
+        )
+        if not args.skip_chat:
+            await multi_turn(runtime, args.messages, args.id_token)
+    finally:
+        await runtime.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
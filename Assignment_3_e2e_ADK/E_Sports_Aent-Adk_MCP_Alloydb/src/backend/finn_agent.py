@@ -1,6 +1,7 @@
 from google.adk import Agent
 from google.cloud import aiplatform
 from google.adk.agents import Agent
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
@@ -14,21 +15,51 @@ from langchain_google_vertexai import ChatVertexAI
 import os
 import vertexai
 from google.adk.models import Gemini
+from tool_cache import ToolResultCache
 
 import re
+import json
 import logging
 import asyncio
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
 
 load_dotenv()
 
 # --- Global Configuration (Read from Environment Variables) ---
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
+TOOLBOX_URL = os.getenv("TOOLBOX_URL", "https://toolbox-535807247199.us-central1.run.app")
+TOOLSET_NAME = os.getenv("TOOLSET_NAME", "my-toolset")
+# How long the tool definitions loaded from the toolbox server are reused
+TOOLBOX_TOOLS_TTL_SECONDS = float(os.getenv("TOOLBOX_TOOLS_TTL_SECONDS", "300"))
+# Reuse results of read-only toolbox queries, see tool_cache.py for the TTL per tool
+TOOL_RESULT_CACHE_ENABLED = os.getenv("TOOL_RESULT_CACHE_ENABLED", "true").lower() == "true"
+TOOL_RESULT_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_RESULT_CACHE_MAX_ENTRIES", "1024"))
+# In-memory sessions idle for longer than this are deleted, as are the least
+# recently used ones beyond SESSION_MAX_ENTRIES
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "1000"))
+# OAuth client of the frontend's Google Sign-In, the audience of its ID tokens
+GOOGLE_CLIENT_ID = os.getenv(
+    "GOOGLE_CLIENT_ID", "316231368980-kiq70m8c1ijbbp8f9a6nis46maq6vhpi.apps.googleusercontent.com"
+)
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+APP_NAME = "finn"
+
+# ID token of the request being processed, read by the toolbox auth token getter.
+# Set per request, so one toolset can be shared by all requests.
+current_id_token: ContextVar[Optional[str]] = ContextVar("current_id_token", default=None)
+# Whether the client of the request renders the tool results itself (structured event stream)
+current_structured_output: ContextVar[bool] = ContextVar("current_structured_output", default=False)
 
 logger = logging.getLogger(__name__)
 
 # Define your prompt here
-prompt = """
+behavior_prompt = """
 You're Finn, an AI Sport shopping assistant for GenAI Sports. You help customers find sports products, gear, and equipment.
 
 ---
@@ -40,7 +71,9 @@ IMPORTANT BEHAVIOR RULES:
 - Keep responses concise but informative
 
 ---
+"""
 
+formatting_prompt = """
 CRITICAL FORMATTING RULES:
 1. When searching for products and listing products, you MUST format the response EXACTLY like this with proper line breaks:
 
@@ -161,14 +194,23 @@ Deliver Method:
 • Brand: [brand]
 • Category: [category]
 • Number of Products: [number_of_products]
+"""
+
+# For clients of the structured event stream, which render the tool results themselves
+structured_results_prompt = """
+DISPLAY RULES:
+- The app shows the results of your tool calls to the user as product cards, maps, lists and tables
+- DO NOT repeat the rows of a tool result (products, stores, shopping lists, orders, delivery methods) in your response
+- Answer with one or two short sentences, e.g. introduce the results, point out the best match or ask a follow-up question
+"""
 
+memory_prompt = """
 If you know the user's user_id from previous turns, always use it for tool calls, even if the user doesn't repeat it.
 
 """
 
-# Initialize the agent, session service, artifact service, and runner ONCE
-session_service = InMemorySessionService()
-artifacts_service = InMemoryArtifactService()
+prompt = behavior_prompt + formatting_prompt + memory_prompt
+structured_prompt = behavior_prompt + structured_results_prompt + memory_prompt
 
 vertexai.init(project=PROJECT_ID, location=LOCATION)
 
@@ -179,50 +221,287 @@ async def header_retriever(request: Request):
     id_token = request.headers.get('Authorization')
     return {"Authorization": id_token} if id_token else {}
 
-async def process_message(message: str, history: list, session_id: str, user_id: str, id_token: str = None):
-    async def get_auth_token():
-        print("[DEBUG] get_auth_token called. id_token:", id_token)
-        if id_token and id_token.startswith("Bearer "):
-            return id_token[len("Bearer "):]
-        return id_token if id_token else ""
-
-    # Create session service per request (or use a shared one if you know it's safe)
-    session_service = InMemorySessionService()
-
-    toolbox = ToolboxToolset(
-        server_url="https://toolbox-535807247199.us-central1.run.app",
-        toolset_name="my-toolset",
-        auth_token_getters={"google_signin": get_auth_token}
-    )
-    agent = Agent(
-        name="finn",
-        model=llm,
-        instruction=prompt,
-        tools=[toolbox]
-    )
-    runner = Runner(
-        app_name="finn",
-        agent=agent,
-        session_service=session_service
-    )
-
-    # Ensure session exists
-    session = session_service.sessions.get(session_id)
-    if session is None:
-        session = await session_service.create_session(
-            state={}, app_name='finn', user_id=user_id, session_id=session_id
-        )
+def finn_instruction(context) -> str:
+    """Instruction of the agent, without the text formats for clients that render the tool results"""
+    return structured_prompt if current_structured_output.get() else prompt
+
+async def get_auth_token():
+    """Return the ID token of the current request for the toolbox, without the Bearer prefix"""
+    id_token = current_id_token.get()
+    if id_token and id_token.startswith("Bearer "):
+        return id_token[len("Bearer "):]
+    return id_token if id_token else ""
+
+
+class InvalidIdToken(Exception):
+    """Raised when the ID token of a request cannot be verified."""
+
+
+# Google's signing keys, fetched on first use and cached by the client
+_google_keys = jwt.PyJWKClient(GOOGLE_CERTS_URL, cache_keys=True)
+
+
+def _verify_id_token(id_token: str) -> dict:
+    token = id_token[len("Bearer "):] if id_token.startswith("Bearer ") else id_token
+    try:
+        key = _google_keys.get_signing_key_from_jwt(token).key
+        claims = jwt.decode(token, key, algorithms=["RS256"], audience=GOOGLE_CLIENT_ID)
+    except jwt.PyJWTError as e:
+        raise InvalidIdToken(str(e))
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        raise InvalidIdToken(f"Unexpected issuer {claims.get('iss')}")
+    return claims
+
 
-    content = types.Content(role='user', parts=[types.Part(text=message)])
+async def user_id_from_token(id_token: Optional[str], session_id: str) -> str:
+    """User of a request: the subject of its verified Google ID token.
 
-    # This is the async generator!
-    async def event_stream():
-        async for event in runner.run_async(session_id=session_id, user_id=user_id, new_message=content):
-            for part in event.content.parts:
-                if part.text is not None:
-                    yield part.text
+    Requests without a token are anonymous, with a user of their own per session.
 
-    return event_stream  # Return the async generator function itself
+    Raises:
+        InvalidIdToken: If the token is present but not a valid Google ID token for this app
+    """
+    if not id_token:
+        return f"anonymous-{session_id}"
+    # Fetching the signing keys blocks, so the check runs off the event loop
+    claims = await asyncio.to_thread(_verify_id_token, id_token)
+    return f"google-{claims['sub']}"
+
+
+class CachedToolboxToolset(ToolboxToolset):
+    """ToolboxToolset that loads the tool definitions once instead of on every model call.
+
+    The loaded tools read the auth token through get_auth_token at call time,
+    so they can be shared by all requests. With a result cache, the calls of
+    the tools go through it.
+    """
+
+    def __init__(
+        self,
+        *args,
+        tools_ttl_seconds: float = TOOLBOX_TOOLS_TTL_SECONDS,
+        result_cache: Optional[ToolResultCache] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.tools_ttl_seconds = tools_ttl_seconds
+        self.result_cache = result_cache
+        self._tools = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_tools(self, readonly_context=None):
+        async with self._lock:
+            if self._tools is None or time.monotonic() - self._loaded_at > self.tools_ttl_seconds:
+                tools = await super().get_tools(readonly_context)
+                if self.result_cache is not None:
+                    for tool in tools:
+                        tool.func = self.result_cache.wrap(tool.name, tool.func)
+                self._tools = tools
+                self._loaded_at = time.monotonic()
+            return self._tools
+
+    async def close(self):
+        result = self._toolbox_client.close()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+class FinnRuntime:
+    """Session service, toolset, agent and runner shared by all chat requests of a process."""
+
+    def __init__(
+        self,
+        toolbox_url: str = TOOLBOX_URL,
+        toolset_name: str = TOOLSET_NAME,
+        session_ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_sessions: int = SESSION_MAX_ENTRIES
+    ):
+        self.session_service = InMemorySessionService()
+        self.session_ttl_seconds = session_ttl_seconds
+        self.max_sessions = max_sessions
+        # (user_id, session_id) of the sessions, least recently used first, with the time of last use
+        self._session_last_used: "OrderedDict[tuple, float]" = OrderedDict()
+        self.artifacts_service = InMemoryArtifactService()
+        self.tool_cache = None
+        if TOOL_RESULT_CACHE_ENABLED:
+            self.tool_cache = ToolResultCache(
+                scope_getter=current_id_token.get,
+                max_entries=TOOL_RESULT_CACHE_MAX_ENTRIES
+            )
+        self.toolbox = CachedToolboxToolset(
+            server_url=toolbox_url,
+            toolset_name=toolset_name,
+            auth_token_getters={"google_signin": get_auth_token},
+            result_cache=self.tool_cache
+        )
+        self.agent = Agent(
+            name="finn",
+            model=llm,
+            instruction=finn_instruction,
+            tools=[self.toolbox]
+        )
+        self.runner = Runner(
+            app_name=APP_NAME,
+            agent=self.agent,
+            session_service=self.session_service,
+            artifact_service=self.artifacts_service
+        )
+
+    async def start(self):
+        """Load the tool definitions up front, so the first message does not wait for them"""
+        try:
+            await self.toolbox.get_tools()
+        except Exception as e:
+            logger.warning(f"Could not load toolbox tools at startup: {e}")
+
+    async def close(self):
+        await self.toolbox.close()
+
+    async def evict_sessions(self):
+        """Delete the sessions idle for longer than the TTL and the least recently used beyond the limit"""
+        expired_before = time.monotonic() - self.session_ttl_seconds
+        evicted = []
+        while self._session_last_used:
+            key, last_used = next(iter(self._session_last_used.items()))
+            if last_used >= expired_before and len(self._session_last_used) <= self.max_sessions:
+                break
+            del self._session_last_used[key]
+            evicted.append(key)
+        for user_id, session_id in evicted:
+            await self.session_service.delete_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} sessions")
+
+    async def ensure_session(self, session_id: str, user_id: str):
+        key = (user_id, session_id)
+        self._session_last_used[key] = time.monotonic()
+        self._session_last_used.move_to_end(key)
+        await self.evict_sessions()
+
+        session = await self.session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            session = await self.session_service.create_session(
+                state={}, app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+        return session
+
+    async def process_message(self, message: str, history: list, session_id: str, user_id: str, id_token: str = None):
+        # Ensure session exists, earlier turns of the session are kept
+        await self.ensure_session(session_id, user_id)
+
+        content = types.Content(role='user', parts=[types.Part(text=message)])
+
+        # This is the async generator!
+        async def event_stream():
+            # Set in the generator, which runs in the context of the streaming response
+            token = current_id_token.set(id_token)
+            try:
+                async for event in self.runner.run_async(session_id=session_id, user_id=user_id, new_message=content):
+                    if not event.content or not event.content.parts:
+                        continue
+                    for part in event.content.parts:
+                        if part.text is not None:
+                            yield part.text
+            finally:
+                current_id_token.reset(token)
+
+        return event_stream  # Return the async generator function itself
+
+    async def process_message_events(self, message: str, session_id: str, user_id: str, id_token: str = None):
+        """Like process_message, but the generator yields typed events instead of plain text.
+
+        Events are dicts with a "type":
+        - "text": a delta of the response text, streamed as the model writes it
+        - "tool_call": id, name and arguments of a tool call
+        - "tool_result": id, name and the raw rows of the tool (or its result if
+          it is not a list of rows)
+        - "error": the message of an error that ended the run
+        - "done": the end of the response, with the session id for the next message
+
+        The agent is told that the client renders the tool results, so it does not
+        repeat them in its text.
+        """
+        await self.ensure_session(session_id, user_id)
+
+        content = types.Content(role='user', parts=[types.Part(text=message)])
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+
+        async def event_stream():
+            token = current_id_token.set(id_token)
+            structured = current_structured_output.set(True)
+            try:
+                # With SSE streaming the text arrives in partial events, followed by
+                # an event with the whole text, which is not sent again
+                streamed_text = False
+                async for event in self.runner.run_async(
+                    session_id=session_id, user_id=user_id, new_message=content, run_config=run_config
+                ):
+                    for chat_event in chat_events(event, skip_text=streamed_text and not event.partial):
+                        yield chat_event
+                    streamed_text = bool(event.partial)
+                yield {"type": "done", "session_id": session_id}
+            except Exception as e:
+                logger.error(f"Error while processing message: {e}")
+                yield {"type": "error", "message": str(e)}
+            finally:
+                current_structured_output.reset(structured)
+                current_id_token.reset(token)
+
+        return event_stream
+
+
+def tool_result_rows(response):
+    """Rows of a toolbox tool result, None if the result is not a list of rows.
+
+    The toolbox returns the rows as JSON text, which the function tool wraps in
+    {"result": ...}. A query without rows returns null.
+    """
+    result = response.get("result", response) if isinstance(response, dict) else response
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return None
+    if result is None:
+        return []
+    if isinstance(result, list) and all(isinstance(row, dict) for row in result):
+        return result
+    return None
+
+
+def chat_events(event, skip_text: bool = False) -> list:
+    """Typed chat events of a runner event, see FinnRuntime.process_message_events"""
+    chat_events = []
+    if not event.content or not event.content.parts:
+        return chat_events
+    for part in event.content.parts:
+        if part.text and not part.thought and not skip_text:
+            chat_events.append({"type": "text", "text": part.text})
+        elif part.function_call:
+            chat_events.append({
+                "type": "tool_call",
+                "id": part.function_call.id,
+                "name": part.function_call.name,
+                "args": part.function_call.args or {}
+            })
+        elif part.function_response:
+            rows = tool_result_rows(part.function_response.response)
+            chat_event = {
+                "type": "tool_result",
+                "id": part.function_response.id,
+                "name": part.function_response.name
+            }
+            if rows is None:
+                chat_event["result"] = part.function_response.response
+            else:
+                chat_event["rows"] = rows
+            chat_events.append(chat_event)
+    return chat_events
 
 def get_current_user_id(session):
     """
@@ -0,0 +1,192 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds the result of a read-only tool is reused. Catalog tools do not depend on
+# the user, so their results are shared by all users; the other tools are cached
+# per user (auth token) and invalidated by that user's writes.
+TOOL_CACHE_TTL_SECONDS = {
+    "search-products-by-description": 600,
+    "search-products-by-description-filtered": 600,
+    "search-products-by-brand": 600,
+    "search-products-hybrid": 600,
+    "search-product-by-size": 600,
+    "tell-more-details-about-product": 600,
+    "list-delivery-methods-by-store": 3600,
+    "show-shopping-list": 60,
+    "check-order-status-by-user": 60,
+}
+SHARED_TOOLS = {
+    "search-products-by-description",
+    "search-products-by-description-filtered",
+    "search-products-by-brand",
+    "search-products-hybrid",
+    "search-product-by-size",
+    "tell-more-details-about-product",
+    "list-delivery-methods-by-store",
+}
+# Cached tools whose results a write tool may change
+TOOL_CACHE_INVALIDATIONS = {
+    "add-product-to-shopping-list": ["show-shopping-list"],
+    "place-order": ["show-shopping-list", "check-order-status-by-user"],
+    "cancel-order-by-user": ["check-order-status-by-user"],
+    "update-order-delivery-method": ["check-order-status-by-user"],
+}
+
+
+def normalize_argument(value):
+    """Case and whitespace insensitive form of a string argument, used in cache keys.
+
+    The catalog queries compare names case-insensitively (LOWER, full-text
+    search), so "Nike" and " nike" return the same rows.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+class ToolResultCache:
+    """TTL cache of toolbox tool results keyed by tool name and arguments.
+
+    Concurrent calls with the same key share one toolbox request, which runs in
+    a task of its own: cancelling any of the callers, the first one included,
+    does not cancel it for the others. Results of write tools are never cached;
+    a successful write drops the cached results of the tools listed in its
+    invalidations, and a fetch of those tools still in flight answers its
+    callers but does not cache its possibly outdated result.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Dict[str, float] = TOOL_CACHE_TTL_SECONDS,
+        invalidations: Dict[str, Iterable[str]] = TOOL_CACHE_INVALIDATIONS,
+        shared_tools: Iterable[str] = SHARED_TOOLS,
+        scope_getter: Callable[[], Optional[str]] = lambda: None,
+        max_entries: int = 1024,
+    ):
+        self.ttl_seconds = dict(ttl_seconds)
+        self.invalidations = {name: set(tools) for name, tools in invalidations.items()}
+        self.shared_tools = set(shared_tools)
+        self.scope_getter = scope_getter
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        # Invalidation count and running fetches per (tool, scope), only kept
+        # while fetches of that tool and scope are running
+        self._generations: Dict[tuple, int] = {}
+        self._running: Dict[tuple, int] = {}
+
+    def _scope(self, tool_name: str) -> Optional[str]:
+        if tool_name in self.shared_tools:
+            return None
+        token = self.scope_getter() or ""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _key(self, tool_name: str, kwargs: dict) -> tuple:
+        arguments = json.dumps(
+            {name: normalize_argument(value) for name, value in kwargs.items()},
+            sort_keys=True,
+            default=str,
+        )
+        return (tool_name, self._scope(tool_name), arguments)
+
+    def _get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: tuple, result):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds[key[0]], result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, tool_names: Iterable[str], scope: Optional[str] = None):
+        """Drop the cached results of the tools, only those of one scope if given."""
+        tool_names = set(tool_names)
+
+        def matches(key: tuple) -> bool:
+            return key[0] in tool_names and (scope is None or key[1] in (scope, None))
+
+        for key in [key for key in self._entries if matches(key)]:
+            del self._entries[key]
+        # New callers start a fresh fetch instead of joining one that may have
+        # read the data before the write
+        for key in [key for key in self._inflight if matches(key)]:
+            del self._inflight[key]
+            self._generations[key[:2]] += 1
+
+    async def call(self, tool_name: str, func: Callable, **kwargs):
+        """Call a tool, answering read-only tools from the cache when possible."""
+        if tool_name not in self.ttl_seconds:
+            result = await func(**kwargs)
+            affected = self.invalidations.get(tool_name)
+            if affected:
+                self.invalidate(affected, scope=self._scope(tool_name))
+            return result
+
+        key = self._key(tool_name, kwargs)
+        entry = self._get(key)
+        if entry is not None:
+            self.hits += 1
+            logger.debug(f"Tool cache hit for {tool_name}")
+            return entry[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            group = key[:2]
+            generation = self._generations.setdefault(group, 0)
+            self._running[group] = self._running.get(group, 0) + 1
+            # The task runs in a copy of the caller's context, auth token included
+            inflight = asyncio.get_running_loop().create_task(
+                self._fetch(key, func, kwargs, generation)
+            )
+            inflight.add_done_callback(functools.partial(self._fetch_done, group))
+            self._inflight[key] = inflight
+        return await asyncio.shield(inflight)
+
+    async def _fetch(self, key: tuple, func: Callable, kwargs: dict, generation: int):
+        try:
+            result = await func(**kwargs)
+            if self._generations[key[:2]] == generation:
+                self._put(key, result)
+            return result
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def _fetch_done(self, group: tuple, task: asyncio.Task):
+        self._running[group] -= 1
+        if not self._running[group]:
+            del self._running[group]
+            del self._generations[group]
+        # Only waiting callers should see an error, not the event loop
+        if not task.cancelled():
+            task.exception()
+
+    def wrap(self, tool_name: str, func: Callable) -> Callable:
+        """Wrap a tool callable, keeping its signature for the function declaration."""
+
+        @functools.wraps(func)
+        async def cached_tool(**kwargs):
+            return await self.call(tool_name, func, **kwargs)
+
+        return cached_tool
@@ -0,0 +1,151 @@
+import React from 'react';
+import StoreMap from '../StoreMap';
+
+// Renders the rows of "tool_result" events of the /chat event stream, so the
+// assistant does not have to repeat them as formatted text.
+
+const isStoreRows = (rows) =>
+  rows.some(row => row.kind === 'store' && row.latitude != null && row.longitude != null);
+
+const isProductRows = (rows) =>
+  rows.every(row => typeof row.name === 'string' && 'description' in row);
+
+// Tools that aggregate their rows into one preformatted text column
+const textColumn = (rows) => {
+  const values = rows.flatMap(row => Object.values(row));
+  return rows.length === 1 && values.length === 1 && typeof values[0] === 'string' ? values[0] : null;
+};
+
+const ProductCards = ({ rows, backendUrl, onImageClick }) => (
+  <div style={{ display: 'flex', flexDirection: 'column', gap: '24px' }}>
+    {rows.map((product, index) => {
+      const imageUrl = `${backendUrl}/images/${encodeURIComponent(product.name)}.png`;
+      const minPrice = product.price ?? product.min_price;
+      const maxPrice = product.max_price ?? minPrice;
+      const price = Number(maxPrice) > Number(minPrice)
+        ? `€${Number(minPrice).toFixed(2)} – €${Number(maxPrice).toFixed(2)}`
+        : `€${Number(minPrice).toFixed(2)}`;
+      return (
+        <div key={index} style={{
+          display: 'flex',
+          alignItems: 'flex-start',
+          gap: '32px',
+          backgroundColor: 'white',
+          padding: '24px',
+          borderRadius: '8px',
+          border: '1px solid #eee'
+        }}>
+          <img
+            src={imageUrl}
+            alt={product.name}
+            onClick={() => onImageClick(imageUrl)}
+            style={{
+              width: '300px',
+              height: '300px',
+              objectFit: 'contain',
+              cursor: 'pointer',
+              backgroundColor: 'white',
+              borderRadius: '4px',
+              padding: '8px'
+            }}
+          />
+          <div style={{ flex: 1, display: 'flex', flexDirection: 'column', gap: '16px' }}>
+            <div style={{ fontSize: '28px', fontWeight: '600', color: '#111827' }}>
+              {product.name}
+            </div>
+            {(product.brand || product.category) && (
+              <div style={{ fontSize: '20px', color: '#6b7280' }}>
+                {[product.brand, product.category].filter(Boolean).join(' · ')}
+              </div>
+            )}
+            {product.description && (
+              <div style={{ fontSize: '20px', lineHeight: '1.5', color: '#4b5563' }}>
+                {product.description}
+              </div>
+            )}
+            {minPrice != null && (
+              <div style={{ fontSize: '22px', fontWeight: '600', color: '#2563eb' }}>
+                {price}
+              </div>
+            )}
+          </div>
+        </div>
+      );
+    })}
+  </div>
+);
+
+const StoreRows = ({ rows }) => {
+  const user = rows.find(row => row.kind === 'user');
+  const stores = rows
+    .filter(row => row.kind === 'store')
+    .map(row => ({
+      name: row.name,
+      distance: Number(row.distance_meters),
+      latitude: Number(row.latitude),
+      longitude: Number(row.longitude)
+    }));
+  return (
+    <div className="map-container" style={{ height: '400px', width: '100%', margin: '10px 0' }}>
+      <StoreMap
+        stores={stores}
+        userLocation={user ? { lat: Number(user.latitude), lng: Number(user.longitude) } : undefined}
+      />
+    </div>
+  );
+};
+
+const RowTable = ({ rows }) => (
+  <div style={{ display: 'flex', flexDirection: 'column', gap: '12px' }}>
+    {rows.map((row, index) => (
+      <div key={index} style={{
+        backgroundColor: 'white',
+        padding: '16px',
+        borderRadius: '8px',
+        border: '1px solid #eee',
+        fontSize: '20px'
+      }}>
+        {Object.entries(row).map(([key, value]) => (
+          <div key={key}>
+            <span style={{ fontWeight: '600' }}>{key}: </span>
+            {value == null ? '' : String(value)}
+          </div>
+        ))}
+      </div>
+    ))}
+  </div>
+);
+
+const ToolResult = ({ result, backendUrl, onImageClick }) => {
+  const rows = result.rows;
+  // No rows, or a result that is not a list of rows (e.g. an error of the tool)
+  if (!rows || rows.length === 0) {
+    return null;
+  }
+  if (isStoreRows(rows)) {
+    return <StoreRows rows={rows} />;
+  }
+  if (isProductRows(rows)) {
+    return <ProductCards rows={rows} backendUrl={backendUrl} onImageClick={onImageClick} />;
+  }
+  const text = textColumn(rows);
+  if (text !== null) {
+    return <div style={{ whiteSpace: 'pre-line' }}>{text}</div>;
+  }
+  return <RowTable rows={rows} />;
+};
+
+const ToolResults = ({ results, backendUrl, onImageClick }) => (
+  <div style={{ display: 'flex', flexDirection: 'column', gap: '16px', marginTop: '12px' }}>
+    {results.map((result, index) => (
+      <ToolResult
+        key={result.id || index}
+        result={result}
+        backendUrl={backendUrl}
+        onImageClick={onImageClick}
+      />
+    ))}
+  </div>
+);
+
+export default ToolResults;
@@ -4,6 +4,7 @@ import { MapContainer, TileLayer, Marker, Popup } from 'react-leaflet';
 import 'leaflet/dist/leaflet.css';
 import L from 'leaflet';
 import StoreMap from '../components/StoreMap';
+import ToolResults from '../components/chat/ToolResults';
 
 const BACKEND_URL = ' https://finn-agent-535807247199.us-central1.run.app';
 
@@ -63,6 +64,7 @@ const Home = ({ idToken, setIdToken }) => {
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [selectedImage, setSelectedImage] = useState(null);
+  const [sessionId, setSessionId] = useState(null);
 
   // Add a ref for the messages container
   const messagesEndRef = useRef(null);
@@ -247,15 +249,18 @@ const Home = ({ idToken, setIdToken }) => {
     setIsLoading(true);
 
     try {
+      // Ask for the typed event stream: text deltas, tool calls and tool results
       const response = await fetch(`${BACKEND_URL}/chat`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Accept': 'application/x-ndjson',
           'Authorization': `Bearer ${idToken}`
         },
         body: JSON.stringify({
           message: userMessage.content,
-          history: messages
+          session_id: sessionId,
+          history: messages.map(({ role, content }) => ({ role, content }))
         })
       });
 
@@ -263,18 +268,40 @@ const Home = ({ idToken, setIdToken }) => {
         throw new Error('Network response was not ok');
       }
 
+      // One assistant message, updated in place as the events arrive
+      const assistantMessage = { role: 'assistant', content: '', results: [] };
+      setMessages(prev => [...prev, assistantMessage]);
+      const updateAssistantMessage = (changes) => {
+        Object.assign(assistantMessage, changes);
+        setMessages(prev => [...prev.slice(0, -1), { ...assistantMessage }]);
+      };
+
+      const handleEvent = (event) => {
+        if (event.type === 'text') {
+          updateAssistantMessage({ content: assistantMessage.content + event.text });
+        } else if (event.type === 'tool_result') {
+          updateAssistantMessage({ results: [...assistantMessage.results, event] });
+        } else if (event.type === 'error') {
+          throw new Error(event.message);
+        } else if (event.type === 'done') {
+          setSessionId(event.session_id);
+        }
+      };
+
       const reader = response.body.getReader();
-      let aiText = "";
       const decoder = new TextDecoder();
+      let buffer = "";
 
       while (true) {
         const { value, done } = await reader.read();
         if (done) break;
-        aiText += decoder.decode(value, { stream: true });
-        setMessages(prev => [...prev, {
-          role: 'assistant',
-          content: aiText
-        }]);
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
       }
     } catch (error) {
       console.error('Error:', error);
@@ -1471,6 +1498,13 @@ const Home = ({ idToken, setIdToken }) => {
                             return <div>Error displaying message</div>;
                           }
                         })()}
+                        {message.results?.length > 0 && (
+                          <ToolResults
+                            results={message.results}
+                            backendUrl={BACKEND_URL}
+                            onImageClick={setSelectedImage}
+                          />
+                        )}
                       </div>
                     )}
                   </div>
@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import hmac
+import io
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from google.adk.artifacts import BaseArtifactService
+from PIL import Image, ImageOps
+from settings import get_settings
+import logger
+
+SETTINGS = get_settings()
+
+# Without a configured secret, URLs are only valid for this process
+URL_SECRET = (SETTINGS.ATTACHMENT_URL_SECRET or secrets.token_hex(32)).encode("utf-8")
+if SETTINGS.ATTACHMENT_DELIVERY == "url" and not SETTINGS.ATTACHMENT_URL_SECRET:
+    logger.warning(
+        "ATTACHMENT_URL_SECRET is not set, signed attachment URLs stop working "
+        "when the backend restarts"
+    )
+
+
+class AttachmentCache:
+    """LRU cache of image bytes, bounded by total size.
+
+    Entries are keyed by the artifact they were loaded from or stored as,
+    (app_name, user_id, session_id, image hash ID), so an image is only served
+    to callers that can load that artifact themselves. Image IDs are SHA-256
+    prefixes of the image bytes, so a cached entry never goes stale.
+
+    Attributes:
+        max_bytes: Maximum total size of the cached images.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str, str], Tuple[bytes, str]]" = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str, str]) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[str, str, str, str], data: bytes, mime_type: str) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (data, mime_type)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+ATTACHMENT_CACHE = AttachmentCache(SETTINGS.ATTACHMENT_CACHE_MAX_BYTES)
+
+
+class KnownArtifacts:
+    """Bounded set of artifacts known to exist in the artifact service.
+
+    Lets uploads skip the existence check (a GCS list call) for images this
+    process has already stored or seen. An exact set is used rather than a
+    probabilistic filter, as a false positive would silently drop an upload.
+
+    Attributes:
+        max_entries: Maximum number of remembered artifacts.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Tuple[str, str, str, str]) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key: Tuple[str, str, str, str]) -> None:
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+KNOWN_ARTIFACTS = KnownArtifacts(SETTINGS.KNOWN_ARTIFACTS_MAX_ENTRIES)
+
+
+def prepare_image(image_data: bytes, mime_type: str) -> Tuple[bytes, str]:
+    """
+    Downscale and recompress an uploaded image as configured.
+
+    Images whose longest side exceeds IMAGE_MAX_DIMENSION are resized and
+    re-encoded as JPEG (PNG if they have transparency). Smaller images, and
+    all images when IMAGE_MAX_DIMENSION is 0, are returned unchanged, as is
+    a re-encoding that would not be smaller than the original.
+
+    Args:
+        image_data: The original image bytes
+        mime_type: The MIME type of the original image
+
+    Returns:
+        tuple[bytes, str]: The image bytes and MIME type to store and send to the model
+    """
+    max_dimension = SETTINGS.IMAGE_MAX_DIMENSION
+    if max_dimension <= 0:
+        return image_data, mime_type
+
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            if max(image.size) <= max_dimension:
+                return image_data, mime_type
+
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            has_alpha = image.mode in ("RGBA", "LA") or (
+                image.mode == "P" and "transparency" in image.info
+            )
+            if has_alpha:
+                image.save(output, format="PNG", optimize=True)
+                prepared = output.getvalue(), "image/png"
+            else:
+                image.convert("RGB").save(
+                    output,
+                    format="JPEG",
+                    quality=SETTINGS.IMAGE_JPEG_QUALITY,
+                    optimize=True,
+                )
+                prepared = output.getvalue(), "image/jpeg"
+    except Exception as e:
+        logger.error(f"Error downscaling uploaded image, keeping original: {e}")
+        return image_data, mime_type
+
+    if len(prepared[0]) >= len(image_data):
+        return image_data, mime_type
+    return prepared
+
+
+async def load_image_bytes(
+    artifact_service: BaseArtifactService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    image_hash: str,
+) -> Optional[Tuple[bytes, str]]:
+    """
+    Load an image artifact, served from the local cache when possible.
+
+    Args:
+        artifact_service: The artifact service to load artifacts from
+        app_name: The name of the application
+        user_id: The ID of the user
+        session_id: The ID of the session
+        image_hash: The hash identifier of the image
+
+    Returns:
+        tuple[bytes, str] | None: The image bytes and MIME type, or None if loading fails
+    """
+    artifact_key = (app_name, user_id, session_id, image_hash)
+    cached = ATTACHMENT_CACHE.get(artifact_key)
+    if cached is not None:
+        return cached
+
+    try:
+        artifact = await artifact_service.load_artifact(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            filename=image_hash,
+        )
+        if not artifact or not artifact.inline_data:
+            logger.info(f"Image {image_hash} does not exist in GCS Artifact Service")
+            return None
+
+        image_data = artifact.inline_data.data
+        mime_type = artifact.inline_data.mime_type
+        ATTACHMENT_CACHE.put(artifact_key, image_data, mime_type)
+        logger.info(f"Downloaded image {image_hash} with type {mime_type}")
+
+        return image_data, mime_type
+    except Exception as e:
+        logger.error(f"Error downloading image from GCS: {e}")
+        return None
+
+
+async def load_images(
+    artifact_service: BaseArtifactService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    image_hashes: Iterable[str],
+    max_concurrency: int,
+) -> List[Tuple[str, Optional[Tuple[bytes, str]]]]:
+    """
+    Load several image artifacts concurrently, at most max_concurrency at a time.
+
+    Returns:
+        list[tuple[str, tuple[bytes, str] | None]]: (image hash, result of
+            load_image_bytes) pairs for the unique hashes, in the given order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def load(image_hash: str) -> Optional[Tuple[bytes, str]]:
+        async with semaphore:
+            return await load_image_bytes(
+                artifact_service, app_name, user_id, session_id, image_hash
+            )
+
+    unique_hashes = list(dict.fromkeys(image_hashes))
+    results = await asyncio.gather(*(load(image_hash) for image_hash in unique_hashes))
+    return list(zip(unique_hashes, results))
+
+
+def _signature(image_hash: str, user_id: str, session_id: str, expires: int) -> str:
+    message = f"{image_hash}:{user_id}:{session_id}:{expires}".encode("utf-8")
+    return hmac.new(URL_SECRET, message, hashlib.sha256).hexdigest()
+
+
+def sign_attachment_url(
+    image_hash: str, user_id: str, session_id: str, ttl_seconds: int
+) -> str:
+    """Build a short-lived, signed URL path of the /attachments endpoint for an image."""
+    expires = int(time.time()) + ttl_seconds
+    query = urlencode(
+        {
+            "user_id": user_id,
+            "session_id": session_id,
+            "expires": expires,
+            "signature": _signature(image_hash, user_id, session_id, expires),
+        }
+    )
+    return f"/attachments/{image_hash}?{query}"
+
+
+def verify_attachment_signature(
+    image_hash: str, user_id: str, session_id: str, expires: int, signature: str
+) -> bool:
+    """Check that an attachment URL was signed by this backend and has not expired."""
+    if expires < time.time():
+        return False
+    expected = _signature(image_hash, user_id, session_id, expires)
+    return hmac.compare_digest(expected, signature)
@@ -1,35 +1,70 @@
 from expense_manager_agent.agent import root_agent as expense_manager_agent
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import BaseSessionService, GetSessionConfig
 from google.adk.runners import Runner
 from google.adk.events import Event
-from fastapi import FastAPI, Body, Depends
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.genai import types
+from fastapi import FastAPI, Body, Depends, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from typing import AsyncIterator
 from types import SimpleNamespace
 import uvicorn
 from contextlib import asynccontextmanager
 import asyncio
+import base64
+import binascii
+import time
 from utils import (
     extract_attachment_ids_and_sanitize_response,
-    download_image_from_gcs,
     extract_thinking_process,
     format_user_request_to_adk_content_and_store_artifacts,
+    ResponseSectionStreamer,
 )
-from schema import ImageData, ChatRequest, ChatResponse
+from schema import (
+    ImageData,
+    ChatRequest,
+    ChatResponse,
+    ChatStreamEvent,
+    BulkIngestRequest,
+    BulkIngestResponse,
+)
+from attachments import (
+    load_image_bytes,
+    load_images,
+    sign_attachment_url,
+    verify_attachment_signature,
+)
+from concurrency import UserBusyError, UserConcurrencyLimiter
+from sessions import (
+    create_session_maintenance,
+    create_session_service,
+    run_session_maintenance,
+)
+from expense_manager_agent.embeddings import get_embedding_service
+from expense_manager_agent.executor import TOOL_EXECUTOR
+from expense_manager_agent.ingestion import (
+    ReceiptImage,
+    get_receipt_extractor,
+    ingest_receipts,
+)
+from expense_manager_agent.receipt_store import get_receipt_store
 import logger
 from google.adk.artifacts import GcsArtifactService
 from settings import get_settings
 
 SETTINGS = get_settings()
 APP_NAME = "expense_manager_app"
+DEFAULT_RESPONSE_TEXT = "Agent did not produce a final response."
 
 
 # Application state to hold service contexts
 class AppContexts(SimpleNamespace):
     """A class to hold application contexts with attribute access"""
 
-    session_service: InMemorySessionService = None
+    session_service: BaseSessionService = None
     artifact_service: GcsArtifactService = None
     expense_manager_agent_runner: Runner = None
+    user_limiter: UserConcurrencyLimiter = None
 
 
 # Initialize application state
@@ -39,7 +74,7 @@ app_contexts = AppContexts()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize service contexts during application startup
-    app_contexts.session_service = InMemorySessionService()
+    app_contexts.session_service = create_session_service()
     app_contexts.artifact_service = GcsArtifactService(
         bucket_name=SETTINGS.STORAGE_BUCKET_NAME
     )
@@ -49,11 +84,34 @@ async def lifespan(app: FastAPI):
         session_service=app_contexts.session_service,  # Uses our session manager
         artifact_service=app_contexts.artifact_service,  # Uses our artifact manager
     )
+    app_contexts.user_limiter = UserConcurrencyLimiter(
+        max_concurrent=SETTINGS.MAX_CONCURRENT_REQUESTS_PER_USER,
+        queue_timeout=SETTINGS.USER_QUEUE_TIMEOUT_SECONDS,
+    )
+    # Create the blocking clients up front instead of inside the first tool call
+    await asyncio.to_thread(get_receipt_store)
+    await asyncio.to_thread(get_embedding_service)
+
+    # Evict idle sessions and compact long histories to keep the store bounded
+    maintenance_task = None
+    maintenance = create_session_maintenance(app_contexts.session_service)
+    if maintenance is not None:
+        maintenance_task = asyncio.create_task(
+            run_session_maintenance(
+                maintenance,
+                app_name=APP_NAME,
+                ttl_seconds=SETTINGS.SESSION_TTL_SECONDS,
+                max_events=SETTINGS.SESSION_MAX_EVENTS,
+                interval_seconds=SETTINGS.SESSION_MAINTENANCE_INTERVAL_SECONDS,
+            )
+        )
 
     logger.info("Application started successfully")
     yield
     logger.info("Application shutting down")
-    # Perform cleanup during application shutdown if necessary
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+    TOOL_EXECUTOR.shutdown(wait=False, cancel_futures=True)
 
 
 # Helper function to get application state as a dependency
@@ -71,96 +129,359 @@ async def chat(
     app_context: AppContexts = Depends(get_app_contexts),
 ) -> ChatResponse:
     """Process chat request and get response from the agent"""
+    try:
+        async with app_context.user_limiter.acquire(request.user_id):
+            return await process_chat_request(request, app_context)
+    except UserBusyError as e:
+        logger.warning("Rejected chat request", user_id=request.user_id, reason=str(e))
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+async def prepare_user_content(
+    request: ChatRequest, app_context: AppContexts
+) -> types.Content:
+    """Store uploaded images, make sure the session exists and build the ADK message"""
 
     # Prepare the user's message in ADK format and store image artifacts
-    content = await asyncio.to_thread(
-        format_user_request_to_adk_content_and_store_artifacts,
+    content = await format_user_request_to_adk_content_and_store_artifacts(
         request=request,
         app_name=APP_NAME,
         artifact_service=app_context.artifact_service,
     )
 
-    final_response_text = "Agent did not produce a final response."  # Default
+    # Create session if it doesn't exist, without loading its whole history
+    if not await app_context.session_service.get_session(
+        app_name=APP_NAME,
+        user_id=request.user_id,
+        session_id=request.session_id,
+        config=GetSessionConfig(num_recent_events=1),
+    ):
+        await app_context.session_service.create_session(
+            app_name=APP_NAME, user_id=request.user_id, session_id=request.session_id
+        )
 
-    # Use the session ID from the request or default if not provided
-    session_id = request.session_id
-    user_id = request.user_id
+    return content
 
-    # Create session if it doesn't exist
-    if not app_context.session_service.get_session(
-        app_name=APP_NAME, user_id=user_id, session_id=session_id
-    ):
-        app_context.session_service.create_session(
-            app_name=APP_NAME, user_id=user_id, session_id=session_id
+
+def get_final_response_text(event: Event) -> str:
+    """Get the response text of a final response event"""
+    if event.content and event.content.parts:
+        # Join the text parts, skipping model thoughts
+        return "".join(
+            part.text for part in event.content.parts if part.text and not part.thought
         )
+    if event.actions and event.actions.escalate:
+        # Handle potential errors/escalations
+        return f"Agent escalated: {event.error_message or 'No specific message.'}"
+    return DEFAULT_RESPONSE_TEXT
+
+
+async def build_chat_response(
+    final_response_text: str, request: ChatRequest, app_context: AppContexts
+) -> ChatResponse:
+    """Split the agent's final response into response, thinking process and attachments"""
+    logger.info(
+        "Received final response from agent", raw_final_response=final_response_text
+    )
+
+    # Extract and process any attachments and thinking process in the response
+    attachments = []
+    sanitized_text, attachment_ids = extract_attachment_ids_and_sanitize_response(
+        final_response_text
+    )
+    sanitized_text, thinking_process = extract_thinking_process(sanitized_text)
+
+    # Download images concurrently (or from the local cache) and replace hash IDs
+    # with base64 data or signed URLs of the /attachments endpoint
+    images = await load_images(
+        artifact_service=app_context.artifact_service,
+        app_name=APP_NAME,
+        user_id=request.user_id,
+        session_id=request.session_id,
+        image_hashes=attachment_ids,
+        max_concurrency=SETTINGS.ATTACHMENT_DOWNLOAD_CONCURRENCY,
+    )
+    for image_hash_id, result in images:
+        if not result:
+            continue
+        image_data, mime_type = result
+        if SETTINGS.ATTACHMENT_DELIVERY == "url":
+            url = sign_attachment_url(
+                image_hash_id,
+                user_id=request.user_id,
+                session_id=request.session_id,
+                ttl_seconds=SETTINGS.ATTACHMENT_URL_TTL_SECONDS,
+            )
+            attachments.append(ImageData(mime_type=mime_type, url=url))
+        else:
+            attachments.append(
+                ImageData(
+                    serialized_image=base64.b64encode(image_data).decode("utf-8"),
+                    mime_type=mime_type,
+                )
+            )
+
+    logger.info(
+        "Processed response with attachments",
+        sanitized_response=sanitized_text,
+        thinking_process=thinking_process,
+        attachment_ids=attachment_ids,
+    )
+
+    return ChatResponse(
+        response=sanitized_text,
+        thinking_process=thinking_process,
+        attachments=attachments,
+    )
+
+
+async def process_chat_request(
+    request: ChatRequest, app_context: AppContexts
+) -> ChatResponse:
+    """Run the agent for one chat request without blocking the event loop"""
+    content = await prepare_user_content(request, app_context)
+    final_response_text = DEFAULT_RESPONSE_TEXT
 
     try:
         # Process the message with the agent
         # Type annotation: runner.run_async returns an AsyncIterator[Event]
         events_iterator: AsyncIterator[Event] = (
             app_context.expense_manager_agent_runner.run_async(
-                user_id=user_id, session_id=session_id, new_message=content
+                user_id=request.user_id,
+                session_id=request.session_id,
+                new_message=content,
             )
         )
         async for event in events_iterator:  # event has type Event
             # Key Concept: is_final_response() marks the concluding message for the turn
             if event.is_final_response():
-                if event.content and event.content.parts:
-                    # Extract text from the first part
-                    final_response_text = event.content.parts[0].text
-                elif event.actions and event.actions.escalate:
-                    # Handle potential errors/escalations
-                    final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
+                final_response_text = get_final_response_text(event)
                 break  # Stop processing events once the final response is found
 
-        logger.info(
-            "Received final response from agent", raw_final_response=final_response_text
-        )
+        return await build_chat_response(final_response_text, request, app_context)
 
-        # Extract and process any attachments and thinking process in the response
-        base64_attachments = []
-        sanitized_text, attachment_ids = extract_attachment_ids_and_sanitize_response(
-            final_response_text
+    except Exception as e:
+        logger.error("Error processing chat request", error_message=str(e))
+        return ChatResponse(
+            response="", error=f"Error in generating response: {str(e)}"
         )
-        sanitized_text, thinking_process = extract_thinking_process(sanitized_text)
-
-        # Download images from GCS and replace hash IDs with base64 data
-        for image_hash_id in attachment_ids:
-            # Download image data and get MIME type
-            result = await asyncio.to_thread(
-                download_image_from_gcs,
-                artifact_service=app_context.artifact_service,
-                image_hash=image_hash_id,
-                app_name=APP_NAME,
-                user_id=user_id,
-                session_id=session_id,
-            )
-            if result:
-                base64_data, mime_type = result
-                base64_attachments.append(
-                    ImageData(serialized_image=base64_data, mime_type=mime_type)
+
+
+def format_sse(event: ChatStreamEvent) -> str:
+    """Serialize a stream event in the server-sent events wire format"""
+    return f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+
+
+async def stream_chat_events(
+    request: ChatRequest, app_context: AppContexts
+) -> AsyncIterator[str]:
+    """Run the agent and yield its progress as server-sent events.
+
+    Text is forwarded chunk by chunk as the model produces it, split into the
+    thinking process and final response sections. Tool calls and results are
+    reported as they happen, and a closing "final" event carries the same
+    response /chat would return.
+    """
+    try:
+        async with app_context.user_limiter.acquire(request.user_id):
+            content = await prepare_user_content(request, app_context)
+            sections = ResponseSectionStreamer()
+            streamed_text = ""
+            final_response_text = DEFAULT_RESPONSE_TEXT
+
+            events_iterator: AsyncIterator[Event] = (
+                app_context.expense_manager_agent_runner.run_async(
+                    user_id=request.user_id,
+                    session_id=request.session_id,
+                    new_message=content,
+                    run_config=RunConfig(streaming_mode=StreamingMode.SSE),
                 )
+            )
+            async for event in events_iterator:
+                for function_call in event.get_function_calls():
+                    yield format_sse(
+                        ChatStreamEvent(type="tool_call", tool_name=function_call.name)
+                    )
+                for function_response in event.get_function_responses():
+                    yield format_sse(
+                        ChatStreamEvent(
+                            type="tool_result", tool_name=function_response.name
+                        )
+                    )
 
-        logger.info(
-            "Processed response with attachments",
-            sanitized_response=sanitized_text,
-            thinking_process=thinking_process,
-            attachment_ids=attachment_ids,
-        )
+                if event.partial:
+                    for part in (event.content.parts if event.content else None) or []:
+                        if not part.text:
+                            continue
+                        if part.thought:
+                            deltas = [("thinking", part.text)]
+                        else:
+                            streamed_text += part.text
+                            deltas = sections.feed(part.text)
+                        for section, delta in deltas:
+                            yield format_sse(ChatStreamEvent(type=section, text=delta))
+                elif event.is_final_response():
+                    final_response_text = get_final_response_text(event)
+                    # Forward whatever the partial chunks did not cover
+                    if final_response_text.startswith(streamed_text):
+                        remaining = final_response_text[len(streamed_text) :]
+                        for section, delta in sections.feed(remaining):
+                            yield format_sse(ChatStreamEvent(type=section, text=delta))
+                    break
 
-        return ChatResponse(
-            response=sanitized_text,
-            thinking_process=thinking_process,
-            attachments=base64_attachments,
-        )
+            for section, delta in sections.close():
+                yield format_sse(ChatStreamEvent(type=section, text=delta))
 
+            response = await build_chat_response(
+                final_response_text, request, app_context
+            )
+            yield format_sse(ChatStreamEvent(type="final", response=response))
+    except UserBusyError as e:
+        logger.warning("Rejected chat request", user_id=request.user_id, reason=str(e))
+        yield format_sse(ChatStreamEvent(type="error", text=str(e)))
     except Exception as e:
-        logger.error("Error processing chat request", error_message=str(e))
-        return ChatResponse(
-            response="", error=f"Error in generating response: {str(e)}"
+        logger.error("Error processing streaming chat request", error_message=str(e))
+        yield format_sse(
+            ChatStreamEvent(type="error", text=f"Error in generating response: {str(e)}")
+        )
+
+
+@app.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest = Body(...),
+    app_context: AppContexts = Depends(get_app_contexts),
+) -> StreamingResponse:
+    """Process chat request and stream the agent's progress as server-sent events"""
+    return StreamingResponse(
+        stream_chat_events(request, app_context),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def decode_receipt_images(request: BulkIngestRequest) -> list[ReceiptImage]:
+    """Check the size limits of a bulk ingestion request and decode its images"""
+    if len(request.files) > SETTINGS.INGEST_MAX_REQUEST_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {SETTINGS.INGEST_MAX_REQUEST_FILES} images per request",
+        )
+    # Checked on the encoded size, before anything is decoded
+    encoded_bytes = sum(len(image.serialized_image) for image in request.files)
+    if encoded_bytes // 4 * 3 > SETTINGS.INGEST_MAX_REQUEST_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {SETTINGS.INGEST_MAX_REQUEST_BYTES} bytes of images per request",
         )
 
+    images = []
+    for index, image in enumerate(request.files):
+        try:
+            data = base64.b64decode(image.serialized_image, validate=True)
+        except binascii.Error:
+            raise HTTPException(
+                status_code=400, detail=f"File {index} is not valid base64 image data"
+            )
+        images.append(ReceiptImage(name=f"file-{index}", data=data, mime_type=image.mime_type))
+    return images
+
+
+@app.post("/receipts/bulk", response_model=BulkIngestResponse)
+async def bulk_ingest_receipts(
+    request: BulkIngestRequest = Body(...),
+    app_context: AppContexts = Depends(get_app_contexts),
+) -> BulkIngestResponse:
+    """Extract and store many receipt images at once, skipping stored receipts.
+
+    Only the receipt data is stored; the images are not kept as artifacts.
+    """
+    images = decode_receipt_images(request)
+    try:
+        async with app_context.user_limiter.acquire(request.user_id):
+            stats = await ingest_receipts(
+                images,
+                extractor=get_receipt_extractor(),
+                store=get_receipt_store(),
+                embedding_service=get_embedding_service(),
+                concurrency=SETTINGS.INGEST_CONCURRENCY,
+                batch_size=SETTINGS.INGEST_BATCH_SIZE,
+            )
+    except UserBusyError as e:
+        logger.warning("Rejected bulk ingestion", user_id=request.user_id, reason=str(e))
+        raise HTTPException(status_code=429, detail=str(e))
+    return BulkIngestResponse(**stats.summary())
+
+
+@app.get("/attachments/{image_hash}")
+async def get_attachment(
+    image_hash: str,
+    user_id: str,
+    session_id: str,
+    expires: int,
+    signature: str,
+    app_context: AppContexts = Depends(get_app_contexts),
+) -> Response:
+    """Serve an attachment image through a signed, short-lived URL"""
+    if not verify_attachment_signature(
+        image_hash, user_id, session_id, expires, signature
+    ):
+        raise HTTPException(status_code=403, detail="Invalid or expired attachment URL")
+
+    result = await load_image_bytes(
+        artifact_service=app_context.artifact_service,
+        app_name=APP_NAME,
+        user_id=user_id,
+        session_id=session_id,
+        image_hash=image_hash,
+    )
+    if not result:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+
+    image_data, mime_type = result
+    # Content-addressed, so the bytes never change for this URL
+    max_age = max(expires - int(time.time()), 0)
+    return Response(
+        content=image_data,
+        media_type=mime_type,
+        headers={
+            "Cache-Control": f"private, max-age={max_age}, immutable",
+            "ETag": f'"{image_hash}"',
+        },
+    )
+
 
 # Only run the server if this file is executed directly
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8081)
\ No newline at end of file
+    workers = SETTINGS.BACKEND_WORKERS
+    if workers > 1 and SETTINGS.SESSION_BACKEND == "memory":
+        logger.warning(
+            "In-memory sessions cannot be shared between workers, running one worker"
+        )
+        workers = 1
+    if workers > 1 and SETTINGS.RECEIPT_STORE_BACKEND == "local":
+        # Each worker would append to the same files with its own in-memory index
+        logger.warning(
+            "The local receipt store cannot be shared between workers, running one worker"
+        )
+        workers = 1
+    if (
+        workers > 1
+        and SETTINGS.ATTACHMENT_DELIVERY == "url"
+        and not SETTINGS.ATTACHMENT_URL_SECRET
+    ):
+        # Each worker would sign URLs with its own random key
+        logger.warning(
+            "Attachment URLs need ATTACHMENT_URL_SECRET to be valid on every worker, "
+            "running one worker"
+        )
+        workers = 1
+    if workers > 1:
+        logger.info(
+            "Per-user request limits apply per worker",
+            workers=workers,
+            max_concurrent_requests_per_user=SETTINGS.MAX_CONCURRENT_REQUESTS_PER_USER,
+        )
+    if workers > 1:
+        uvicorn.run("backend:app", host="0.0.0.0", port=8081, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8081)
\ No newline at end of file
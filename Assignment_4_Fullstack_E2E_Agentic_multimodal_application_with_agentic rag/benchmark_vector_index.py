@@ -0,0 +1,131 @@
+"""
+Benchmark brute force vs. approximate search of the local receipt vector index.
+
+Builds indexes of synthetic, clustered receipt embeddings (default 10k, 100k
+and 1M rows of dimension 768) and reports, per size and method, the build
+time, mean / p95 query latency and recall@k against brute force, both for
+plain queries and for queries pre-filtered on a transaction time window.
+
+Usage:
+    uv run python benchmark_vector_index.py
+    uv run python benchmark_vector_index.py --sizes 10000 100000 --methods ivf hnsw
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from expense_manager_agent.vector_index import VectorIndex, hnswlib
+
+# Synthetic receipts span one year of transactions
+TIME_SPAN_SECONDS = 365 * 24 * 3600
+GENERATE_CHUNK_ROWS = 100_000
+
+
+def synthetic_rows(
+    rng: np.random.Generator, centers: np.ndarray, n: int
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Embeddings scattered around cluster centers, with time and amount columns."""
+    labels = rng.integers(0, len(centers), n)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+    columns = {
+        "transaction_time": rng.uniform(0, TIME_SPAN_SECONDS, n),
+        "total_amount": rng.lognormal(10, 1, n),
+    }
+    return vectors.astype(np.float32), columns
+
+
+def build_index(directory: str, size: int, dimension: int, metric: str, seed: int) -> Tuple[VectorIndex, float]:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((256, dimension), dtype=np.float32)
+    index = VectorIndex(
+        directory, dimension, metric=metric, columns=("transaction_time", "total_amount")
+    )
+    started = time.perf_counter()
+    for start in range(0, size, GENERATE_CHUNK_ROWS):
+        vectors, columns = synthetic_rows(rng, centers, min(GENERATE_CHUNK_ROWS, size - start))
+        index.add(vectors, columns)
+    index.flush()
+    return index, time.perf_counter() - started
+
+
+def run_queries(
+    index: VectorIndex, queries: np.ndarray, k: int, filters, exact: bool
+) -> Tuple[List[List[int]], np.ndarray]:
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = index.search(query, k, filters, exact=exact)
+        latencies.append(time.perf_counter() - started)
+        results.append([row for row, _ in hits])
+    return results, np.array(latencies) * 1000
+
+
+def recall(truth: List[List[int]], found: List[List[int]]) -> float:
+    matched = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return matched / max(sum(len(t) for t in truth), 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--methods", nargs="+", default=["ivf", "hnsw"], choices=["ivf", "hnsw"])
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--metric", default="euclidean", choices=["euclidean", "cosine"])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    methods = [m for m in args.methods if m != "hnsw" or hnswlib is not None]
+    if len(methods) < len(args.methods):
+        print("hnswlib is not installed, skipping HNSW")
+
+    # A one month window selects ~8% of the receipts
+    month_filter = {"transaction_time": (0.0, TIME_SPAN_SECONDS / 12)}
+
+    print(f"{'rows':>9} {'method':>7} {'filter':>7} {'build s':>8} {'mean ms':>8} {'p95 ms':>8} {'recall':>7}")
+    for size in args.sizes:
+        directory = tempfile.mkdtemp(prefix="receipt_index_")
+        try:
+            index, load_seconds = build_index(directory, size, args.dimension, args.metric, args.seed)
+            index.nprobe = args.nprobe
+            # Measure the ANN path even for selective filters
+            index.brute_force_threshold = 0
+            rng = np.random.default_rng(args.seed + 1)
+            queries = np.asarray(index._vectors[rng.integers(0, size, args.queries)])
+            queries += 0.1 * rng.standard_normal(queries.shape, dtype=np.float32)
+
+            filter_sets = (("none", None), ("month", month_filter))
+            truths = {}
+            for filter_name, filters in filter_sets:
+                truths[filter_name], latencies = run_queries(
+                    index, queries, args.k, filters, exact=True
+                )
+                print(
+                    f"{size:>9} {'brute':>7} {filter_name:>7} {load_seconds:>8.2f} "
+                    f"{latencies.mean():>8.2f} {np.percentile(latencies, 95):>8.2f} {1.0:>7.3f}"
+                )
+
+            for method in methods:
+                started = time.perf_counter()
+                index.build_ann(method)
+                build_seconds = time.perf_counter() - started
+                for filter_name, filters in filter_sets:
+                    found, latencies = run_queries(index, queries, args.k, filters, exact=False)
+                    print(
+                        f"{size:>9} {method:>7} {filter_name:>7} {build_seconds:>8.2f} "
+                        f"{latencies.mean():>8.2f} {np.percentile(latencies, 95):>8.2f} "
+                        f"{recall(truths[filter_name], found):>7.3f}"
+                    )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
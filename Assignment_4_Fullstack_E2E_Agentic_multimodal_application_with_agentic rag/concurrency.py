@@ -0,0 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+class UserBusyError(Exception):
+    """Raised when a user still has too many requests in flight after waiting."""
+
+
+class UserConcurrencyLimiter:
+    """Limits the number of requests processed concurrently for each user.
+
+    Requests beyond the limit wait for a free slot up to ``queue_timeout``
+    seconds. Different users never wait for each other. The limits are held
+    in memory, so they apply per process: with several backend workers a
+    user can have ``max_concurrent`` requests in progress in each of them.
+
+    Attributes:
+        max_concurrent: Maximum number of concurrent requests per user.
+        queue_timeout: Seconds a request may wait for a free slot.
+    """
+
+    def __init__(self, max_concurrent: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._holders: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def acquire(self, user_id: str) -> AsyncIterator[None]:
+        """Hold one of the user's request slots for the duration of the block.
+
+        Raises:
+            UserBusyError: If no slot became free within the queue timeout.
+        """
+        semaphore = self._semaphores.setdefault(
+            user_id, asyncio.Semaphore(self.max_concurrent)
+        )
+        self._holders[user_id] = self._holders.get(user_id, 0) + 1
+        try:
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise UserBusyError(
+                    f"User {user_id} already has {self.max_concurrent} requests in progress"
+                )
+            try:
+                yield
+            finally:
+                semaphore.release()
+        finally:
+            # Forget idle users so the registry does not grow without bound
+            self._holders[user_id] -= 1
+            if not self._holders[user_id]:
+                del self._holders[user_id]
+                del self._semaphores[user_id]
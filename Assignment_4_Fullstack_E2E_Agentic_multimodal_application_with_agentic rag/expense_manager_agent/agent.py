@@ -5,6 +5,7 @@ from expense_manager_agent.tools import (
     store_receipt_data,
     search_receipts_by_metadata_filter,
     search_relevant_receipts_by_natural_language_query,
+    search_receipts,
     get_receipt_data_by_image_id,
 )
 from expense_manager_agent.callbacks import modify_image_data_in_history
@@ -36,6 +37,7 @@ root_agent = Agent(
         get_receipt_data_by_image_id,
         search_receipts_by_metadata_filter,
         search_relevant_receipts_by_natural_language_query,
+        search_receipts,
     ],
     planner=BuiltInPlanner(
         thinking_config=types.ThinkingConfig(
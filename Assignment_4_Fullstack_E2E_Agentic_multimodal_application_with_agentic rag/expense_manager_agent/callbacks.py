@@ -1,55 +1,144 @@
 # expense_manager_agent/callbacks.py
 
 import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
 from google.genai import types
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models.llm_request import LlmRequest
+from settings import get_settings
+import logger
+
+SETTINGS = get_settings()
+# Rough number of input tokens the model is billed per image
+ESTIMATED_TOKENS_PER_IMAGE = 258
+
+
+class ImageHashMemo:
+    """LRU memo of image hash IDs keyed by identity and length of the image bytes.
+
+    The request contents are rebuilt from the session on every model call, but
+    the deep copies share the same immutable bytes objects, so each image is
+    only hashed once. Memoised bytes are kept referenced so their id cannot be
+    reused by another object while the entry lives; the memo is therefore
+    bounded by the total size of the bytes it keeps alive.
+
+    Attributes:
+        max_bytes: Maximum total size of the memoised image bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[bytes, str]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def hash_id(self, image_data: bytes) -> str:
+        key = (id(image_data), len(image_data))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is image_data:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        image_hash_id = hashlib.sha256(image_data).hexdigest()[:12]
+        if len(image_data) > self.max_bytes:
+            return image_hash_id
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (image_data, image_hash_id)
+            self._size += len(image_data)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return image_hash_id
+
+
+# Sized like the image window, the images sent with every model call
+IMAGE_HASH_MEMO = ImageHashMemo(SETTINGS.IMAGE_HISTORY_MAX_BYTES)
 
 
 def modify_image_data_in_history(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> None:
     # The following code will modify the request sent to LLM
-    # We will only keep image data in the last 3 user messages using a reverse and counter approach
+    # We only keep image data of the most recent user messages, newest first, while
+    # their images fit in IMAGE_HISTORY_MAX_BYTES. Images of the latest user message
+    # are always kept. Older images are replaced by their image ID placeholder only.
+    # Every image without a placeholder, old or not, is hashed to build one; the
+    # memo saves the re-hashing while the image bytes fit its byte budget.
 
-    # Count how many user messages we've processed
+    # Count how many user messages we've processed and the image bytes retained
     user_message_count = 0
+    retained_bytes = 0
+    window_passed = False
+    dropped_images = 0
+    dropped_bytes = 0
 
     # Process the reversed list
     for content in reversed(llm_request.contents):
         # Only count for user manual query, not function call
-        if (content.role == "user") and (content.parts[0].function_response is None):
-            user_message_count += 1
-            modified_content_parts = []
-
-            # Check any missing image ID placeholder for any image data
-            # Then remove image data from conversation history if more than 3 user messages
-            for idx, part in enumerate(content.parts):
-                if part.inline_data is None:
-                    modified_content_parts.append(part)
-                    continue
-
-                if (
-                    (idx + 1 >= len(content.parts))
-                    or (content.parts[idx + 1].text is None)
-                    or (not content.parts[idx + 1].text.startswith("[IMAGE-ID "))
-                ):
-                    # Generate hash ID for the image and add a placeholder
-                    image_data = part.inline_data.data
-                    hasher = hashlib.sha256(image_data)
-                    image_hash_id = hasher.hexdigest()[:12]
-                    placeholder = f"[IMAGE-ID {image_hash_id}]"
-
-                    # Only keep image data in the last 3 user messages
-                    if user_message_count <= 3:
-                        modified_content_parts.append(part)
-
-                    modified_content_parts.append(types.Part(text=placeholder))
-
-                else:
-                    # Only keep image data in the last 3 user messages
-                    if user_message_count <= 3:
-                        modified_content_parts.append(part)
-
-            # This will modify the contents inside the llm_request
-            content.parts = modified_content_parts
+        if (
+            (content.role != "user")
+            or (not content.parts)
+            or (content.parts[0].function_response is not None)
+        ):
+            continue
+
+        user_message_count += 1
+        if not any(part.inline_data is not None for part in content.parts):
+            continue
+
+        # Messages are kept whole, so the window ends at the first one over budget
+        if not window_passed:
+            message_bytes = sum(
+                len(part.inline_data.data or b"")
+                for part in content.parts
+                if part.inline_data is not None
+            )
+            window_passed = (
+                user_message_count > 1
+                and retained_bytes + message_bytes > SETTINGS.IMAGE_HISTORY_MAX_BYTES
+            )
+            if not window_passed:
+                retained_bytes += message_bytes
+
+        # Check any missing image ID placeholder for any image data
+        # Then remove image data from conversation history past the retention window
+        modified_content_parts = []
+        for idx, part in enumerate(content.parts):
+            if part.inline_data is None:
+                modified_content_parts.append(part)
+                continue
+
+            image_data = part.inline_data.data or b""
+            if window_passed:
+                dropped_images += 1
+                dropped_bytes += len(image_data)
+            else:
+                modified_content_parts.append(part)
+
+            if (
+                (idx + 1 >= len(content.parts))
+                or (content.parts[idx + 1].text is None)
+                or (not content.parts[idx + 1].text.startswith("[IMAGE-ID "))
+            ):
+                # Generate hash ID for the image (memoised) and add a placeholder
+                image_hash_id = IMAGE_HASH_MEMO.hash_id(image_data)
+                placeholder = f"[IMAGE-ID {image_hash_id}]"
+                modified_content_parts.append(types.Part(text=placeholder))
+
+        # This will modify the contents inside the llm_request
+        content.parts = modified_content_parts
+
+    if dropped_images:
+        logger.info(
+            f"Removed {dropped_images} images ({dropped_bytes} bytes, about "
+            f"{dropped_images * ESTIMATED_TOKENS_PER_IMAGE} tokens) from the history "
+            f"of invocation {callback_context.invocation_id}, "
+            f"kept {retained_bytes} bytes of recent images"
+        )
@@ -0,0 +1,242 @@
+# expense_manager_agent/embeddings.py
+
+import asyncio
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional, Protocol
+
+from google import genai
+from settings import get_settings
+import logger
+
+SETTINGS = get_settings()
+
+
+class EmbeddingBackend(Protocol):
+    """Anything that turns a batch of texts into embedding vectors."""
+
+    dimension: int
+
+    def embed(self, texts: List[str]) -> List[List[float]]: ...
+
+
+class VertexEmbeddingBackend:
+    """Embeds texts with a Vertex AI embedding model, many texts per request."""
+
+    # Maximum number of inputs accepted by a single embed_content request
+    MAX_TEXTS_PER_REQUEST = 250
+
+    def __init__(self, model: str, dimension: int = 768):
+        self.model = model
+        self.dimension = dimension
+        self.client = genai.Client(
+            vertexai=True,
+            location=SETTINGS.GCLOUD_LOCATION,
+            project=SETTINGS.GCLOUD_PROJECT_ID,
+        )
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.MAX_TEXTS_PER_REQUEST):
+            result = self.client.models.embed_content(
+                model=self.model,
+                contents=texts[start : start + self.MAX_TEXTS_PER_REQUEST],
+            )
+            vectors.extend(embedding.values for embedding in result.embeddings)
+        return vectors
+
+
+class HashingEmbeddingBackend:
+    """Deterministic local embedder based on feature hashing of word tokens.
+
+    It needs no network access, so tests and local runs get stable vectors
+    where texts sharing words are close to each other.
+    """
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimension
+            for token in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], "little") % self.dimension
+                vector[index] += 1.0 if digest[4] & 1 else -1.0
+            norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+
+def normalize_query_text(text: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry."""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingService:
+    """Micro-batching, caching front end for an embedding backend.
+
+    Concurrent callers queue their texts; a background worker sends everything
+    queued within ``max_wait_ms`` (up to ``max_batch_size`` texts) to the
+    backend in one call. Query embeddings are cached in an LRU keyed by the
+    normalized query text.
+    """
+
+    def __init__(
+        self,
+        backend: EmbeddingBackend,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 10.0,
+        cache_size: int = 1024,
+    ):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: List[tuple[str, Future]] = []
+        self._queue_ready = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def _cached(self, key: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query, served from the cache when seen before."""
+        key = normalize_query_text(text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = self._submit(key).result()
+            self._remember(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async variant of embed_query that does not block the event loop."""
+        key = normalize_query_text(text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = await asyncio.wrap_future(self._submit(key))
+            self._remember(key, vector)
+        return vector
+
+    def embed_document(self, text: str) -> List[float]:
+        """Embed a document; batched with concurrent requests but not cached."""
+        return self._submit(text).result()
+
+    async def aembed_document(self, text: str) -> List[float]:
+        """Async variant of embed_document that does not block the event loop."""
+        return await asyncio.wrap_future(self._submit(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed many documents directly, in backend-sized batches."""
+        vectors = []
+        for start in range(0, len(texts), self.max_batch_size):
+            vectors.extend(self.backend.embed(texts[start : start + self.max_batch_size]))
+        return vectors
+
+    def _submit(self, text: str) -> Future:
+        future: Future = Future()
+        with self._queue_ready:
+            self._queue.append((text, future))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run_batches, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+            self._queue_ready.notify()
+        return future
+
+    def _run_batches(self) -> None:
+        while True:
+            with self._queue_ready:
+                while not self._queue:
+                    self._queue_ready.wait()
+                # Give concurrent callers a moment to join this batch
+                deadline = time.monotonic() + self.max_wait_seconds
+                while len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._queue_ready.wait(timeout=remaining)
+                batch = self._queue[: self.max_batch_size]
+                del self._queue[: self.max_batch_size]
+
+            # Callers cancelled while queued drop out; the others can no longer be cancelled
+            batch = [
+                (text, future) for text, future in batch if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            # No error may end the worker, or every later caller would wait forever
+            try:
+                self._embed_batch(batch)
+            except Exception as e:
+                logger.error("Embedding batch failed", error_message=str(e), size=len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _embed_batch(self, batch: List[tuple[str, Future]]) -> None:
+        texts = [text for text, _ in batch]
+        vectors = self.backend.embed(texts)
+        if len(vectors) != len(texts):
+            raise ValueError(
+                f"Embedding backend returned {len(vectors)} vectors for {len(texts)} texts"
+            )
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+
+_SERVICE: Optional[EmbeddingService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def create_embedding_backend(name: str) -> EmbeddingBackend:
+    """Create the embedding backend selected in settings ("vertex" or "local")."""
+    if name == "local":
+        return HashingEmbeddingBackend(dimension=SETTINGS.EMBEDDING_DIMENSION)
+    if name == "vertex":
+        return VertexEmbeddingBackend(
+            model=SETTINGS.EMBEDDING_MODEL, dimension=SETTINGS.EMBEDDING_DIMENSION
+        )
+    raise ValueError(f"Unknown embedding backend: {name}")
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the shared embedding service, creating it from settings on first use."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = EmbeddingService(
+                backend=create_embedding_backend(SETTINGS.EMBEDDING_BACKEND),
+                max_batch_size=SETTINGS.EMBEDDING_BATCH_SIZE,
+                max_wait_ms=SETTINGS.EMBEDDING_BATCH_WAIT_MS,
+                cache_size=SETTINGS.EMBEDDING_CACHE_SIZE,
+            )
+        return _SERVICE
+
+
+def set_embedding_service(service: EmbeddingService) -> None:
+    """Replace the shared embedding service, e.g. with a local backend in tests."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        _SERVICE = service
@@ -0,0 +1,34 @@
+# expense_manager_agent/executor.py
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from settings import get_settings
+
+SETTINGS = get_settings()
+T = TypeVar("T")
+
+# Bounded pool for blocking client calls (Firestore, local store I/O), so the
+# agent tools never block the event loop and cannot exhaust the default pool
+TOOL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=SETTINGS.TOOL_THREAD_POOL_SIZE, thread_name_prefix="expense-tools"
+)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking function in the tool thread pool and await its result.
+
+    Args:
+        func: The blocking function to call.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        TOOL_EXECUTOR, functools.partial(func, *args, **kwargs)
+    )
@@ -0,0 +1,386 @@
+# expense_manager_agent/ingestion.py
+
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol, Set
+
+from google import genai
+from google.genai import types
+from pydantic import BaseModel
+from settings import get_settings
+from expense_manager_agent.embeddings import EmbeddingService
+from expense_manager_agent.executor import run_blocking
+from expense_manager_agent.receipt_store import ReceiptStore, iso_to_timestamp
+from expense_manager_agent.tools import RECEIPT_DESC_FORMAT
+import logger
+
+SETTINGS = get_settings()
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".heic", ".heif")
+EXTRACTION_PROMPT = """
+Extract the data of the receipt in this image. Use the ISO format
+'YYYY-MM-DDTHH:MM:SS.ssssssZ' for the transaction time and the currency code
+(e.g. "IDR", "USD") for the currency, derived from the store location if it is
+not printed. If unsure about the currency, use "IDR". Each purchased item has
+its name, its price and its quantity (1 if not printed).
+"""
+
+
+class PurchasedItem(BaseModel):
+    name: str
+    price: float
+    quantity: int = 1
+
+
+class ExtractedReceipt(BaseModel):
+    """Receipt fields extracted from an image, the response schema of the model."""
+
+    store_name: str
+    transaction_time: str
+    total_amount: float
+    currency: str = "IDR"
+    purchased_items: List[PurchasedItem] = []
+
+
+@dataclass
+class ReceiptImage:
+    """A receipt image to ingest.
+
+    Attributes:
+        name: Where the image comes from, e.g. its path in the folder or archive.
+        data: The image bytes.
+        mime_type: MIME type of the image.
+    """
+
+    name: str
+    data: bytes
+    mime_type: str
+
+
+class ReceiptExtractor(Protocol):
+    """Extracts receipt fields from a receipt image."""
+
+    async def extract(self, image_data: bytes, mime_type: str) -> ExtractedReceipt: ...
+
+
+class GeminiReceiptExtractor:
+    """Extracts receipt fields with a Gemini model and a structured output schema."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.client = genai.Client(
+            vertexai=True,
+            location=SETTINGS.GCLOUD_LOCATION,
+            project=SETTINGS.GCLOUD_PROJECT_ID,
+        )
+
+    async def extract(self, image_data: bytes, mime_type: str) -> ExtractedReceipt:
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=[
+                types.Part.from_bytes(data=image_data, mime_type=mime_type),
+                EXTRACTION_PROMPT,
+            ],
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=ExtractedReceipt,
+                temperature=0.0,
+            ),
+        )
+        if response.parsed is None:
+            raise ValueError(f"Model returned no receipt data: {response.text}")
+        return response.parsed
+
+
+_EXTRACTOR: Optional[ReceiptExtractor] = None
+_EXTRACTOR_LOCK = threading.Lock()
+
+
+def get_receipt_extractor() -> ReceiptExtractor:
+    """Return the shared receipt extractor using INGEST_EXTRACTION_MODEL."""
+    global _EXTRACTOR
+    with _EXTRACTOR_LOCK:
+        if _EXTRACTOR is None:
+            _EXTRACTOR = GeminiReceiptExtractor(SETTINGS.INGEST_EXTRACTION_MODEL)
+        return _EXTRACTOR
+
+
+@dataclass
+class IngestionStats:
+    """Counters and throughput of an ingestion run."""
+
+    images: int = 0
+    stored: int = 0
+    duplicates: int = 0
+    resumed: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def images_per_second(self) -> float:
+        processed = self.stored + self.duplicates + self.failed
+        return processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "images": self.images,
+            "stored": self.stored,
+            "duplicates": self.duplicates,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "images_per_second": round(self.images_per_second, 2),
+        }
+
+
+class IngestionCheckpoint:
+    """Append-only JSON lines log of processed images, to resume an interrupted run.
+
+    Images recorded as stored or duplicate are skipped when the run is resumed;
+    failed images are retried.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        if record["status"] in ("stored", "duplicate"):
+                            self.done.add(record["image_id"])
+                        else:
+                            self.done.discard(record["image_id"])
+
+    def record(self, records: List[Dict[str, str]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("".join(json.dumps(record) + "\n" for record in records))
+            file.flush()
+            os.fsync(file.fileno())
+        for record in records:
+            if record["status"] in ("stored", "duplicate"):
+                self.done.add(record["image_id"])
+
+
+def image_hash_id(image_data: bytes) -> str:
+    """The image ID used for receipts and artifacts, a SHA-256 prefix of the bytes."""
+    return hashlib.sha256(image_data).hexdigest()[:12]
+
+
+def _guess_mime_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "image/jpeg"
+
+
+def _is_image(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def iter_receipt_images(source: str) -> Iterator[ReceiptImage]:
+    """List the receipt images of a folder (recursively) or a zip / tar archive.
+
+    Args:
+        source (str): Path of the folder or archive.
+
+    Returns:
+        Iterator[ReceiptImage]: The images in a stable order, read one at a time.
+    """
+    if os.path.isdir(source):
+        for root, directories, files in os.walk(source):
+            directories.sort()
+            for name in sorted(files):
+                if _is_image(name):
+                    path = os.path.join(root, name)
+                    with open(path, "rb") as file:
+                        data = file.read()
+                    yield ReceiptImage(name=path, data=data, mime_type=_guess_mime_type(name))
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in sorted(archive.infolist(), key=lambda info: info.filename):
+                if not info.is_dir() and _is_image(info.filename):
+                    yield ReceiptImage(
+                        name=info.filename,
+                        data=archive.read(info),
+                        mime_type=_guess_mime_type(info.filename),
+                    )
+    elif tarfile.is_tarfile(source):
+        # Streamed in archive order, as seeking back is slow in compressed tars
+        with tarfile.open(source, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and _is_image(member.name):
+                    yield ReceiptImage(
+                        name=member.name,
+                        data=archive.extractfile(member).read(),
+                        mime_type=_guess_mime_type(member.name),
+                    )
+    else:
+        raise ValueError(f"{source} is not a folder, zip or tar archive")
+
+
+def _to_receipt_document(image_id: str, extracted: ExtractedReceipt) -> Dict[str, Any]:
+    # Same validation as the store_receipt_data tool
+    try:
+        iso_to_timestamp(extracted.transaction_time)
+    except ValueError:
+        raise ValueError(
+            f"Invalid transaction time format: {extracted.transaction_time}"
+        )
+    return {
+        "receipt_id": image_id,
+        "store_name": extracted.store_name,
+        "transaction_time": extracted.transaction_time,
+        "total_amount": extracted.total_amount,
+        "currency": extracted.currency,
+        "purchased_items": [item.model_dump() for item in extracted.purchased_items],
+    }
+
+
+async def ingest_receipts(
+    images: Iterator[ReceiptImage],
+    extractor: ReceiptExtractor,
+    store: ReceiptStore,
+    embedding_service: EmbeddingService,
+    checkpoint: Optional[IngestionCheckpoint] = None,
+    concurrency: int = 8,
+    batch_size: int = 64,
+    progress: Optional[Callable[[IngestionStats], None]] = None,
+) -> IngestionStats:
+    """
+    Extract, embed and store many receipt images.
+
+    Images are processed in batches: the batch is deduplicated against the
+    checkpoint and the store with a single lookup, the new receipts are
+    extracted concurrently (at most `concurrency` model calls at a time),
+    embedded with one batched call and written with one batched write. The
+    checkpoint is updated after every written batch. Only the receipt data
+    is stored: unlike images uploaded in the chat, the images are not saved
+    as artifacts, so these receipts have no image to return as an attachment.
+
+    Args:
+        images: The receipt images, e.g. from iter_receipt_images
+        extractor: Extracts the receipt fields from an image
+        store: The receipt store to write to
+        embedding_service: Embeds the receipt descriptions
+        checkpoint: Optional checkpoint to skip images of an earlier run
+        concurrency: Maximum number of concurrent extractions
+        batch_size: Number of images per deduplication, embedding and write batch
+        progress: Optional callback invoked with the stats after every batch
+
+    Returns:
+        IngestionStats: The counters and throughput of the run
+    """
+    stats = IngestionStats()
+    semaphore = asyncio.Semaphore(concurrency)
+    seen: Set[str] = set()
+
+    async def extract(image: ReceiptImage, image_id: str):
+        async with semaphore:
+            try:
+                extracted = await extractor.extract(image.data, image.mime_type)
+                return _to_receipt_document(image_id, extracted)
+            except Exception as e:
+                logger.error(f"Failed to extract receipt {image.name}: {e}")
+                return None
+
+    # Images are read from the source in the tool thread pool, batch by batch
+    images = iter(images)
+    batch: List[ReceiptImage] = []
+    while True:
+        image = await run_blocking(next, images, None)
+        if image is None:
+            break
+        batch.append(image)
+        if len(batch) < batch_size:
+            continue
+        await _ingest_batch(batch, extract, store, embedding_service, checkpoint, seen, stats)
+        batch = []
+        if progress:
+            progress(stats)
+    if batch:
+        await _ingest_batch(batch, extract, store, embedding_service, checkpoint, seen, stats)
+        if progress:
+            progress(stats)
+
+    stats.finished_at = time.perf_counter()
+    logger.info("Receipt ingestion finished", **stats.summary())
+    return stats
+
+
+async def _ingest_batch(
+    batch: List[ReceiptImage],
+    extract: Callable,
+    store: ReceiptStore,
+    embedding_service: EmbeddingService,
+    checkpoint: Optional[IngestionCheckpoint],
+    seen: Set[str],
+    stats: IngestionStats,
+) -> None:
+    stats.images += len(batch)
+    pending = []
+    for image in batch:
+        image_id = image_hash_id(image.data)
+        if image_id in seen:
+            stats.duplicates += 1
+        elif checkpoint is not None and image_id in checkpoint.done:
+            stats.resumed += 1
+        else:
+            pending.append((image, image_id))
+        seen.add(image_id)
+
+    # One lookup for the whole batch instead of one query per receipt
+    existing = await run_blocking(
+        store.existing_ids, [image_id for _, image_id in pending]
+    )
+    records = []
+    new_images = []
+    for image, image_id in pending:
+        if image_id in existing:
+            stats.duplicates += 1
+            records.append({"image_id": image_id, "source": image.name, "status": "duplicate"})
+        else:
+            new_images.append((image, image_id))
+
+    documents = await asyncio.gather(
+        *(extract(image, image_id) for image, image_id in new_images)
+    )
+    receipts = []
+    for (image, image_id), document in zip(new_images, documents):
+        if document is None:
+            stats.failed += 1
+            records.append({"image_id": image_id, "source": image.name, "status": "failed"})
+        else:
+            receipts.append(document)
+            records.append({"image_id": image_id, "source": image.name, "status": "stored"})
+
+    if receipts:
+        embeddings = await run_blocking(
+            embedding_service.embed_documents,
+            [
+                RECEIPT_DESC_FORMAT.format(
+                    store_name=receipt["store_name"],
+                    transaction_time=receipt["transaction_time"],
+                    total_amount=receipt["total_amount"],
+                    currency=receipt["currency"],
+                    purchased_items=receipt["purchased_items"],
+                    receipt_id=receipt["receipt_id"],
+                )
+                for receipt in receipts
+            ],
+        )
+        await run_blocking(store.add_many, receipts, embeddings)
+        stats.stored += len(receipts)
+
+    if checkpoint is not None and records:
+        await run_blocking(checkpoint.record, records)
@@ -0,0 +1,104 @@
+# expense_manager_agent/keyword_index.py
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """In-memory Okapi BM25 index for short texts such as store and item names.
+
+    Attributes:
+        k1: Term frequency saturation parameter.
+        b: Document length normalization parameter.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing an earlier version with the same id."""
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        frequencies = Counter(tokens)
+        for term, frequency in frequencies.items():
+            self._postings[term][doc_id] = frequency
+        self._terms[doc_id] = list(frequencies)
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: str) -> None:
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(doc_id):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(
+        self, query: str, limit: int, allowed: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Rank documents by BM25 score for the query.
+
+        Args:
+            query (str): The keyword query.
+            limit (int): Maximum number of results.
+            allowed (Iterable[str], optional): Restrict results to these document ids.
+
+        Returns:
+            List[Tuple[str, float]]: (document id, score) pairs, best first.
+        """
+        if not self._lengths:
+            return []
+        allowed = set(allowed) if allowed is not None else None
+        average_length = self._total_length / len(self._lengths) or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self._lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several rankings of document ids with Reciprocal Rank Fusion.
+
+    Args:
+        rankings (Sequence[Sequence[str]]): Document ids per ranking, best first.
+        k (int): Rank offset dampening the influence of top positions.
+
+    Returns:
+        List[Tuple[str, float]]: (document id, fused score) pairs, best first.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
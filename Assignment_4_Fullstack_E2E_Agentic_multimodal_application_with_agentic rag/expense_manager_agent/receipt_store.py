@@ -0,0 +1,375 @@
+# expense_manager_agent/receipt_store.py
+
+import datetime
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Set
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.vector import Vector
+from google.cloud.firestore_v1 import FieldFilter
+from google.cloud.firestore_v1.base_query import And
+from google.cloud.firestore_v1.base_vector_query import DistanceMeasure
+from settings import get_settings
+from expense_manager_agent.keyword_index import BM25Index
+
+SETTINGS = get_settings()
+EMBEDDING_FIELD_NAME = "embedding"
+# Limits of a Firestore "in" filter and of a batched write
+FIRESTORE_IN_FILTER_LIMIT = 30
+FIRESTORE_BATCH_WRITE_LIMIT = 500
+
+
+def iso_to_timestamp(value: str) -> float:
+    """Convert an ISO datetime (e.g. 'YYYY-MM-DDTHH:MM:SS.ssssssZ') to epoch seconds.
+
+    Datetimes without a timezone are treated as UTC.
+    """
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def receipt_keyword_text(receipt: Dict[str, Any]) -> str:
+    """Text matched by keyword search: the store name and purchased item names."""
+    item_names = [
+        str(item.get("name", ""))
+        for item in receipt.get("purchased_items", [])
+        if isinstance(item, dict)
+    ]
+    return " ".join([str(receipt.get("store_name", "")), *item_names])
+
+
+class ReceiptFilter:
+    """Metadata constraints shared by filter and vector searches.
+
+    Attributes:
+        start_time: Inclusive lower bound of the transaction time (ISO format), or None.
+        end_time: Inclusive upper bound of the transaction time (ISO format), or None.
+        min_total_amount: Inclusive lower bound of the total amount, or None.
+        max_total_amount: Inclusive upper bound of the total amount, or None.
+    """
+
+    def __init__(
+        self,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        min_total_amount: Optional[float] = None,
+        max_total_amount: Optional[float] = None,
+    ):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.min_total_amount = min_total_amount
+        self.max_total_amount = max_total_amount
+
+    def is_empty(self) -> bool:
+        return all(
+            value is None
+            for value in (
+                self.start_time,
+                self.end_time,
+                self.min_total_amount,
+                self.max_total_amount,
+            )
+        )
+
+
+class ReceiptStore(Protocol):
+    """Storage of receipt documents and their embeddings."""
+
+    def add(self, receipt: Dict[str, Any], embedding: List[float]) -> None: ...
+
+    def add_many(
+        self, receipts: List[Dict[str, Any]], embeddings: List[List[float]]
+    ) -> None: ...
+
+    def get(self, receipt_id: str) -> Dict[str, Any]: ...
+
+    def existing_ids(self, receipt_ids: Iterable[str]) -> Set[str]: ...
+
+    def filter(self, receipt_filter: ReceiptFilter) -> List[Dict[str, Any]]: ...
+
+    def nearest(
+        self,
+        embedding: List[float],
+        limit: int,
+        receipt_filter: Optional[ReceiptFilter] = None,
+    ) -> List[Dict[str, Any]]: ...
+
+    def keyword_search(
+        self,
+        query_text: str,
+        limit: int,
+        receipt_filter: Optional[ReceiptFilter] = None,
+    ) -> List[Dict[str, Any]]: ...
+
+
+class FirestoreReceiptStore:
+    """Receipts in a Firestore collection, searched with Firestore vector search."""
+
+    def __init__(self, collection_name: str, distance: str = "euclidean"):
+        self.client = firestore.Client(
+            project=SETTINGS.GCLOUD_PROJECT_ID
+        )  # Will use "(default)" database
+        self.collection = self.client.collection(collection_name)
+        self.distance_measure = (
+            DistanceMeasure.COSINE if distance == "cosine" else DistanceMeasure.EUCLIDEAN
+        )
+
+    @staticmethod
+    def _to_receipt(doc) -> Dict[str, Any]:
+        data = doc.to_dict()
+        data.pop(EMBEDDING_FIELD_NAME, None)  # Not needed outside the store
+        return data
+
+    def _apply_filter(self, query, receipt_filter: Optional[ReceiptFilter]):
+        if receipt_filter is None or receipt_filter.is_empty():
+            return query
+        bounds = (
+            ("transaction_time", ">=", receipt_filter.start_time),
+            ("transaction_time", "<=", receipt_filter.end_time),
+            ("total_amount", ">=", receipt_filter.min_total_amount),
+            ("total_amount", "<=", receipt_filter.max_total_amount),
+        )
+        filters = [FieldFilter(*bound) for bound in bounds if bound[2] is not None]
+        return query.where(filter=And(filters=filters))
+
+    def add(self, receipt: Dict[str, Any], embedding: List[float]) -> None:
+        self.collection.add({**receipt, EMBEDDING_FIELD_NAME: Vector(embedding)})
+
+    def add_many(
+        self, receipts: List[Dict[str, Any]], embeddings: List[List[float]]
+    ) -> None:
+        """Add receipts with batched writes, up to 500 documents per commit."""
+        for start in range(0, len(receipts), FIRESTORE_BATCH_WRITE_LIMIT):
+            batch = self.client.batch()
+            end = start + FIRESTORE_BATCH_WRITE_LIMIT
+            for receipt, embedding in zip(receipts[start:end], embeddings[start:end]):
+                batch.set(
+                    self.collection.document(),
+                    {**receipt, EMBEDDING_FIELD_NAME: Vector(embedding)},
+                )
+            batch.commit()
+
+    def get(self, receipt_id: str) -> Dict[str, Any]:
+        query = self.collection.where(
+            filter=FieldFilter("receipt_id", "==", receipt_id)
+        ).limit(1)
+        docs = list(query.stream())
+        return self._to_receipt(docs[0]) if docs else {}
+
+    def existing_ids(self, receipt_ids: Iterable[str]) -> Set[str]:
+        """Return which of the receipt ids are stored, with one "in" query per 30 ids."""
+        receipt_ids = list(dict.fromkeys(receipt_ids))
+        existing = set()
+        for start in range(0, len(receipt_ids), FIRESTORE_IN_FILTER_LIMIT):
+            query = self.collection.where(
+                filter=FieldFilter(
+                    "receipt_id", "in", receipt_ids[start : start + FIRESTORE_IN_FILTER_LIMIT]
+                )
+            ).select(["receipt_id"])
+            existing.update(doc.get("receipt_id") for doc in query.stream())
+        return existing
+
+    def filter(self, receipt_filter: ReceiptFilter) -> List[Dict[str, Any]]:
+        query = self._apply_filter(self.collection, receipt_filter)
+        return [self._to_receipt(doc) for doc in query.stream()]
+
+    def nearest(
+        self,
+        embedding: List[float],
+        limit: int,
+        receipt_filter: Optional[ReceiptFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        # Pre-filtered vector queries need a composite vector index in Firestore
+        vector_query = self._apply_filter(self.collection, receipt_filter).find_nearest(
+            vector_field=EMBEDDING_FIELD_NAME,
+            query_vector=Vector(embedding),
+            distance_measure=self.distance_measure,
+            limit=limit,
+        )
+        return [self._to_receipt(doc) for doc in vector_query.stream()]
+
+    def keyword_search(
+        self,
+        query_text: str,
+        limit: int,
+        receipt_filter: Optional[ReceiptFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Score the most recent receipts matching the filter in memory.
+
+        Firestore has no full-text search. Only KEYWORD_SEARCH_MAX_CANDIDATES
+        receipts are read per query, so older receipts are left to vector search.
+        """
+        query = (
+            self._apply_filter(self.collection, receipt_filter)
+            .order_by("transaction_time", direction=firestore.Query.DESCENDING)
+            .limit(SETTINGS.KEYWORD_SEARCH_MAX_CANDIDATES)
+        )
+        receipts = {
+            receipt["receipt_id"]: receipt
+            for receipt in (self._to_receipt(doc) for doc in query.stream())
+        }
+        keywords = BM25Index()
+        for receipt_id, receipt in receipts.items():
+            keywords.add(receipt_id, receipt_keyword_text(receipt))
+        return [receipts[receipt_id] for receipt_id, _ in keywords.search(query_text, limit)]
+
+
+class LocalReceiptStore:
+    """Receipts on local disk, searched with a NumPy vector index.
+
+    Receipt documents are appended to ``receipts.jsonl``; the embedding of
+    the n-th document is row n of the vector index, which also holds the
+    transaction time and total amount as filter columns. Works offline.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dimension: int,
+        distance: str = "euclidean",
+        ann: str = "none",
+        nprobe: int = 8,
+    ):
+        from expense_manager_agent.vector_index import VectorIndex
+
+        self.directory = directory
+        self.index = VectorIndex(
+            os.path.join(directory, "index"),
+            dimension=dimension,
+            metric=distance,
+            columns=("transaction_time", "total_amount"),
+            nprobe=nprobe,
+        )
+        self._documents_path = os.path.join(directory, "receipts.jsonl")
+        self._documents: List[Dict[str, Any]] = []
+        self._rows_by_id: Dict[str, int] = {}
+        self._keywords = BM25Index()
+        self._lock = threading.Lock()
+
+        if os.path.exists(self._documents_path):
+            with open(self._documents_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        self._remember(json.loads(line))
+        # Drop vectors of documents that never made it to the document log
+        truncated = self.index.count > len(self._documents)
+        self.index.count = min(self.index.count, len(self._documents))
+        if truncated or self.index.ann != ann:
+            self.index.build_ann(ann)
+
+    def _remember(self, receipt: Dict[str, Any]) -> None:
+        self._rows_by_id[receipt["receipt_id"]] = len(self._documents)
+        self._documents.append(receipt)
+        self._keywords.add(receipt["receipt_id"], receipt_keyword_text(receipt))
+
+    def _index_filters(self, receipt_filter: Optional[ReceiptFilter]):
+        if receipt_filter is None or receipt_filter.is_empty():
+            return None
+        return {
+            "transaction_time": (
+                iso_to_timestamp(receipt_filter.start_time) if receipt_filter.start_time else None,
+                iso_to_timestamp(receipt_filter.end_time) if receipt_filter.end_time else None,
+            ),
+            "total_amount": (receipt_filter.min_total_amount, receipt_filter.max_total_amount),
+        }
+
+    def add(self, receipt: Dict[str, Any], embedding: List[float]) -> None:
+        self.add_many([receipt], [embedding])
+
+    def add_many(
+        self, receipts: List[Dict[str, Any]], embeddings: List[List[float]]
+    ) -> None:
+        """Add receipts with a single index append, flush and document log write."""
+        if not receipts:
+            return
+        with self._lock:
+            self.index.add(
+                embeddings,
+                {
+                    "transaction_time": [
+                        iso_to_timestamp(receipt["transaction_time"]) for receipt in receipts
+                    ],
+                    "total_amount": [float(receipt["total_amount"]) for receipt in receipts],
+                },
+            )
+            self.index.flush()
+            with open(self._documents_path, "a", encoding="utf-8") as file:
+                file.write(
+                    "".join(
+                        json.dumps(receipt, ensure_ascii=False) + "\n" for receipt in receipts
+                    )
+                )
+            for receipt in receipts:
+                self._remember(receipt)
+
+    def get(self, receipt_id: str) -> Dict[str, Any]:
+        row = self._rows_by_id.get(receipt_id)
+        return dict(self._documents[row]) if row is not None else {}
+
+    def existing_ids(self, receipt_ids: Iterable[str]) -> Set[str]:
+        return {receipt_id for receipt_id in receipt_ids if receipt_id in self._rows_by_id}
+
+    def filter(self, receipt_filter: ReceiptFilter) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.index.matching_rows(self._index_filters(receipt_filter))
+            return [dict(self._documents[row]) for row in rows]
+
+    def nearest(
+        self,
+        embedding: List[float],
+        limit: int,
+        receipt_filter: Optional[ReceiptFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            hits = self.index.search(embedding, limit, self._index_filters(receipt_filter))
+            return [dict(self._documents[row]) for row, _ in hits]
+
+    def keyword_search(
+        self,
+        query_text: str,
+        limit: int,
+        receipt_filter: Optional[ReceiptFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            filters = self._index_filters(receipt_filter)
+            allowed = None
+            if filters is not None:
+                rows = self.index.matching_rows(filters)
+                allowed = [self._documents[row]["receipt_id"] for row in rows]
+            hits = self._keywords.search(query_text, limit, allowed)
+            return [dict(self._documents[self._rows_by_id[receipt_id]]) for receipt_id, _ in hits]
+
+
+_STORE: Optional[ReceiptStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_receipt_store() -> ReceiptStore:
+    """Return the shared receipt store selected by RECEIPT_STORE_BACKEND."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            if SETTINGS.RECEIPT_STORE_BACKEND == "local":
+                _STORE = LocalReceiptStore(
+                    SETTINGS.LOCAL_STORE_DIR,
+                    dimension=SETTINGS.EMBEDDING_DIMENSION,
+                    distance=SETTINGS.VECTOR_DISTANCE,
+                    ann=SETTINGS.VECTOR_ANN_INDEX,
+                    nprobe=SETTINGS.VECTOR_IVF_NPROBE,
+                )
+            else:
+                _STORE = FirestoreReceiptStore(
+                    SETTINGS.DB_COLLECTION_NAME, distance=SETTINGS.VECTOR_DISTANCE
+                )
+        return _STORE
+
+
+def set_receipt_store(store: ReceiptStore) -> None:
+    """Replace the shared receipt store, e.g. with a temporary local store in tests."""
+    global _STORE
+    with _STORE_LOCK:
+        _STORE = store
@@ -1,25 +1,18 @@
 # expense_manager_agent/tools.py
 
+import asyncio
 import datetime
 from typing import Dict, List, Any
-from google.cloud import firestore
-from google.cloud.firestore_v1.vector import Vector
-from google.cloud.firestore_v1 import FieldFilter
-from google.cloud.firestore_v1.base_query import And
-from google.cloud.firestore_v1.base_vector_query import DistanceMeasure
 from settings import get_settings
-from google import genai
+from expense_manager_agent.embeddings import get_embedding_service
+from expense_manager_agent.executor import run_blocking
+from expense_manager_agent.keyword_index import reciprocal_rank_fusion
+from expense_manager_agent.receipt_store import ReceiptFilter, get_receipt_store
 
 SETTINGS = get_settings()
-DB_CLIENT = firestore.Client(
-    project=SETTINGS.GCLOUD_PROJECT_ID
-)  # Will use "(default)" database
-COLLECTION = DB_CLIENT.collection(SETTINGS.DB_COLLECTION_NAME)
-GENAI_CLIENT = genai.Client(
-    vertexai=True, location=SETTINGS.GCLOUD_LOCATION, project=SETTINGS.GCLOUD_PROJECT_ID
-)
-EMBEDDING_DIMENSION = 768
-EMBEDDING_FIELD_NAME = "embedding"
+EMBEDDING_DIMENSION = SETTINGS.EMBEDDING_DIMENSION
+# Each ranking fused by the hybrid search contributes this many candidates per result
+HYBRID_CANDIDATES_PER_RESULT = 4
 INVALID_ITEMS_FORMAT_ERR = """
 Invalid items format. Must be a list of dictionaries with 'name', 'price', and 'quantity' keys."""
 RECEIPT_DESC_FORMAT = """
@@ -41,7 +34,7 @@ def sanitize_image_id(image_id: str) -> str:
     return image_id.strip()
 
 
-def store_receipt_data(
+async def store_receipt_data(
     image_id: str,
     store_name: str,
     transaction_time: str,
@@ -76,7 +69,7 @@ def store_receipt_data(
         image_id = sanitize_image_id(image_id)
 
         # Check if the receipt already exists
-        doc = get_receipt_data_by_image_id(image_id)
+        doc = await get_receipt_data_by_image_id(image_id)
 
         if doc:
             return f"Receipt with ID {image_id} already exists"
@@ -109,20 +102,17 @@ def store_receipt_data(
                 _item["quantity"] = 1
 
         # Create a combined text from all receipt information for better embedding
-        result = GENAI_CLIENT.models.embed_content(
-            model="text-embedding-004",
-            contents=RECEIPT_DESC_FORMAT.format(
+        embedding = await get_embedding_service().aembed_document(
+            RECEIPT_DESC_FORMAT.format(
                 store_name=store_name,
                 transaction_time=transaction_time,
                 total_amount=total_amount,
                 currency=currency,
                 purchased_items=purchased_items,
                 receipt_id=image_id,
-            ),
+            )
         )
 
-        embedding = result.embeddings[0].values
-
         doc = {
             "receipt_id": image_id,
             "store_name": store_name,
@@ -130,17 +120,16 @@ def store_receipt_data(
             "total_amount": total_amount,
             "currency": currency,
             "purchased_items": purchased_items,
-            EMBEDDING_FIELD_NAME: Vector(embedding),
         }
 
-        COLLECTION.add(doc)
+        await run_blocking(get_receipt_store().add, doc, embedding)
 
         return f"Receipt stored successfully with ID: {image_id}"
     except Exception as e:
         raise Exception(f"Failed to store receipt: {str(e)}")
 
 
-def search_receipts_by_metadata_filter(
+async def search_receipts_by_metadata_filter(
     start_time: str,
     end_time: str,
     min_total_amount: float = -1.0,
@@ -171,36 +160,18 @@ def search_receipts_by_metadata_filter(
         except ValueError:
             raise ValueError("start_time and end_time must be strings in ISO format")
 
-        # Start with the base collection reference
-        query = COLLECTION
-
-        # Build the composite query by properly chaining conditions
         # Notes that this demo assume 1 user only,
         # need to refactor the query for multiple user
-        filters = [
-            FieldFilter("transaction_time", ">=", start_time),
-            FieldFilter("transaction_time", "<=", end_time),
-        ]
-
-        # Add optional filters
-        if min_total_amount != -1:
-            filters.append(FieldFilter("total_amount", ">=", min_total_amount))
-
-        if max_total_amount != -1:
-            filters.append(FieldFilter("total_amount", "<=", max_total_amount))
-
-        # Apply the filters
-        composite_filter = And(filters=filters)
-        query = query.where(filter=composite_filter)
+        receipt_filter = ReceiptFilter(
+            start_time=start_time,
+            end_time=end_time,
+            min_total_amount=min_total_amount if min_total_amount != -1 else None,
+            max_total_amount=max_total_amount if max_total_amount != -1 else None,
+        )
 
         # Execute the query and collect results
         search_result_description = "Search by Metadata Results:\n"
-        for doc in query.stream():
-            data = doc.to_dict()
-            data.pop(
-                EMBEDDING_FIELD_NAME, None
-            )  # Remove embedding as it's not needed for display
-
+        for data in await run_blocking(get_receipt_store().filter, receipt_filter):
             search_result_description += f"\n{RECEIPT_DESC_FORMAT.format(**data)}"
 
         return search_result_description
@@ -208,7 +179,7 @@ def search_receipts_by_metadata_filter(
         raise Exception(f"Error filtering receipts: {str(e)}")
 
 
-def search_relevant_receipts_by_natural_language_query(
+async def search_relevant_receipts_by_natural_language_query(
     query_text: str, limit: int = 5
 ) -> str:
     """
@@ -228,28 +199,110 @@ def search_relevant_receipts_by_natural_language_query(
         Exception: If the search failed or input is invalid.
     """
     try:
-        # Generate embedding for the query text
-        result = GENAI_CLIENT.models.embed_content(
-            model="text-embedding-004", contents=query_text
-        )
-        query_embedding = result.embeddings[0].values
+        # Generate embedding for the query text (cached for repeated queries)
+        query_embedding = await get_embedding_service().aembed_query(query_text)
 
         # Notes that this demo assume 1 user only,
         # need to refactor the query for multiple user
-        vector_query = COLLECTION.find_nearest(
-            vector_field=EMBEDDING_FIELD_NAME,
-            query_vector=Vector(query_embedding),
-            distance_measure=DistanceMeasure.EUCLIDEAN,
-            limit=limit,
-        )
+        receipts = await run_blocking(get_receipt_store().nearest, query_embedding, limit)
 
         # Execute the query and collect results
         search_result_description = "Search by Contextual Relevance Results:\n"
-        for doc in vector_query.stream():
-            data = doc.to_dict()
-            data.pop(
-                EMBEDDING_FIELD_NAME, None
-            )  # Remove embedding as it's not needed for display
+        for data in receipts:
+            search_result_description += f"\n{RECEIPT_DESC_FORMAT.format(**data)}"
+
+        return search_result_description
+    except Exception as e:
+        raise Exception(f"Error searching receipts: {str(e)}")
+
+
+async def search_receipts(
+    query_text: str = "",
+    start_time: str = "",
+    end_time: str = "",
+    min_total_amount: float = -1.0,
+    max_total_amount: float = -1.0,
+    use_keyword_match: bool = True,
+    limit: int = 5,
+) -> str:
+    """
+    Search receipts with metadata filters and contextual relevance in a single call.
+    Time and amount filters are applied first, the remaining receipts are ranked by
+    similarity to the query text, fused with keyword matches on store and item names.
+    Prefer this tool for queries that combine a topic with a time range or an amount,
+    e.g. "coffee in March over 50k".
+
+    Args:
+        query_text (str, optional): The search text (e.g., "coffee", "dinner", "groceries").
+            If empty, the most recent receipts matching the filters are returned.
+        start_time (str, optional): The start datetime for the filter (in ISO format,
+            e.g. 'YYYY-MM-DDTHH:MM:SS.ssssssZ'). Empty for no lower bound.
+        end_time (str, optional): The end datetime for the filter (in ISO format,
+            e.g. 'YYYY-MM-DDTHH:MM:SS.ssssssZ'). Empty for no upper bound.
+        min_total_amount (float, optional): The minimum total amount (inclusive). Defaults to -1 (no filter).
+        max_total_amount (float, optional): The maximum total amount (inclusive). Defaults to -1 (no filter).
+        use_keyword_match (bool, optional): Also rank by keyword matches on store and item names (default: True).
+        limit (int, optional): Maximum number of results to return (default: 5).
+
+    Returns:
+        str: A string containing the list of ranked receipt data matching all applied filters.
+
+    Raises:
+        Exception: If the search failed or input is invalid.
+    """
+    try:
+        for value in (start_time, end_time):
+            if not value:
+                continue
+            try:
+                datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                raise ValueError("start_time and end_time must be strings in ISO format")
+
+        # Notes that this demo assume 1 user only,
+        # need to refactor the query for multiple user
+        receipt_filter = ReceiptFilter(
+            start_time=start_time or None,
+            end_time=end_time or None,
+            min_total_amount=min_total_amount if min_total_amount != -1 else None,
+            max_total_amount=max_total_amount if max_total_amount != -1 else None,
+        )
+        store = get_receipt_store()
+
+        if not query_text.strip():
+            receipts = sorted(
+                await run_blocking(store.filter, receipt_filter),
+                key=lambda receipt: receipt["transaction_time"],
+                reverse=True,
+            )[:limit]
+        else:
+            candidate_limit = limit * HYBRID_CANDIDATES_PER_RESULT
+            searches = [
+                run_blocking(
+                    store.nearest,
+                    await get_embedding_service().aembed_query(query_text),
+                    candidate_limit,
+                    receipt_filter,
+                )
+            ]
+            if use_keyword_match:
+                searches.append(
+                    run_blocking(
+                        store.keyword_search, query_text, candidate_limit, receipt_filter
+                    )
+                )
+            rankings = await asyncio.gather(*searches)
+
+            receipts_by_id = {
+                receipt["receipt_id"]: receipt for ranking in rankings for receipt in ranking
+            }
+            fused = reciprocal_rank_fusion(
+                [[receipt["receipt_id"] for receipt in ranking] for ranking in rankings]
+            )
+            receipts = [receipts_by_id[receipt_id] for receipt_id, _ in fused[:limit]]
+
+        search_result_description = "Hybrid Search Results:\n"
+        for data in receipts:
             search_result_description += f"\n{RECEIPT_DESC_FORMAT.format(**data)}"
 
         return search_result_description
@@ -257,7 +310,7 @@ def search_relevant_receipts_by_natural_language_query(
         raise Exception(f"Error searching receipts: {str(e)}")
 
 
-def get_receipt_data_by_image_id(image_id: str) -> Dict[str, Any]:
+async def get_receipt_data_by_image_id(image_id: str) -> Dict[str, Any]:
     """
     Retrieve receipt data from the database using the image_id.
 
@@ -278,17 +331,7 @@ def get_receipt_data_by_image_id(image_id: str) -> Dict[str, Any]:
     # In case of it provide full image placeholder, extract the id string
     image_id = sanitize_image_id(image_id)
 
-    # Query the receipts collection for documents with matching receipt_id (image_id)
+    # Query the receipt store for the document with matching receipt_id (image_id)
     # Notes that this demo assume 1 user only,
     # need to refactor the query for multiple user
-    query = COLLECTION.where(filter=FieldFilter("receipt_id", "==", image_id)).limit(1)
-    docs = list(query.stream())
-
-    if not docs:
-        return {}
-
-    # Get the first matching document
-    doc_data = docs[0].to_dict()
-    doc_data.pop(EMBEDDING_FIELD_NAME, None)
-
-    return doc_data
\ No newline at end of file
+    return await run_blocking(get_receipt_store().get, image_id)
\ No newline at end of file
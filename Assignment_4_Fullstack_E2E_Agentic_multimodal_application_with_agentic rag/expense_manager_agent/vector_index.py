@@ -0,0 +1,427 @@
+# expense_manager_agent/vector_index.py
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # Optional dependency, only needed for ann="hnsw"
+    hnswlib = None
+
+METRICS = ("cosine", "euclidean")
+ANN_METHODS = ("none", "ivf", "hnsw")
+
+# Rows scored per matrix multiplication, bounds memory use of brute force search
+SCAN_CHUNK_ROWS = 65536
+INITIAL_CAPACITY = 1024
+
+
+def _create_file(path: str, size: int) -> None:
+    with open(path, "ab"):
+        pass
+    if os.path.getsize(path) < size:
+        os.truncate(path, size)
+
+
+class VectorIndex:
+    """Embedding matrix kept in a memory-mapped float32 file on disk.
+
+    Next to the vectors the index stores numeric filter columns (e.g. the
+    transaction time as epoch seconds and the total amount), so metadata
+    pre-filters and vector search are evaluated together: the filter mask is
+    computed with one vectorized pass over the columns and only the matching
+    rows are scored.
+
+    Search is brute force by default. An approximate index can be built with
+    ``build_ann``: "ivf" (k-means inverted lists, pure NumPy) or "hnsw" (needs
+    the optional ``hnswlib`` package). Filters that match at most
+    ``brute_force_threshold`` rows are always searched exactly.
+
+    Attributes:
+        directory: Directory holding the index files.
+        dimension: Dimension of the vectors.
+        metric: Distance metric, "cosine" or "euclidean".
+        columns: Names of the numeric filter columns.
+        count: Number of vectors stored.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dimension: int,
+        metric: str = "cosine",
+        columns: Sequence[str] = (),
+        nprobe: int = 8,
+        hnsw_ef_search: int = 64,
+        brute_force_threshold: int = 20000,
+    ):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {METRICS}")
+
+        self.directory = directory
+        self.dimension = dimension
+        self.metric = metric
+        self.columns = list(columns)
+        self.nprobe = nprobe
+        self.hnsw_ef_search = hnsw_ef_search
+        self.brute_force_threshold = brute_force_threshold
+        self.count = 0
+        self.capacity = 0
+        self.ann = "none"
+
+        self._ivf_centroids: Optional[np.ndarray] = None
+        self._ivf_lists: List[np.ndarray] = []
+        self._hnsw = None
+
+        os.makedirs(directory, exist_ok=True)
+        header_path = os.path.join(directory, "header.json")
+        if os.path.exists(header_path):
+            with open(header_path, "r") as file:
+                header = json.load(file)
+            if header["dimension"] != dimension or header["metric"] != metric:
+                raise ValueError(
+                    f"Index in {directory} was built with dimension {header['dimension']} "
+                    f"and metric {header['metric']}"
+                )
+            self.count = header["count"]
+            self.capacity = header["capacity"]
+            self.columns = header["columns"]
+            self._map()
+            self._load_ann(header.get("ann", "none"))
+        else:
+            self._grow(INITIAL_CAPACITY)
+
+    # --- Storage ---
+
+    def _files(self) -> List[Tuple[str, np.dtype, int]]:
+        files = [
+            ("vectors.f32", np.float32, self.dimension),
+            ("sq_norms.f32", np.float32, 1),
+        ]
+        files.extend((f"column_{name}.f64", np.float64, 1) for name in self.columns)
+        return files
+
+    def _map(self) -> None:
+        maps = []
+        for name, dtype, width in self._files():
+            shape = (self.capacity, width) if width > 1 else (self.capacity,)
+            path = os.path.join(self.directory, name)
+            maps.append(np.memmap(path, dtype=dtype, mode="r+", shape=shape))
+        self._vectors, self._sq_norms = maps[0], maps[1]
+        self._columns: Dict[str, np.memmap] = dict(zip(self.columns, maps[2:]))
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, self.capacity * 2, INITIAL_CAPACITY)
+        if self.capacity:
+            self.flush()
+        for name, dtype, width in self._files():
+            size = capacity * width * np.dtype(dtype).itemsize
+            _create_file(os.path.join(self.directory, name), size)
+        self.capacity = capacity
+        self._map()
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+        self._write_header()
+
+    def _write_header(self) -> None:
+        header = {
+            "dimension": self.dimension,
+            "metric": self.metric,
+            "columns": self.columns,
+            "count": self.count,
+            "capacity": self.capacity,
+            "ann": self.ann,
+        }
+        with open(os.path.join(self.directory, "header.json"), "w") as file:
+            json.dump(header, file)
+
+    def flush(self) -> None:
+        """Write pending changes of the memory maps to disk."""
+        self._vectors.flush()
+        self._sq_norms.flush()
+        for column in self._columns.values():
+            column.flush()
+        self._write_header()
+
+    def close(self) -> None:
+        """Flush the vectors and persist the ANN index.
+
+        Rows added after the ANN index was last saved are re-inserted into it
+        when the index is opened again, so this is only an optimization.
+        """
+        self.flush()
+        self._save_ann()
+
+    # --- Writes ---
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors
+
+    def add(
+        self, vectors: np.ndarray, columns: Optional[Dict[str, Sequence[float]]] = None
+    ) -> np.ndarray:
+        """Append vectors with their filter column values.
+
+        Args:
+            vectors (np.ndarray): Array of shape (n, dimension).
+            columns (Dict[str, Sequence[float]], optional): Values per filter column,
+                missing columns are stored as NaN (never matching a filter).
+
+        Returns:
+            np.ndarray: The row ids assigned to the vectors.
+        """
+        vectors = self._prepare(np.atleast_2d(vectors))
+        n = len(vectors)
+        if self.count + n > self.capacity:
+            self._grow(self.count + n)
+
+        ids = np.arange(self.count, self.count + n)
+        self._vectors[ids[0] : ids[-1] + 1] = vectors
+        self._sq_norms[ids[0] : ids[-1] + 1] = np.einsum("ij,ij->i", vectors, vectors)
+        columns = columns or {}
+        for name, column in self._columns.items():
+            column[ids[0] : ids[-1] + 1] = columns.get(name, np.full(n, np.nan))
+        self.count += n
+
+        if self._ivf_centroids is not None:
+            for list_id, row in zip(self._assign(vectors), ids):
+                self._ivf_lists[list_id] = np.append(self._ivf_lists[list_id], row)
+        if self._hnsw is not None:
+            self._hnsw.add_items(vectors, ids)
+        self._write_header()
+        return ids
+
+    # --- Search ---
+
+    def filter_mask(
+        self, filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]]
+    ) -> Optional[np.ndarray]:
+        """Boolean mask of the rows whose columns lie within the inclusive ranges.
+
+        Args:
+            filters (Dict[str, Tuple[Optional[float], Optional[float]]]): Column name to
+                (low, high) range, either bound may be None.
+
+        Returns:
+            Optional[np.ndarray]: Mask over the stored rows, None if there is no filter.
+        """
+        mask = None
+        for name, (low, high) in (filters or {}).items():
+            values = self._columns[name][: self.count]
+            for bound, compare in ((low, np.greater_equal), (high, np.less_equal)):
+                if bound is None:
+                    continue
+                condition = compare(values, bound)
+                mask = condition if mask is None else mask & condition
+        return mask
+
+    def matching_rows(
+        self, filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]]
+    ) -> np.ndarray:
+        """Ids of the rows that satisfy the filters, in insertion order."""
+        mask = self.filter_mask(filters)
+        return np.arange(self.count) if mask is None else np.flatnonzero(mask)
+
+    def _distances(self, query: np.ndarray, rows: np.ndarray, sq_norms: np.ndarray) -> np.ndarray:
+        scores = rows @ query
+        if self.metric == "cosine":
+            return 1.0 - scores
+        return np.sqrt(np.maximum(sq_norms - 2.0 * scores + query @ query, 0.0))
+
+    def _scan(self, query: np.ndarray, ids: Optional[np.ndarray], k: int) -> List[Tuple[int, float]]:
+        """Exact top-k over the given row ids (all rows when ids is None)."""
+        total = self.count if ids is None else len(ids)
+        best_ids = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0, dtype=np.float32)
+        for start in range(0, total, SCAN_CHUNK_ROWS):
+            if ids is None:
+                chunk_ids = np.arange(start, min(start + SCAN_CHUNK_ROWS, total))
+                rows = self._vectors[start : start + len(chunk_ids)]
+                sq_norms = self._sq_norms[start : start + len(chunk_ids)]
+            else:
+                chunk_ids = ids[start : start + SCAN_CHUNK_ROWS]
+                rows = self._vectors[chunk_ids]
+                sq_norms = self._sq_norms[chunk_ids]
+            distances = self._distances(query, rows, sq_norms)
+            best_ids = np.concatenate([best_ids, chunk_ids])
+            best_distances = np.concatenate([best_distances, distances])
+            if len(best_ids) > k:
+                keep = np.argpartition(best_distances, k - 1)[:k]
+                best_ids, best_distances = best_ids[keep], best_distances[keep]
+
+        order = np.argsort(best_distances, kind="stable")
+        return [(int(best_ids[i]), float(best_distances[i])) for i in order]
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 5,
+        filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        exact: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """Find the k nearest rows that satisfy the filters.
+
+        Args:
+            query (Sequence[float]): The query vector.
+            k (int): Number of results.
+            filters (Dict[str, Tuple[Optional[float], Optional[float]]], optional):
+                Inclusive column ranges, see ``filter_mask``.
+            exact (bool): Force brute force search even when an ANN index exists.
+
+        Returns:
+            List[Tuple[int, float]]: (row id, distance) pairs, nearest first.
+        """
+        if self.count == 0 or k <= 0:
+            return []
+        query = self._prepare(query)
+        mask = self.filter_mask(filters)
+        candidates = None if mask is None else np.flatnonzero(mask)
+
+        # Small or highly selective searches are cheaper (and exact) by brute force
+        matches = self.count if candidates is None else len(candidates)
+        if exact or self.ann == "none" or matches <= self.brute_force_threshold:
+            return self._scan(query, candidates, k)
+        if self.ann == "ivf":
+            if self._ivf_centroids is None:
+                # Built while (nearly) empty: train once the index has grown
+                self._train_ivf(max(1, int(np.sqrt(self.count))), iterations=10)
+                self._save_ann()
+            return self._search_ivf(query, mask, k)
+        return self._search_hnsw(query, mask, k)
+
+    # --- Approximate indexes ---
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        centroids = self._ivf_centroids
+        scores = vectors @ centroids.T
+        if self.metric == "cosine":
+            return np.argmax(scores, axis=1)
+        centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+        return np.argmin(centroid_norms - 2.0 * scores, axis=1)
+
+    def build_ann(self, method: str, nlist: Optional[int] = None, iterations: int = 10) -> None:
+        """(Re)build an approximate index over all stored vectors.
+
+        Args:
+            method (str): "ivf", "hnsw" or "none" to drop the ANN index.
+            nlist (int, optional): Number of IVF lists, defaults to sqrt(count).
+            iterations (int): Number of k-means iterations for IVF training.
+        """
+        if method not in ANN_METHODS:
+            raise ValueError(f"Unknown ANN method {method}, expected one of {ANN_METHODS}")
+        if method == "hnsw" and hnswlib is None:
+            raise ImportError("ann='hnsw' requires the hnswlib package")
+
+        self._ivf_centroids, self._ivf_lists, self._hnsw = None, [], None
+        self.ann = method
+        if method == "ivf" and self.count:
+            self._train_ivf(nlist or max(1, int(np.sqrt(self.count))), iterations)
+        elif method == "hnsw":
+            self._hnsw = hnswlib.Index(
+                space="cosine" if self.metric == "cosine" else "l2", dim=self.dimension
+            )
+            self._hnsw.init_index(max_elements=self.capacity, ef_construction=200, M=16)
+            for start in range(0, self.count, SCAN_CHUNK_ROWS):
+                stop = min(start + SCAN_CHUNK_ROWS, self.count)
+                self._hnsw.add_items(self._vectors[start:stop], np.arange(start, stop))
+        self.close()
+
+    def _train_ivf(self, nlist: int, iterations: int) -> None:
+        rng = np.random.default_rng(0)
+        nlist = min(nlist, self.count)
+        sample_size = min(self.count, nlist * 32)
+        sample = self._vectors[np.sort(rng.choice(self.count, sample_size, replace=False))]
+        self._ivf_centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = self._assign(sample)
+            order = np.argsort(assignment, kind="stable")
+            sizes = np.bincount(assignment, minlength=nlist)
+            filled = sizes > 0  # Empty lists keep their previous centroid
+            starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])[filled]
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            self._ivf_centroids[filled] = sums / sizes[filled, None]
+            if self.metric == "cosine":
+                self._ivf_centroids = self._prepare(self._ivf_centroids)
+
+        assignment = np.concatenate(
+            [
+                self._assign(self._vectors[start : min(start + SCAN_CHUNK_ROWS, self.count)])
+                for start in range(0, self.count, SCAN_CHUNK_ROWS)
+            ]
+        )
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        self._ivf_lists = [order[bounds[i] : bounds[i + 1]] for i in range(nlist)]
+
+    def _search_ivf(self, query: np.ndarray, mask: Optional[np.ndarray], k: int) -> List[Tuple[int, float]]:
+        centroid_distances = self._distances(
+            query,
+            self._ivf_centroids,
+            np.einsum("ij,ij->i", self._ivf_centroids, self._ivf_centroids),
+        )
+        # Probe the nearest lists; with a filter keep probing until k rows match
+        selected, found = [], 0
+        for probed, list_id in enumerate(np.argsort(centroid_distances)):
+            if probed >= self.nprobe and found >= k:
+                break
+            rows = self._ivf_lists[list_id]
+            if mask is not None:
+                rows = rows[mask[rows]]
+            selected.append(rows)
+            found += len(rows)
+        return self._scan(query, np.sort(np.concatenate(selected)), k)
+
+    def _search_hnsw(self, query: np.ndarray, mask: Optional[np.ndarray], k: int) -> List[Tuple[int, float]]:
+        k = min(k, self.count if mask is None else int(mask.sum()))
+        if k == 0:
+            return []
+        self._hnsw.set_ef(max(self.hnsw_ef_search, k))
+        accept = None if mask is None else (lambda row: bool(mask[row]))
+        labels, distances = self._hnsw.knn_query(query, k=k, filter=accept)
+        if self.metric == "euclidean":
+            distances = np.sqrt(distances)  # hnswlib reports squared L2
+        return [(int(row), float(d)) for row, d in zip(labels[0], distances[0])]
+
+    def _save_ann(self) -> None:
+        if self._ivf_centroids is not None:
+            lengths = np.array([len(ids) for ids in self._ivf_lists])
+            np.savez(
+                os.path.join(self.directory, "ivf.npz"),
+                centroids=self._ivf_centroids,
+                lengths=lengths,
+                ids=np.concatenate(self._ivf_lists) if self._ivf_lists else lengths,
+            )
+        if self._hnsw is not None:
+            self._hnsw.save_index(os.path.join(self.directory, "hnsw.bin"))
+
+    def _load_ann(self, method: str) -> None:
+        self.ann = method
+        ivf_path = os.path.join(self.directory, "ivf.npz")
+        if method == "ivf" and os.path.exists(ivf_path):  # Missing until trained
+            data = np.load(ivf_path)
+            self._ivf_centroids = data["centroids"]
+            bounds = np.concatenate([[0], np.cumsum(data["lengths"])])
+            self._ivf_lists = [data["ids"][bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)]
+            covered = int(bounds[-1])
+            if covered < self.count:
+                missing = self._vectors[covered : self.count]
+                for list_id, row in zip(self._assign(missing), range(covered, self.count)):
+                    self._ivf_lists[list_id] = np.append(self._ivf_lists[list_id], row)
+        elif method == "hnsw":
+            if hnswlib is None:
+                raise ImportError("Index was built with HNSW, which requires the hnswlib package")
+            self._hnsw = hnswlib.Index(
+                space="cosine" if self.metric == "cosine" else "l2", dim=self.dimension
+            )
+            self._hnsw.load_index(os.path.join(self.directory, "hnsw.bin"), max_elements=self.capacity)
+            covered = self._hnsw.get_current_count()
+            if covered < self.count:
+                self._hnsw.add_items(self._vectors[covered : self.count], np.arange(covered, self.count))
@@ -2,14 +2,17 @@ import mimetypes
 import gradio as gr
 import requests
 import base64
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from settings import get_settings
 from PIL import Image
 import io
-from schema import ImageData, ChatRequest, ChatResponse
+from urllib.parse import urljoin
+from schema import ImageData, ChatRequest, ChatResponse, ChatStreamEvent
 
 
 SETTINGS = get_settings()
+STREAM_BACKEND_URL = f"{SETTINGS.BACKEND_URL.rstrip('/')}/stream"
+THINKING_TITLE = "🧠 Thinking Process"
 
 
 def encode_image_to_base64_and_get_mime_type(image_path: str) -> ImageData:
@@ -57,18 +60,14 @@ def decode_base64_to_image(base64_data: str) -> Image.Image:
     return image
 
 
-def get_response_from_llm_backend(
-    message: Dict[str, Any],
-    history: List[Dict[str, Any]],
-) -> List[str | gr.Image]:
-    """Send the message and history to the backend and get a response.
+def build_chat_request(message: Dict[str, Any]) -> ChatRequest:
+    """Build the backend request for a chat message.
 
     Args:
         message: Dictionary containing the current message with 'text' and optional 'files' keys.
-        history: List of previous message dictionaries in the conversation.
 
     Returns:
-        List containing text response and any image attachments from the backend service.
+        ChatRequest with the message text and base64 encoded images.
     """
     # Extract files and convert to base64
     image_data = []
@@ -76,49 +75,164 @@ def get_response_from_llm_backend(
         for file_path in uploaded_files:
             image_data.append(encode_image_to_base64_and_get_mime_type(file_path))
 
-    # Prepare the request payload
-    payload = ChatRequest(
+    return ChatRequest(
         text=message["text"],
         files=image_data,
         session_id="default_session",
         user_id="default_user",
     )
 
+
+def build_chat_messages(result: ChatResponse) -> List[str | gr.ChatMessage | gr.Image]:
+    """Convert a backend response into chat messages.
+
+    Args:
+        result: The complete response from the backend.
+
+    Returns:
+        List containing the thinking process, text response and any image attachments.
+    """
+    if result.error:
+        return [f"Error: {result.error}"]
+
+    chat_responses = []
+
+    if result.thinking_process:
+        chat_responses.append(
+            gr.ChatMessage(
+                role="assistant",
+                content=result.thinking_process,
+                metadata={"title": THINKING_TITLE},
+            )
+        )
+
+    chat_responses.append(gr.ChatMessage(role="assistant", content=result.response))
+
+    if result.attachments:
+        for attachment in result.attachments:
+            if attachment.url:
+                # Served by the backend /attachments endpoint instead of inline
+                response = requests.get(urljoin(SETTINGS.BACKEND_URL, attachment.url))
+                response.raise_for_status()
+                image = Image.open(io.BytesIO(response.content))
+            else:
+                image = decode_base64_to_image(attachment.serialized_image)
+            chat_responses.append(gr.Image(image))
+
+    return chat_responses
+
+
+def iter_sse_events(response: requests.Response) -> Iterator[ChatStreamEvent]:
+    """Parse server-sent events from a streaming HTTP response.
+
+    Args:
+        response: Streaming response of the backend /chat/stream endpoint.
+
+    Yields:
+        ChatStreamEvent for every event received.
+    """
+    data_lines = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("data:"):
+            data_lines.append(line[len("data:") :].strip())
+        elif not line and data_lines:
+            yield ChatStreamEvent.model_validate_json("\n".join(data_lines))
+            data_lines = []
+
+
+def stream_response_from_llm_backend(
+    message: Dict[str, Any],
+    history: List[Dict[str, Any]],
+) -> Iterator[List[str | gr.ChatMessage | gr.Image]]:
+    """Send the message to the streaming backend endpoint and render the reply incrementally.
+
+    Args:
+        message: Dictionary containing the current message with 'text' and optional 'files' keys.
+        history: List of previous message dictionaries in the conversation.
+
+    Yields:
+        The chat messages rendered so far: the thinking process with tool progress,
+        the partial text response and, once complete, any image attachments.
+    """
+    payload = build_chat_request(message)
+    thinking_process = ""
+    response_text = ""
+    tool_progress: List[str] = []
+
+    try:
+        with requests.post(
+            STREAM_BACKEND_URL, json=payload.model_dump(), stream=True
+        ) as response:
+            response.raise_for_status()  # Raise exception for HTTP errors
+
+            for event in iter_sse_events(response):
+                if event.type == "final":
+                    yield build_chat_messages(event.response)
+                    return
+                if event.type == "error":
+                    yield [f"Error: {event.text}"]
+                    return
+
+                if event.type == "thinking":
+                    thinking_process += event.text
+                elif event.type == "text":
+                    response_text += event.text
+                elif event.type == "tool_call":
+                    tool_progress.append(f"🔧 Calling `{event.tool_name}`...")
+                elif event.type == "tool_result":
+                    tool_progress.append(f"✅ `{event.tool_name}` finished")
+
+                chat_responses = []
+                if thinking_process or tool_progress:
+                    chat_responses.append(
+                        gr.ChatMessage(
+                            role="assistant",
+                            content="\n\n".join(
+                                filter(None, [thinking_process, *tool_progress])
+                            ),
+                            metadata={"title": THINKING_TITLE, "status": "pending"},
+                        )
+                    )
+                if response_text:
+                    chat_responses.append(
+                        gr.ChatMessage(role="assistant", content=response_text)
+                    )
+                if chat_responses:
+                    yield chat_responses
+    except requests.exceptions.RequestException as e:
+        yield [f"Error connecting to backend service: {str(e)}"]
+
+
+def get_response_from_llm_backend(
+    message: Dict[str, Any],
+    history: List[Dict[str, Any]],
+) -> List[str | gr.Image]:
+    """Send the message and history to the backend and get a response.
+
+    Args:
+        message: Dictionary containing the current message with 'text' and optional 'files' keys.
+        history: List of previous message dictionaries in the conversation.
+
+    Returns:
+        List containing text response and any image attachments from the backend service.
+    """
+    # Prepare the request payload
+    payload = build_chat_request(message)
+
     # Send request to backend
     try:
         response = requests.post(SETTINGS.BACKEND_URL, json=payload.model_dump())
         response.raise_for_status()  # Raise exception for HTTP errors
 
         result = ChatResponse(**response.json())
-        if result.error:
-            return [f"Error: {result.error}"]
-
-        chat_responses = []
-
-        if result.thinking_process:
-            chat_responses.append(
-                gr.ChatMessage(
-                    role="assistant",
-                    content=result.thinking_process,
-                    metadata={"title": "🧠 Thinking Process"},
-                )
-            )
-
-        chat_responses.append(gr.ChatMessage(role="assistant", content=result.response))
-
-        if result.attachments:
-            for attachment in result.attachments:
-                image_data = attachment.serialized_image
-                chat_responses.append(gr.Image(decode_base64_to_image(image_data)))
-
-        return chat_responses
+        return build_chat_messages(result)
     except requests.exceptions.RequestException as e:
         return [f"Error connecting to backend service: {str(e)}"]
 
 
 if __name__ == "__main__":
     demo = gr.ChatInterface(
-        get_response_from_llm_backend,
+        stream_response_from_llm_backend,
         title="Personal Expense Assistant",
         description="This assistant can help you to store receipts data, find receipts, and track your expenses during certain period.",
         type="messages",
@@ -0,0 +1,69 @@
+"""
+Bulk ingestion of receipt images into the receipt store.
+
+Extracts the receipt data of every image in a folder or a zip / tar archive
+with Gemini, embeds the receipts in batches and writes them with batched
+writes to the store selected by RECEIPT_STORE_BACKEND. Images already stored
+are skipped. Progress is recorded in a checkpoint file, so an interrupted run
+continues where it stopped when started again with the same checkpoint.
+The images themselves are not stored, so the assistant cannot show them.
+
+Usage:
+    uv run python ingest_receipts.py path/to/receipts
+    uv run python ingest_receipts.py receipts.zip --concurrency 16 --batch-size 128
+"""
+
+import argparse
+import asyncio
+
+from expense_manager_agent.embeddings import get_embedding_service
+from expense_manager_agent.ingestion import (
+    IngestionCheckpoint,
+    IngestionStats,
+    get_receipt_extractor,
+    ingest_receipts,
+    iter_receipt_images,
+)
+from expense_manager_agent.receipt_store import get_receipt_store
+from settings import get_settings
+
+SETTINGS = get_settings()
+
+
+def print_progress(stats: IngestionStats) -> None:
+    print(
+        f"{stats.images:>7} images {stats.stored:>7} stored {stats.duplicates:>6} duplicates "
+        f"{stats.resumed:>6} resumed {stats.failed:>5} failed "
+        f"{stats.images_per_second:>7.2f} images/s",
+        flush=True,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", help="Folder, zip or tar archive of receipt images")
+    parser.add_argument("--checkpoint", default="ingest_checkpoint.jsonl")
+    parser.add_argument("--concurrency", type=int, default=SETTINGS.INGEST_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=SETTINGS.INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    stats = await ingest_receipts(
+        iter_receipt_images(args.source),
+        extractor=get_receipt_extractor(),
+        store=get_receipt_store(),
+        embedding_service=get_embedding_service(),
+        checkpoint=IngestionCheckpoint(args.checkpoint),
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        progress=print_progress,
+    )
+    print(
+        f"Done in {stats.elapsed_seconds:.1f} s: {stats.stored} stored, "
+        f"{stats.duplicates} duplicates, {stats.resumed} resumed, {stats.failed} failed"
+    )
+    if stats.failed:
+        print("Failed images are retried when the ingestion is run again")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Load test for the backend /chat endpoint.
+
+Runs increasing numbers of concurrent virtual users against a running backend.
+Every virtual user has its own user and session id and sends its requests one
+after another, so with a non-blocking backend the throughput should grow with
+the number of concurrent sessions instead of staying flat.
+
+Pass --same-user to send all requests as one user instead, which exercises
+the per-user concurrency limit (excess requests queue or get HTTP 429).
+
+Usage:
+    uv run python load_test_backend.py
+    uv run python load_test_backend.py --concurrency 1 4 16 --requests-per-user 3
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List, Tuple
+
+import httpx
+
+from schema import ChatRequest
+from settings import get_settings
+
+SETTINGS = get_settings()
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    url: str,
+    user_id: str,
+    requests: int,
+    message: str,
+) -> List[Tuple[float, int]]:
+    """Send requests sequentially in one session, returning (latency, status) pairs."""
+    session_id = f"load-{uuid.uuid4().hex[:8]}"
+    results = []
+    for _ in range(requests):
+        payload = ChatRequest(text=message, session_id=session_id, user_id=user_id)
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, json=payload.model_dump())
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        results.append((time.perf_counter() - started, status))
+    return results
+
+
+async def run_level(args: argparse.Namespace, concurrency: int) -> Tuple[float, List[Tuple[float, int]]]:
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        started = time.perf_counter()
+        per_user = await asyncio.gather(
+            *(
+                virtual_user(
+                    client,
+                    args.url,
+                    "load-user" if args.same_user else f"load-user-{index}",
+                    args.requests_per_user,
+                    args.message,
+                )
+                for index in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    return elapsed, [result for results in per_user for result in results]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=SETTINGS.BACKEND_URL)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests-per-user", type=int, default=2)
+    parser.add_argument("--message", default="How much did I spend on coffee last month?")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--same-user", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'users':>6} {'requests':>9} {'ok':>5} {'429':>5} {'errors':>7} "
+          f"{'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'scaling':>8}")
+    baseline = None
+    for concurrency in args.concurrency:
+        elapsed, results = await run_level(args, concurrency)
+        latencies = [latency for latency, status in results if status == 200]
+        throughput = len(latencies) / elapsed if elapsed else 0.0
+        baseline = baseline or throughput
+        rejected = sum(1 for _, status in results if status == 429)
+        print(
+            f"{concurrency:>6} {len(results):>9} {len(latencies):>5} {rejected:>5} "
+            f"{len(results) - len(latencies) - rejected:>7} {throughput:>7.2f} "
+            f"{percentile(latencies, 0.5):>7.2f} {percentile(latencies, 0.95):>7.2f} "
+            f"{throughput / baseline if baseline else 0.0:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
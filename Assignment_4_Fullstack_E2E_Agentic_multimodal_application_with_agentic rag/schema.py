@@ -15,7 +15,7 @@ limitations under the License.
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class ImageData(BaseModel):
@@ -24,10 +24,12 @@ class ImageData(BaseModel):
     Attributes:
         serialized_image: Optional Base64 encoded string of the image content.
         mime_type: MIME type of the image.
+        url: Optional URL to download the image from instead, relative to the backend.
     """
 
-    serialized_image: str
+    serialized_image: str = ""
     mime_type: str
+    url: Optional[str] = None
 
 
 class ChatRequest(BaseModel):
@@ -60,3 +62,55 @@ class ChatResponse(BaseModel):
     thinking_process: str = ""
     attachments: List[ImageData] = []
     error: Optional[str] = None
+
+
+class ChatStreamEvent(BaseModel):
+    """Model for one server-sent event of the streaming chat endpoint.
+
+    Attributes:
+        type: Event type, one of "thinking", "text", "tool_call", "tool_result",
+            "final" or "error".
+        text: Text delta for "thinking" and "text" events, message for "error" events.
+        tool_name: Name of the tool for "tool_call" and "tool_result" events.
+        response: The complete response for the "final" event.
+    """
+
+    type: Literal["thinking", "text", "tool_call", "tool_result", "final", "error"]
+    text: str = ""
+    tool_name: str = ""
+    response: Optional[ChatResponse] = None
+
+
+class BulkIngestRequest(BaseModel):
+    """Model for a bulk receipt ingestion request.
+
+    Only the extracted receipt data is stored, not the images: receipts
+    ingested in bulk have no image artifact to return as an attachment.
+
+    Attributes:
+        files: List of receipt images to extract and store.
+        user_id: User identifier, for the per-user request limit.
+    """
+
+    files: List[ImageData]
+    user_id: str = "default_user"
+
+
+class BulkIngestResponse(BaseModel):
+    """Model for the result of a bulk receipt ingestion.
+
+    Attributes:
+        images: Number of images received.
+        stored: Number of new receipts stored.
+        duplicates: Number of images already stored or repeated in the request.
+        failed: Number of images whose receipt data could not be extracted.
+        elapsed_seconds: Duration of the ingestion.
+        images_per_second: Throughput of the ingestion.
+    """
+
+    images: int
+    stored: int
+    duplicates: int
+    failed: int
+    elapsed_seconds: float
+    images_per_second: float
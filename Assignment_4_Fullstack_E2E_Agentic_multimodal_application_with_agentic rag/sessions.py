@@ -0,0 +1,261 @@
+import asyncio
+import datetime
+import os
+import time
+from typing import List, Optional, Protocol
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from settings import get_settings
+import logger
+
+SETTINGS = get_settings()
+
+
+def create_session_service() -> BaseSessionService:
+    """Create the session service selected by SESSION_BACKEND.
+
+    "memory" keeps sessions in the process, so they are lost on restart and not
+    shared between workers. "database" stores them with SQLAlchemy at
+    SESSION_DB_URL (e.g. SQLite, or Postgres to share them between replicas).
+    """
+    if SETTINGS.SESSION_BACKEND == "memory":
+        return InMemorySessionService()
+    if SETTINGS.SESSION_BACKEND == "database":
+        from google.adk.sessions import DatabaseSessionService
+
+        if SETTINGS.SESSION_DB_URL.startswith("sqlite:///"):
+            directory = os.path.dirname(SETTINGS.SESSION_DB_URL[len("sqlite:///") :])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        return DatabaseSessionService(db_url=SETTINGS.SESSION_DB_URL)
+    raise ValueError(f"Unknown session backend: {SETTINGS.SESSION_BACKEND}")
+
+
+def compaction_cutoff(authors: List[str], max_events: int) -> int:
+    """Number of oldest events to drop so at most max_events remain.
+
+    The kept history starts at a user message, so no invocation is cut in half
+    (e.g. a function response without its function call). Returns 0 if the
+    history is short enough or no user message starts a short enough suffix.
+
+    Args:
+        authors (List[str]): Authors of the session events, oldest first.
+        max_events (int): Maximum number of events to keep.
+
+    Returns:
+        int: The number of events to drop.
+    """
+    if len(authors) <= max_events:
+        return 0
+    for index in range(len(authors) - max_events, len(authors)):
+        if authors[index] == "user":
+            return index
+    return 0
+
+
+class SessionMaintenance(Protocol):
+    """Evicts idle sessions and compacts long event histories of a session service."""
+
+    def evict_expired(self, app_name: str, ttl_seconds: float) -> int: ...
+
+    def compact(self, app_name: str, max_events: int) -> int: ...
+
+
+class InMemorySessionMaintenance:
+    """Maintenance of an InMemorySessionService, working on its session storage."""
+
+    def __init__(self, session_service: InMemorySessionService):
+        self.session_service = session_service
+
+    def evict_expired(self, app_name: str, ttl_seconds: float) -> int:
+        """Delete sessions idle for longer than the TTL, returning how many."""
+        cutoff = time.time() - ttl_seconds
+        users = self.session_service.sessions.get(app_name, {})
+        evicted = 0
+        for user_id in list(users):
+            sessions = users[user_id]
+            for session_id in [
+                session_id
+                for session_id, session in sessions.items()
+                if session.last_update_time < cutoff
+            ]:
+                del sessions[session_id]
+                evicted += 1
+            if not sessions:
+                del users[user_id]
+                self.session_service.user_state.get(app_name, {}).pop(user_id, None)
+        return evicted
+
+    def compact(self, app_name: str, max_events: int) -> int:
+        """Drop the oldest invocations of long sessions, returning the events dropped."""
+        dropped = 0
+        for sessions in self.session_service.sessions.get(app_name, {}).values():
+            for session in sessions.values():
+                events: List[Event] = session.events
+                cutoff = compaction_cutoff([event.author for event in events], max_events)
+                if cutoff:
+                    del events[:cutoff]
+                    dropped += cutoff
+        return dropped
+
+
+class DatabaseSessionMaintenance:
+    """Maintenance of a DatabaseSessionService with bulk SQL statements."""
+
+    def __init__(self, session_service: BaseSessionService):
+        from google.adk.sessions.database_session_service import (
+            StorageEvent,
+            StorageSession,
+        )
+
+        self.session_service = session_service
+        self.StorageEvent = StorageEvent
+        self.StorageSession = StorageSession
+
+    def _session_timestamp(self, value: datetime.datetime) -> float:
+        # Same convention as the session service: SQLite returns naive UTC times
+        if self.session_service.db_engine.dialect.name == "sqlite":
+            return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+        return value.timestamp()
+
+    def evict_expired(self, app_name: str, ttl_seconds: float) -> int:
+        """Delete sessions without activity for longer than the TTL, returning how many.
+
+        The session row is only updated on state changes, so the last activity is
+        the later of its update time and its newest event. Events are removed by
+        the cascading foreign key.
+        """
+        from sqlalchemy import and_, delete, func, select, tuple_
+
+        Session, Event = self.StorageSession, self.StorageEvent
+        latest_events = (
+            select(
+                Event.user_id,
+                Event.session_id,
+                func.max(Event.timestamp).label("latest"),
+            )
+            .where(Event.app_name == app_name)
+            .group_by(Event.user_id, Event.session_id)
+            .subquery()
+        )
+        query = (
+            select(Session.user_id, Session.id, Session.update_time, latest_events.c.latest)
+            .outerjoin(
+                latest_events,
+                and_(
+                    latest_events.c.user_id == Session.user_id,
+                    latest_events.c.session_id == Session.id,
+                ),
+            )
+            .where(Session.app_name == app_name)
+        )
+
+        cutoff = time.time() - ttl_seconds
+        with self.session_service.database_session_factory() as sql_session:
+            expired = [
+                (user_id, session_id)
+                for user_id, session_id, update_time, latest in sql_session.execute(query)
+                if max(
+                    self._session_timestamp(update_time),
+                    # Event times are stored as naive local times
+                    latest.timestamp() if latest else 0.0,
+                )
+                < cutoff
+            ]
+            for start in range(0, len(expired), 500):
+                sql_session.execute(
+                    delete(Session).where(
+                        Session.app_name == app_name,
+                        tuple_(Session.user_id, Session.id).in_(expired[start : start + 500]),
+                    )
+                )
+            sql_session.commit()
+        return len(expired)
+
+    def compact(self, app_name: str, max_events: int) -> int:
+        """Drop the oldest invocations of long sessions, returning the events dropped."""
+        from sqlalchemy import delete, func, select
+
+        Event = self.StorageEvent
+        dropped = 0
+        with self.session_service.database_session_factory() as sql_session:
+            long_sessions = sql_session.execute(
+                select(Event.user_id, Event.session_id)
+                .where(Event.app_name == app_name)
+                .group_by(Event.user_id, Event.session_id)
+                .having(func.count() > max_events)
+            ).all()
+            for user_id, session_id in long_sessions:
+                session_filter = (
+                    Event.app_name == app_name,
+                    Event.user_id == user_id,
+                    Event.session_id == session_id,
+                )
+                events = sql_session.execute(
+                    select(Event.author, Event.timestamp)
+                    .where(*session_filter)
+                    .order_by(Event.timestamp)
+                ).all()
+                cutoff = compaction_cutoff([author for author, _ in events], max_events)
+                if cutoff:
+                    result = sql_session.execute(
+                        delete(Event).where(
+                            *session_filter, Event.timestamp < events[cutoff].timestamp
+                        )
+                    )
+                    dropped += result.rowcount
+            sql_session.commit()
+        return dropped
+
+
+def create_session_maintenance(
+    session_service: BaseSessionService,
+) -> Optional[SessionMaintenance]:
+    """Create the maintenance for a session service, None if it is not supported."""
+    if isinstance(session_service, InMemorySessionService):
+        return InMemorySessionMaintenance(session_service)
+    if hasattr(session_service, "database_session_factory"):
+        return DatabaseSessionMaintenance(session_service)
+    return None
+
+
+async def run_session_maintenance(
+    maintenance: SessionMaintenance,
+    app_name: str,
+    ttl_seconds: float,
+    max_events: int,
+    interval_seconds: float,
+) -> None:
+    """Periodically evict idle sessions and compact event histories until cancelled.
+
+    Args:
+        maintenance: The maintenance of the session service
+        app_name: The name of the application
+        ttl_seconds: Idle time after which a session is deleted, 0 to keep sessions
+        max_events: Maximum number of events kept per session, 0 to keep all events
+        interval_seconds: Time between two maintenance runs
+    """
+    # In-memory sessions are changed by the request handlers on the event loop,
+    # so only the database maintenance runs in a thread
+    in_thread = isinstance(maintenance, DatabaseSessionMaintenance)
+
+    async def call(func, *args):
+        return await asyncio.to_thread(func, *args) if in_thread else func(*args)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            evicted = dropped = 0
+            if ttl_seconds:
+                evicted = await call(maintenance.evict_expired, app_name, ttl_seconds)
+            if max_events:
+                dropped = await call(maintenance.compact, app_name, max_events)
+            if evicted or dropped:
+                logger.info(
+                    "Session maintenance finished",
+                    evicted_sessions=evicted,
+                    dropped_events=dropped,
+                )
+        except Exception as e:
+            logger.error(f"Session maintenance failed: {e}")
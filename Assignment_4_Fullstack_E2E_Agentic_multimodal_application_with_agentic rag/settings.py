@@ -20,7 +20,7 @@ from pydantic_settings import (
     YamlConfigSettingsSource,
     PydanticBaseSettingsSource,
 )
-from typing import Type, Tuple
+from typing import Literal, Type, Tuple
 
 
 class Settings(BaseSettings):
@@ -35,6 +35,62 @@ class Settings(BaseSettings):
         BACKEND_URL: URL for the backend service API endpoint.
         STORAGE_BUCKET_NAME: Name of the Google Cloud Storage bucket for storing receipts.
         DB_COLLECTION_NAME: Name of the Firestore collection for storing receipts.
+        EMBEDDING_BACKEND: Embedding backend, "vertex" (Vertex AI) or "local"
+            (deterministic hashing embedder for tests and offline runs).
+        EMBEDDING_MODEL: Vertex AI embedding model name.
+        EMBEDDING_DIMENSION: Dimension of the embedding vectors.
+        EMBEDDING_BATCH_SIZE: Maximum number of texts embedded in one backend call.
+        EMBEDDING_BATCH_WAIT_MS: How long concurrent requests are collected into a batch.
+        EMBEDDING_CACHE_SIZE: Number of query embeddings kept in the LRU cache.
+        RECEIPT_STORE_BACKEND: Where receipts are stored and searched, "firestore"
+            or "local" (NumPy vector index on disk, works offline).
+        LOCAL_STORE_DIR: Directory of the local receipt store.
+        VECTOR_DISTANCE: Distance used by vector search, "euclidean" or "cosine".
+        VECTOR_ANN_INDEX: Approximate index of the local store, "none" (brute force),
+            "ivf" or "hnsw" (requires hnswlib).
+        VECTOR_IVF_NPROBE: Number of IVF lists scanned per query.
+        TOOL_THREAD_POOL_SIZE: Threads available to agent tools for blocking client calls.
+        MAX_CONCURRENT_REQUESTS_PER_USER: Chat requests processed concurrently per user,
+            in each backend worker process (the limit is not shared between workers).
+        USER_QUEUE_TIMEOUT_SECONDS: How long a request waits for a free per-user slot
+            before it is rejected with HTTP 429.
+        ATTACHMENT_DELIVERY: How response attachments are delivered, "inline" (base64
+            in the response body) or "url" (signed, short-lived /attachments URLs).
+        ATTACHMENT_URL_TTL_SECONDS: Validity of signed attachment URLs.
+        ATTACHMENT_URL_SECRET: Key for signing attachment URLs; random per process if empty,
+            so URLs then stop working on restarts. Required for "url" delivery with
+            several backend workers.
+        ATTACHMENT_CACHE_MAX_BYTES: Size limit of the in-memory attachment byte cache.
+        ATTACHMENT_DOWNLOAD_CONCURRENCY: Attachments downloaded concurrently per response.
+        IMAGE_UPLOAD_CONCURRENCY: Uploaded images stored concurrently per request.
+        IMAGE_MAX_DIMENSION: Longest side uploaded images are downscaled to before they
+            are stored and sent to the model; 0 keeps the original images.
+        IMAGE_JPEG_QUALITY: JPEG quality used when re-encoding downscaled images.
+        KNOWN_ARTIFACTS_MAX_ENTRIES: Number of stored images remembered to skip
+            existence checks in GCS.
+        IMAGE_HISTORY_MAX_BYTES: Image bytes of the most recent user messages kept in
+            the model request; older images are replaced by their ID placeholder.
+        KEYWORD_SEARCH_MAX_CANDIDATES: Most recent receipts scored by keyword search in
+            the Firestore store, which has no full-text index.
+        INGEST_EXTRACTION_MODEL: Gemini model extracting receipt data in bulk ingestion.
+        INGEST_CONCURRENCY: Receipt images extracted concurrently in bulk ingestion.
+        INGEST_BATCH_SIZE: Receipts deduplicated, embedded and written per batch.
+        INGEST_MAX_REQUEST_FILES: Maximum number of images of a bulk ingestion request.
+        INGEST_MAX_REQUEST_BYTES: Maximum total decoded image size of a bulk ingestion
+            request; larger collections are ingested with ingest_receipts.py.
+        SESSION_BACKEND: Where chat sessions are kept, "memory" (lost on restart, one
+            worker only) or "database" (SQLAlchemy database at SESSION_DB_URL).
+        SESSION_DB_URL: Database URL of the session store, e.g. "sqlite:///sessions.db"
+            or a Postgres URL shared by several replicas.
+        SESSION_TTL_SECONDS: Idle time after which a session is deleted; 0 keeps sessions.
+        SESSION_MAX_EVENTS: Events kept per session, older invocations are dropped;
+            0 keeps the full history.
+        SESSION_MAINTENANCE_INTERVAL_SECONDS: Time between session eviction and compaction runs.
+        BACKEND_WORKERS: Number of uvicorn worker processes of the backend, more than one
+            requires the "database" session backend, the "firestore" receipt store and,
+            with "url" attachment delivery, an ATTACHMENT_URL_SECRET.
+            Per-user request limits apply per worker, so a user may have
+            BACKEND_WORKERS * MAX_CONCURRENT_REQUESTS_PER_USER requests in progress.
     """
 
     GCLOUD_LOCATION: str
@@ -42,6 +98,42 @@ class Settings(BaseSettings):
     BACKEND_URL: str = "http://localhost:8081/chat"
     STORAGE_BUCKET_NAME: str = "personal-expense-assistant-receipts"
     DB_COLLECTION_NAME: str = "personal-expense-assistant-receipts"
+    EMBEDDING_BACKEND: Literal["vertex", "local"] = "vertex"
+    EMBEDDING_MODEL: str = "text-embedding-004"
+    EMBEDDING_DIMENSION: int = 768
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_BATCH_WAIT_MS: float = 10.0
+    EMBEDDING_CACHE_SIZE: int = 1024
+    RECEIPT_STORE_BACKEND: Literal["firestore", "local"] = "firestore"
+    LOCAL_STORE_DIR: str = "data/receipt_store"
+    VECTOR_DISTANCE: Literal["euclidean", "cosine"] = "euclidean"
+    VECTOR_ANN_INDEX: Literal["none", "ivf", "hnsw"] = "none"
+    VECTOR_IVF_NPROBE: int = 8
+    TOOL_THREAD_POOL_SIZE: int = 16
+    MAX_CONCURRENT_REQUESTS_PER_USER: int = 2
+    USER_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    ATTACHMENT_DELIVERY: Literal["inline", "url"] = "inline"
+    ATTACHMENT_URL_TTL_SECONDS: int = 300
+    ATTACHMENT_URL_SECRET: str = ""
+    ATTACHMENT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    ATTACHMENT_DOWNLOAD_CONCURRENCY: int = 4
+    IMAGE_UPLOAD_CONCURRENCY: int = 4
+    IMAGE_MAX_DIMENSION: int = 0
+    IMAGE_JPEG_QUALITY: int = 85
+    KNOWN_ARTIFACTS_MAX_ENTRIES: int = 100000
+    IMAGE_HISTORY_MAX_BYTES: int = 8 * 1024 * 1024
+    KEYWORD_SEARCH_MAX_CANDIDATES: int = 200
+    INGEST_EXTRACTION_MODEL: str = "gemini-2.5-flash"
+    INGEST_CONCURRENCY: int = 8
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_MAX_REQUEST_FILES: int = 100
+    INGEST_MAX_REQUEST_BYTES: int = 64 * 1024 * 1024
+    SESSION_BACKEND: Literal["memory", "database"] = "memory"
+    SESSION_DB_URL: str = "sqlite:///data/sessions.db"
+    SESSION_TTL_SECONDS: float = 24 * 60 * 60
+    SESSION_MAX_EVENTS: int = 200
+    SESSION_MAINTENANCE_INTERVAL_SECONDS: float = 300.0
+    BACKEND_WORKERS: int = 1
 
     model_config = SettingsConfigDict(
         yaml_file="settings.yaml", yaml_file_encoding="utf-8"
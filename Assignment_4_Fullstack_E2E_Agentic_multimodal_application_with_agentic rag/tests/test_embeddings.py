@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import pytest
+
+from expense_manager_agent.embeddings import EmbeddingService, HashingEmbeddingBackend
+
+
+class BlockingBackend(HashingEmbeddingBackend):
+    """Embeds only once released, to cancel callers while their batch runs."""
+
+    def __init__(self):
+        super().__init__(dimension=8)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def embed(self, texts):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return super().embed(texts)
+
+
+def test_cancelled_queued_caller_does_not_block_the_others():
+    service = EmbeddingService(HashingEmbeddingBackend(dimension=8), max_wait_ms=50)
+
+    async def run():
+        cancelled = asyncio.ensure_future(service.aembed_query("coffee"))
+        other = asyncio.ensure_future(service.aembed_query("groceries"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        vector = await asyncio.wait_for(other, timeout=5)
+        later = await asyncio.wait_for(service.aembed_query("taxi"), timeout=5)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return vector, later
+
+    vector, later = asyncio.run(run())
+    assert len(vector) == 8
+    assert len(later) == 8
+
+
+def test_caller_cancelled_during_the_batch_does_not_block_the_others():
+    backend = BlockingBackend()
+    service = EmbeddingService(backend, max_wait_ms=20)
+
+    async def run():
+        cancelled = asyncio.ensure_future(service.aembed_document("coffee"))
+        other = asyncio.ensure_future(service.aembed_document("groceries"))
+        await asyncio.get_running_loop().run_in_executor(None, backend.started.wait, 5)
+        cancelled.cancel()
+        await asyncio.sleep(0.01)
+        backend.release.set()
+        vector = await asyncio.wait_for(other, timeout=5)
+        later = await asyncio.wait_for(service.aembed_document("taxi"), timeout=5)
+        return vector, later
+
+    vector, later = asyncio.run(run())
+    assert len(vector) == 8
+    assert len(later) == 8
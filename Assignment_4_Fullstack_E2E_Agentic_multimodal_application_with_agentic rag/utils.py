@@ -16,6 +16,7 @@ limitations under the License.
 
 from google.cloud import storage
 from settings import get_settings
+import asyncio
 import base64
 import re
 from schema import ChatRequest, ImageData
@@ -23,6 +24,12 @@ from google.genai import types
 import hashlib
 import json
 from google.adk.artifacts import GcsArtifactService
+from attachments import (
+    ATTACHMENT_CACHE,
+    KNOWN_ARTIFACTS,
+    load_image_bytes,
+    prepare_image,
+)
 import logger
 
 
@@ -33,16 +40,20 @@ GCS_BUCKET_CLIENT = storage.Client(project=SETTINGS.GCLOUD_PROJECT_ID).get_bucke
 )
 
 
-def store_uploaded_image_as_artifact(
+async def store_uploaded_image_as_artifact(
     artifact_service: GcsArtifactService,
     app_name: str,
     user_id: str,
     session_id: str,
     image_data: ImageData,
-) -> tuple[str, bytes]:
+) -> tuple[str, bytes, str]:
     """
     Store an uploaded image as an artifact in Google Cloud Storage.
 
+    The image is downscaled and recompressed first if configured. Images this
+    process already knows to be stored skip both the re-encoding and the
+    existence check in GCS.
+
     Args:
         artifact_service: The artifact service to use for storing artifacts
         app_name: The name of the application
@@ -51,15 +62,33 @@ def store_uploaded_image_as_artifact(
         image_data: The image data to store
 
     Returns:
-        tuple[str, bytes]: A tuple containing the image hash ID and the image byte
+        tuple[str, bytes, str]: A tuple containing the image hash ID, the stored image byte
+            and its MIME type
     """
 
-    # Decode the base64 image data and use it to generate a hash id
-    image_byte = base64.b64decode(image_data.serialized_image)
-    hasher = hashlib.sha256(image_byte)
+    # Decode the base64 image data and use it to generate a hash id. The hash is
+    # taken over the original upload so the ID does not depend on the downscaling
+    original_byte = base64.b64decode(image_data.serialized_image)
+    hasher = hashlib.sha256(original_byte)
     image_hash_id = hasher.hexdigest()[:12]
+    artifact_key = (app_name, user_id, session_id, image_hash_id)
 
-    artifact_versions = artifact_service.list_versions(
+    cached = ATTACHMENT_CACHE.get(artifact_key)
+    if artifact_key in KNOWN_ARTIFACTS and cached is not None:
+        logger.info(f"Image {image_hash_id} already stored, skipping upload")
+        image_byte, mime_type = cached
+        return image_hash_id, image_byte, mime_type
+
+    image_byte, mime_type = await asyncio.to_thread(
+        prepare_image, original_byte, image_data.mime_type
+    )
+    ATTACHMENT_CACHE.put(artifact_key, image_byte, mime_type)
+
+    if artifact_key in KNOWN_ARTIFACTS:
+        logger.info(f"Image {image_hash_id} already stored, skipping upload")
+        return image_hash_id, image_byte, mime_type
+
+    artifact_versions = await artifact_service.list_versions(
         app_name=app_name,
         user_id=user_id,
         session_id=session_id,
@@ -67,23 +96,28 @@ def store_uploaded_image_as_artifact(
     )
     if artifact_versions:
         logger.info(f"Image {image_hash_id} already exists in GCS, skipping upload")
+        KNOWN_ARTIFACTS.add(artifact_key)
 
-        return image_hash_id, image_byte
+        return image_hash_id, image_byte, mime_type
 
-    artifact_service.save_artifact(
+    await artifact_service.save_artifact(
         app_name=app_name,
         user_id=user_id,
         session_id=session_id,
         filename=image_hash_id,
-        artifact=types.Part(
-            inline_data=types.Blob(mime_type=image_data.mime_type, data=image_byte)
-        ),
+        artifact=types.Part(inline_data=types.Blob(mime_type=mime_type, data=image_byte)),
     )
+    KNOWN_ARTIFACTS.add(artifact_key)
+    if len(image_byte) < len(original_byte):
+        logger.info(
+            f"Stored image {image_hash_id} downscaled from {len(original_byte)} "
+            f"to {len(image_byte)} bytes"
+        )
 
-    return image_hash_id, image_byte
+    return image_hash_id, image_byte, mime_type
 
 
-def download_image_from_gcs(
+async def download_image_from_gcs(
     artifact_service: GcsArtifactService,
     app_name: str,
     user_id: str,
@@ -93,7 +127,7 @@ def download_image_from_gcs(
     """
     Downloads an image artifact from Google Cloud Storage and
     returns it as base64 encoded string with its MIME type.
-    Uses local caching to avoid redundant downloads.
+    Uses the local attachment cache to avoid redundant downloads.
 
     Args:
         artifact_service: The artifact service to use for downloading artifacts
@@ -105,30 +139,21 @@ def download_image_from_gcs(
     Returns:
         tuple[str, str] | None: A tuple containing (base64_encoded_data, mime_type), or None if download fails
     """
-    try:
-        artifact = artifact_service.load_artifact(
-            app_name=app_name,
-            user_id=user_id,
-            session_id=session_id,
-            filename=image_hash,
-        )
-        if not artifact:
-            logger.info(f"Image {image_hash} does not exist in GCS Artifact Service")
-            return None
-
-        # Get the blob and mime type
-        image_data = artifact.inline_data.data
-        mime_type = artifact.inline_data.mime_type
-
-        logger.info(f"Downloaded image {image_hash} with type {mime_type}")
-
-        return base64.b64encode(image_data).decode("utf-8"), mime_type
-    except Exception as e:
-        logger.error(f"Error downloading image from GCS: {e}")
+    result = await load_image_bytes(
+        artifact_service=artifact_service,
+        app_name=app_name,
+        user_id=user_id,
+        session_id=session_id,
+        image_hash=image_hash,
+    )
+    if not result:
         return None
 
+    image_data, mime_type = result
+    return base64.b64encode(image_data).decode("utf-8"), mime_type
 
-def format_user_request_to_adk_content_and_store_artifacts(
+
+async def format_user_request_to_adk_content_and_store_artifacts(
     request: ChatRequest, app_name: str, artifact_service: GcsArtifactService
 ) -> types.Content:
     """Format a user request into ADK Content format.
@@ -144,23 +169,25 @@ def format_user_request_to_adk_content_and_store_artifacts(
     # Create a list to hold parts
     parts = []
 
-    # Handle image files if present
-    for data in request.files:
-        # Process the image and add string placeholder
+    # Store image files if present, several at a time
+    semaphore = asyncio.Semaphore(SETTINGS.IMAGE_UPLOAD_CONCURRENCY)
+
+    async def store(data: ImageData) -> tuple[str, bytes, str]:
+        async with semaphore:
+            return await store_uploaded_image_as_artifact(
+                artifact_service=artifact_service,
+                app_name=app_name,
+                user_id=request.user_id,
+                session_id=request.session_id,
+                image_data=data,
+            )
 
-        image_hash_id, image_byte = store_uploaded_image_as_artifact(
-            artifact_service=artifact_service,
-            app_name=app_name,
-            user_id=request.user_id,
-            session_id=request.session_id,
-            image_data=data,
-        )
+    stored_images = await asyncio.gather(*(store(data) for data in request.files))
 
-        # Add inline data part
+    for image_hash_id, image_byte, mime_type in stored_images:
+        # Add inline data part, with the same (possibly downscaled) bytes as stored
         parts.append(
-            types.Part(
-                inline_data=types.Blob(mime_type=data.mime_type, data=image_byte)
-            )
+            types.Part(inline_data=types.Blob(mime_type=mime_type, data=image_byte))
         )
 
         # Add image placeholder identifier
@@ -291,3 +318,89 @@ def extract_thinking_process(response_text: str) -> tuple[str, str]:
         ).strip()
 
     return sanitized_text, thinking_process
+
+
+class ResponseSectionStreamer:
+    """Split a streamed response into thinking process and final response deltas.
+
+    Incremental counterpart of `extract_thinking_process`: text chunks are fed as
+    they arrive and the new text of each section is returned. While inside the
+    thinking process, the last few characters are held back until it is clear
+    they are not the start of the FINAL RESPONSE heading. The final response is
+    only streamed up to the attachments JSON block or an image ID placeholder,
+    which are resolved by `extract_attachment_ids_and_sanitize_response` and
+    sent with the final event.
+    """
+
+    THINKING_HEADING = "# THINKING PROCESS"
+    THINKING_HEADING_PATTERN = re.compile(r"\s*#\s*THINKING PROCESS\s*")
+    FINAL_HEADING_PATTERN = re.compile(r"#\s*FINAL RESPONSE\s*")
+    # Enough to hold back a partially received FINAL RESPONSE heading
+    HOLD_BACK_CHARS = 24
+    # Start of attachment markup that must not be shown before it is sanitized
+    ATTACHMENT_MARKERS = ("```json", "[IMAGE-ID")
+
+    def __init__(self):
+        self._text = ""
+        self._sent = {"thinking": 0, "text": 0}
+
+    def feed(self, chunk: str) -> list[tuple[str, str]]:
+        """Add a chunk and return the new (section, delta) pairs, section being "thinking" or "text"."""
+        self._text += chunk
+        return self._deltas(final=False)
+
+    def close(self) -> list[tuple[str, str]]:
+        """Flush the held back text once the response is complete."""
+        return self._deltas(final=True)
+
+    def _sections(self, final: bool) -> tuple[str, str] | None:
+        text = self._text
+        stripped = text.lstrip()
+        if not final and len(stripped) < len(self.THINKING_HEADING):
+            if self.THINKING_HEADING.startswith(stripped):
+                return None  # Cannot tell yet whether a thinking section follows
+
+        heading = self.THINKING_HEADING_PATTERN.match(text)
+        if not heading:
+            return "", self._before_attachments(text, final)
+
+        body = text[heading.end() :]
+        final_heading = self.FINAL_HEADING_PATTERN.search(body)
+        if final_heading:
+            return body[: final_heading.start()], self._before_attachments(
+                body[final_heading.end() :], final
+            )
+        if final:
+            return body, ""
+        return body[: max(len(body) - self.HOLD_BACK_CHARS, 0)], ""
+
+    def _before_attachments(self, text: str, final: bool) -> str:
+        positions = [text.find(marker) for marker in self.ATTACHMENT_MARKERS]
+        start = min((position for position in positions if position >= 0), default=-1)
+        if start >= 0:
+            return text[:start]
+        if final:
+            return text
+        # Hold back an attachment marker that is only partially received
+        partial = max(
+            (
+                size
+                for marker in self.ATTACHMENT_MARKERS
+                for size in range(1, len(marker))
+                if text.endswith(marker[:size])
+            ),
+            default=0,
+        )
+        return text[: len(text) - partial]
+
+    def _deltas(self, final: bool) -> list[tuple[str, str]]:
+        sections = self._sections(final)
+        if sections is None:
+            return []
+
+        deltas = []
+        for name, section_text in zip(("thinking", "text"), sections):
+            if len(section_text) > self._sent[name]:
+                deltas.append((name, section_text[self._sent[name] :]))
+                self._sent[name] = len(section_text)
+        return deltas